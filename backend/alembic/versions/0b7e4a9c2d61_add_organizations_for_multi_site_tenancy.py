@@ -0,0 +1,116 @@
+"""Add organizations for multi-site tenancy
+
+Revision ID: 0b7e4a9c2d61
+Revises: f2c6d9a4b813
+Create Date: 2026-10-19 15:08:44.617203
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0b7e4a9c2d61'
+down_revision: Union[str, Sequence[str], None] = 'f2c6d9a4b813'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TENANT_TABLES = ('users', 'attendance', 'user_activities')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'organizations',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(), nullable=False),
+        sa.Column('slug', sa.String(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('slug'),
+    )
+    op.create_index(op.f('ix_organizations_id'), 'organizations', ['id'], unique=False)
+    # Everything that exists today belongs to the first site
+    op.execute("INSERT INTO organizations (id, name, slug, created_at) VALUES (1, 'Default', 'default', now())")
+    op.execute("SELECT setval(pg_get_serial_sequence('organizations', 'id'), 1)")
+
+    for table in TENANT_TABLES:
+        op.add_column(table, sa.Column('organization_id', sa.Integer(), nullable=True))
+        op.execute(f"UPDATE {table} SET organization_id = 1")
+        op.alter_column(table, 'organization_id', nullable=False)
+        op.create_foreign_key(f'fk_{table}_organization_id', table, 'organizations', ['organization_id'], ['id'])
+
+    # Indexes now lead on the tenant
+    op.drop_index('ix_users_name_prefix', table_name='users')
+    op.drop_index('ix_users_email_prefix', table_name='users')
+    op.drop_index('ix_users_change_seq', table_name='users')
+    op.create_index('ix_users_org_id', 'users', ['organization_id', 'id'], unique=False)
+    op.create_index('ix_users_org_name_prefix', 'users', ['organization_id', sa.text('lower(name) text_pattern_ops')], unique=False)
+    op.create_index('ix_users_org_email_prefix', 'users', ['organization_id', sa.text('lower(email) text_pattern_ops')], unique=False)
+    op.create_index('ix_users_org_change_seq', 'users', ['organization_id', 'change_seq'], unique=False)
+
+    op.drop_index('ix_attendance_change_seq', table_name='attendance')
+    op.create_index('ix_attendance_org_timestamp', 'attendance', ['organization_id', sa.text('timestamp DESC')], unique=False)
+    op.create_index('ix_attendance_org_change_seq', 'attendance', ['organization_id', 'change_seq'], unique=False)
+
+    op.drop_index('ix_user_activities_change_seq', table_name='user_activities')
+    op.create_index('ix_user_activities_org_timestamp', 'user_activities', ['organization_id', sa.text('timestamp DESC')], unique=False)
+    op.create_index('ix_user_activities_org_change_seq', 'user_activities', ['organization_id', 'change_seq'], unique=False)
+
+    # Tombstones carry the tenant so each site's delete feed stays separate
+    op.add_column('sync_tombstones', sa.Column('organization_id', sa.Integer(), nullable=True))
+    op.execute("UPDATE sync_tombstones SET organization_id = 1")
+    op.drop_index('ix_sync_tombstones_table_seq', table_name='sync_tombstones')
+    op.create_index('ix_sync_tombstones_org_table_seq', 'sync_tombstones', ['organization_id', 'table_name', 'change_seq'], unique=False)
+    op.execute("""
+        CREATE OR REPLACE FUNCTION sync_record_delete() RETURNS trigger AS $$
+        BEGIN
+            INSERT INTO sync_tombstones (table_name, row_id, user_id, organization_id, change_seq, deleted_at)
+            VALUES (TG_TABLE_NAME, OLD.id, (to_jsonb(OLD) ->> TG_ARGV[0])::int, OLD.organization_id,
+                    pg_current_xact_id()::text::bigint, now());
+            RETURN OLD;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("""
+        CREATE OR REPLACE FUNCTION sync_record_delete() RETURNS trigger AS $$
+        BEGIN
+            INSERT INTO sync_tombstones (table_name, row_id, user_id, change_seq, deleted_at)
+            VALUES (TG_TABLE_NAME, OLD.id, (to_jsonb(OLD) ->> TG_ARGV[0])::int,
+                    pg_current_xact_id()::text::bigint, now());
+            RETURN OLD;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+    op.drop_index('ix_sync_tombstones_org_table_seq', table_name='sync_tombstones')
+    op.create_index('ix_sync_tombstones_table_seq', 'sync_tombstones', ['table_name', 'change_seq'], unique=False)
+    op.drop_column('sync_tombstones', 'organization_id')
+
+    op.drop_index('ix_user_activities_org_change_seq', table_name='user_activities')
+    op.drop_index('ix_user_activities_org_timestamp', table_name='user_activities')
+    op.create_index('ix_user_activities_change_seq', 'user_activities', ['change_seq'], unique=False)
+
+    op.drop_index('ix_attendance_org_change_seq', table_name='attendance')
+    op.drop_index('ix_attendance_org_timestamp', table_name='attendance')
+    op.create_index('ix_attendance_change_seq', 'attendance', ['change_seq'], unique=False)
+
+    op.drop_index('ix_users_org_change_seq', table_name='users')
+    op.drop_index('ix_users_org_email_prefix', table_name='users')
+    op.drop_index('ix_users_org_name_prefix', table_name='users')
+    op.drop_index('ix_users_org_id', table_name='users')
+    op.create_index('ix_users_change_seq', 'users', ['change_seq'], unique=False)
+    op.create_index('ix_users_email_prefix', 'users', [sa.text('lower(email) text_pattern_ops')], unique=False)
+    op.create_index('ix_users_name_prefix', 'users', [sa.text('lower(name) text_pattern_ops')], unique=False)
+
+    for table in TENANT_TABLES:
+        op.drop_constraint(f'fk_{table}_organization_id', table, type_='foreignkey')
+        op.drop_column(table, 'organization_id')
+
+    op.drop_index(op.f('ix_organizations_id'), table_name='organizations')
+    op.drop_table('organizations')
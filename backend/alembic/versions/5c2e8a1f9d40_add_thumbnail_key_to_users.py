@@ -0,0 +1,28 @@
+"""Add thumbnail key to users
+
+Revision ID: 5c2e8a1f9d40
+Revises: 3036e77d7c03
+Create Date: 2026-10-19 09:12:04.118273
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5c2e8a1f9d40'
+down_revision: Union[str, Sequence[str], None] = '3036e77d7c03'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('users', sa.Column('thumbnail_key', sa.String(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('users', 'thumbnail_key')
@@ -0,0 +1,45 @@
+"""Add organization_id to jobs
+
+Revision ID: 6e1c3b8f4a27
+Revises: 9a4d2c7e6b15
+Create Date: 2026-10-19 21:14:52.308417
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6e1c3b8f4a27'
+down_revision: Union[str, Sequence[str], None] = '9a4d2c7e6b15'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('jobs', sa.Column('organization_id', sa.Integer(), nullable=True))
+    op.create_foreign_key('fk_jobs_organization_id', 'jobs', 'organizations', ['organization_id'], ['id'])
+    op.create_index('ix_jobs_org_status', 'jobs', ['organization_id', 'status'], unique=False)
+
+    # Queued and dead-lettered jobs take the tenant from their payload: an explicit
+    # organization_id, else the (first) user they act on. The rest are system-wide.
+    op.execute("""
+        UPDATE jobs SET organization_id = (payload ->> 'organization_id')::int
+        WHERE payload ->> 'organization_id' IS NOT NULL
+    """)
+    op.execute("""
+        UPDATE jobs SET organization_id = users.organization_id
+        FROM users
+        WHERE jobs.organization_id IS NULL
+          AND users.id = COALESCE((jobs.payload ->> 'user_id')::int, (jobs.payload -> 'user_ids' ->> 0)::int)
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_jobs_org_status', table_name='jobs')
+    op.drop_constraint('fk_jobs_organization_id', 'jobs', type_='foreignkey')
+    op.drop_column('jobs', 'organization_id')
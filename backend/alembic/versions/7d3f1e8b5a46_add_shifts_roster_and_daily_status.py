@@ -0,0 +1,90 @@
+"""Add shifts, roster and daily attendance status
+
+Revision ID: 7d3f1e8b5a46
+Revises: 0b7e4a9c2d61
+Create Date: 2026-10-19 15:47:12.280934
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7d3f1e8b5a46'
+down_revision: Union[str, Sequence[str], None] = '0b7e4a9c2d61'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'shifts',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('organization_id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(), nullable=False),
+        sa.Column('start_time', sa.Time(), nullable=False),
+        sa.Column('end_time', sa.Time(), nullable=False),
+        sa.Column('grace_minutes', sa.Integer(), nullable=False),
+        sa.Column('weekdays', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['organization_id'], ['organizations.id']),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index(op.f('ix_shifts_id'), 'shifts', ['id'], unique=False)
+    op.create_index('ix_shifts_org', 'shifts', ['organization_id'], unique=False)
+
+    op.create_table(
+        'roster_assignments',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('organization_id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('shift_id', sa.Integer(), nullable=False),
+        sa.Column('effective_from', sa.Date(), nullable=False),
+        sa.Column('effective_to', sa.Date(), nullable=True),
+        sa.ForeignKeyConstraint(['organization_id'], ['organizations.id']),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['shift_id'], ['shifts.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index(op.f('ix_roster_assignments_id'), 'roster_assignments', ['id'], unique=False)
+    op.create_index('ix_roster_org_effective', 'roster_assignments', ['organization_id', 'effective_from'], unique=False)
+    op.create_index('ix_roster_user', 'roster_assignments', ['user_id'], unique=False)
+
+    op.create_table(
+        'daily_attendance_status',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('organization_id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('shift_id', sa.Integer(), nullable=False),
+        sa.Column('status', sa.String(), nullable=False),
+        sa.Column('first_check_in', sa.DateTime(), nullable=True),
+        sa.Column('minutes_late', sa.Integer(), nullable=False),
+        sa.Column('computed_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('user_id', 'day', name='uq_daily_attendance_status_user_day'),
+    )
+    op.create_index(op.f('ix_daily_attendance_status_id'), 'daily_attendance_status', ['id'], unique=False)
+    op.create_index(
+        'ix_daily_attendance_status_org_day_status',
+        'daily_attendance_status',
+        ['organization_id', 'day', 'status'],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_daily_attendance_status_org_day_status', table_name='daily_attendance_status')
+    op.drop_index(op.f('ix_daily_attendance_status_id'), table_name='daily_attendance_status')
+    op.drop_table('daily_attendance_status')
+    op.drop_index('ix_roster_user', table_name='roster_assignments')
+    op.drop_index('ix_roster_org_effective', table_name='roster_assignments')
+    op.drop_index(op.f('ix_roster_assignments_id'), table_name='roster_assignments')
+    op.drop_table('roster_assignments')
+    op.drop_index('ix_shifts_org', table_name='shifts')
+    op.drop_index(op.f('ix_shifts_id'), table_name='shifts')
+    op.drop_table('shifts')
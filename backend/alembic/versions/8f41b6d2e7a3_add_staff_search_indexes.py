@@ -0,0 +1,30 @@
+"""Add staff search indexes
+
+Revision ID: 8f41b6d2e7a3
+Revises: 5c2e8a1f9d40
+Create Date: 2026-10-19 10:03:51.527140
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8f41b6d2e7a3'
+down_revision: Union[str, Sequence[str], None] = '5c2e8a1f9d40'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_users_name_prefix', 'users', [sa.text('lower(name) text_pattern_ops')], unique=False)
+    op.create_index('ix_users_email_prefix', 'users', [sa.text('lower(email) text_pattern_ops')], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_users_email_prefix', table_name='users')
+    op.drop_index('ix_users_name_prefix', table_name='users')
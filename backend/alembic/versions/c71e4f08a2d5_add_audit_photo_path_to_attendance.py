@@ -0,0 +1,28 @@
+"""Add audit photo path to attendance
+
+Revision ID: c71e4f08a2d5
+Revises: a3d9c7e15b62
+Create Date: 2026-10-19 12:14:09.730481
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c71e4f08a2d5'
+down_revision: Union[str, Sequence[str], None] = 'a3d9c7e15b62'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('attendance', sa.Column('audit_photo_path', sa.String(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('attendance', 'audit_photo_path')
@@ -0,0 +1,28 @@
+"""Add last login to users
+
+Revision ID: d94f2b6a0c18
+Revises: c71e4f08a2d5
+Create Date: 2026-10-19 13:02:55.184907
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd94f2b6a0c18'
+down_revision: Union[str, Sequence[str], None] = 'c71e4f08a2d5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('users', sa.Column('last_login', sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('users', 'last_login')
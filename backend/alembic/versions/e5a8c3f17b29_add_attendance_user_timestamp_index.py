@@ -0,0 +1,34 @@
+"""Add covering attendance user/timestamp index
+
+Revision ID: e5a8c3f17b29
+Revises: d94f2b6a0c18
+Create Date: 2026-10-19 13:41:07.352861
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5a8c3f17b29'
+down_revision: Union[str, Sequence[str], None] = 'd94f2b6a0c18'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        'ix_attendance_user_timestamp',
+        'attendance',
+        ['user_id', sa.text('timestamp DESC')],
+        unique=False,
+        postgresql_include=['id', 'location', 'battery_level'],
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_attendance_user_timestamp', table_name='attendance')
@@ -0,0 +1,89 @@
+"""Add change_seq columns and tombstones for delta sync
+
+Revision ID: f2c6d9a4b813
+Revises: e5a8c3f17b29
+Create Date: 2026-10-19 14:22:36.904512
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2c6d9a4b813'
+down_revision: Union[str, Sequence[str], None] = 'e5a8c3f17b29'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# table -> column holding the owning user's id (for per-user delete feeds)
+SYNCED_TABLES = {
+    'users': 'id',
+    'attendance': 'user_id',
+    'user_activities': 'user_id',
+}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Change tokens are 64-bit transaction ids (PostgreSQL 13+): monotonic, and
+    # pg_snapshot_xmin() tells us which ones can no longer commit "in the past".
+    op.execute("""
+        CREATE FUNCTION sync_stamp_change() RETURNS trigger AS $$
+        BEGIN
+            NEW.change_seq := pg_current_xact_id()::text::bigint;
+            RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE FUNCTION sync_record_delete() RETURNS trigger AS $$
+        BEGIN
+            INSERT INTO sync_tombstones (table_name, row_id, user_id, change_seq, deleted_at)
+            VALUES (TG_TABLE_NAME, OLD.id, (to_jsonb(OLD) ->> TG_ARGV[0])::int,
+                    pg_current_xact_id()::text::bigint, now());
+            RETURN OLD;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+
+    op.create_table(
+        'sync_tombstones',
+        sa.Column('id', sa.BigInteger(), sa.Identity(), nullable=False),
+        sa.Column('table_name', sa.String(), nullable=False),
+        sa.Column('row_id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=True),
+        sa.Column('change_seq', sa.BigInteger(), nullable=False),
+        sa.Column('deleted_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_sync_tombstones_table_seq', 'sync_tombstones', ['table_name', 'change_seq'], unique=False)
+
+    for table, owner_column in SYNCED_TABLES.items():
+        # Existing rows get 0: older than any token, so only a full sync returns them
+        op.add_column(table, sa.Column('change_seq', sa.BigInteger(), nullable=True))
+        op.execute(f"UPDATE {table} SET change_seq = 0")
+        op.create_index(f'ix_{table}_change_seq', table, ['change_seq'], unique=False)
+        op.execute(
+            f"CREATE TRIGGER trg_{table}_change_seq BEFORE INSERT OR UPDATE ON {table} "
+            f"FOR EACH ROW EXECUTE FUNCTION sync_stamp_change()"
+        )
+        op.execute(
+            f"CREATE TRIGGER trg_{table}_tombstone AFTER DELETE ON {table} "
+            f"FOR EACH ROW EXECUTE FUNCTION sync_record_delete('{owner_column}')"
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table in SYNCED_TABLES:
+        op.execute(f"DROP TRIGGER IF EXISTS trg_{table}_tombstone ON {table}")
+        op.execute(f"DROP TRIGGER IF EXISTS trg_{table}_change_seq ON {table}")
+        op.drop_index(f'ix_{table}_change_seq', table_name=table)
+        op.drop_column(table, 'change_seq')
+
+    op.drop_index('ix_sync_tombstones_table_seq', table_name='sync_tombstones')
+    op.drop_table('sync_tombstones')
+    op.execute("DROP FUNCTION IF EXISTS sync_record_delete()")
+    op.execute("DROP FUNCTION IF EXISTS sync_stamp_change()")
@@ -4,6 +4,131 @@ from dotenv import load_dotenv
 load_dotenv()  # Load from .env
 
 DATABASE_URL = os.getenv("DATABASE_URL")
+
+# Edge kiosk mode: a site-local instance on SQLite under EDGE_DATA_DIR instead of
+# DATABASE_URL (settings in the edge section below)
+EDGE_MODE = os.getenv("EDGE_MODE", "false").lower() == "true"
+EDGE_DATA_DIR = os.getenv("EDGE_DATA_DIR", "edge")
 SECRET_KEY = os.getenv("SECRET_KEY")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60
+
+# Photo storage: "local" (content-addressed files under STORAGE_ROOT) or "s3"
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "local")
+STORAGE_ROOT = os.getenv("STORAGE_ROOT", "uploads/blobs")
+STORAGE_CACHE_DIR = os.getenv("STORAGE_CACHE_DIR", "uploads/.blob_cache")
+S3_ENDPOINT_URL = os.getenv("S3_ENDPOINT_URL")  # e.g. http://localhost:9000 for MinIO
+S3_BUCKET = os.getenv("S3_BUCKET", "staff-photos")
+S3_ACCESS_KEY = os.getenv("S3_ACCESS_KEY")
+S3_SECRET_KEY = os.getenv("S3_SECRET_KEY")
+S3_REGION = os.getenv("S3_REGION")
+
+# Bulk staff import
+BULK_IMPORT_WORKERS = int(os.getenv("BULK_IMPORT_WORKERS", str(os.cpu_count() or 2)))
+BULK_IMPORT_BATCH_SIZE = int(os.getenv("BULK_IMPORT_BATCH_SIZE", "100"))
+BULK_IMPORT_MAX_PHOTO_BYTES = int(os.getenv("BULK_IMPORT_MAX_PHOTO_BYTES", str(10 * 1024 * 1024)))
+
+# Rate limiting / admission control
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true"
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "memory")  # "memory" or "redis"
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+# CV slots are per worker process: the host-wide cap is split across the
+# WEB_CONCURRENCY uvicorn/gunicorn workers unless CV_MAX_CONCURRENCY is set
+CV_HOST_CONCURRENCY = int(os.getenv("CV_HOST_CONCURRENCY", "2"))
+WEB_CONCURRENCY = max(1, int(os.getenv("WEB_CONCURRENCY", "1")))
+CV_MAX_CONCURRENCY = int(os.getenv("CV_MAX_CONCURRENCY", str(max(1, CV_HOST_CONCURRENCY // WEB_CONCURRENCY))))
+CV_QUEUE_TIMEOUT_SECONDS = float(os.getenv("CV_QUEUE_TIMEOUT_SECONDS", "5"))
+
+# Idempotency-Key replay cache
+IDEMPOTENCY_TTL_SECONDS = int(os.getenv("IDEMPOTENCY_TTL_SECONDS", "600"))
+IDEMPOTENCY_MAX_ENTRIES = int(os.getenv("IDEMPOTENCY_MAX_ENTRIES", "10000"))
+# "database": keys are claimed in the idempotency_keys table, so retries landing on
+# another worker replay too; "memory": per-process only (single worker / tests)
+IDEMPOTENCY_BACKEND = os.getenv("IDEMPOTENCY_BACKEND", "database")
+IDEMPOTENCY_LEASE_SECONDS = int(os.getenv("IDEMPOTENCY_LEASE_SECONDS", "120"))
+IDEMPOTENCY_WAIT_SECONDS = float(os.getenv("IDEMPOTENCY_WAIT_SECONDS", "30"))
+
+# Face verification result cache (keyed by perceptual hash of the frame)
+VERIFY_CACHE_TTL_SECONDS = int(os.getenv("VERIFY_CACHE_TTL_SECONDS", "120"))
+VERIFY_CACHE_MAX_ENTRIES = int(os.getenv("VERIFY_CACHE_MAX_ENTRIES", "5000"))
+VERIFY_CACHE_MAX_PER_USER = int(os.getenv("VERIFY_CACHE_MAX_PER_USER", "8"))
+VERIFY_CACHE_MAX_HAMMING = int(os.getenv("VERIFY_CACHE_MAX_HAMMING", "4"))
+
+# Background jobs: "inprocess" runs a worker inside each API process,
+# "external" leaves them to app/scripts/run_job_worker.py
+JOB_WORKER_MODE = os.getenv("JOB_WORKER_MODE", "inprocess")
+JOB_CONCURRENCY = int(os.getenv("JOB_CONCURRENCY", "4"))
+JOB_POLL_SECONDS = float(os.getenv("JOB_POLL_SECONDS", "2"))
+JOB_LOCK_TIMEOUT_SECONDS = int(os.getenv("JOB_LOCK_TIMEOUT_SECONDS", "300"))
+JOB_TIMEOUT_SECONDS = float(os.getenv("JOB_TIMEOUT_SECONDS", "60"))
+JOB_RETRY_BASE_SECONDS = float(os.getenv("JOB_RETRY_BASE_SECONDS", "5"))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "5"))
+
+# Audit capture of the accepted check-in face (stored outside the public /uploads mount)
+AUDIT_CAPTURE_ENABLED = os.getenv("AUDIT_CAPTURE_ENABLED", "false").lower() == "true"
+AUDIT_DIR = os.getenv("AUDIT_DIR", "audit_photos")
+AUDIT_RETENTION_DAYS = int(os.getenv("AUDIT_RETENTION_DAYS", "90"))
+AUDIT_QUEUE_SIZE = int(os.getenv("AUDIT_QUEUE_SIZE", "100"))
+AUDIT_WEBP_QUALITY = int(os.getenv("AUDIT_WEBP_QUALITY", "70"))
+AUDIT_MAX_FACE_PX = int(os.getenv("AUDIT_MAX_FACE_PX", "192"))
+
+# Database routing: comma-separated read replica URLs for reporting queries
+DATABASE_REPLICA_URLS = [url.strip() for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if url.strip()]
+REPLICA_MAX_LAG_SECONDS = float(os.getenv("REPLICA_MAX_LAG_SECONDS", "5"))
+REPLICA_LAG_CHECK_SECONDS = float(os.getenv("REPLICA_LAG_CHECK_SECONDS", "10"))
+SQL_ECHO = os.getenv("SQL_ECHO", "true").lower() == "true"
+
+# Attendance exports
+EXPORT_DIR = os.getenv("EXPORT_DIR", "exports")
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "2000"))
+# One export run may take this long (0 = no limit); finished files are deleted after the retention window
+EXPORT_JOB_TIMEOUT_SECONDS = float(os.getenv("EXPORT_JOB_TIMEOUT_SECONDS", "3600")) or None
+EXPORT_RETENTION_HOURS = float(os.getenv("EXPORT_RETENTION_HOURS", "24"))
+
+# Response compression: JSON/text bodies smaller than this are sent as-is
+COMPRESSION_MIN_BYTES = int(os.getenv("COMPRESSION_MIN_BYTES", "1024"))
+
+# Shared face template store (memory-mapped by every worker on the host). Keep it
+# outside uploads/: that directory is served publicly at /uploads.
+TEMPLATE_STORE_DIR = os.getenv(
+    "TEMPLATE_STORE_DIR", os.path.join(EDGE_DATA_DIR, "templates") if EDGE_MODE else "face_templates"
+)
+TEMPLATE_STORE_DTYPE = os.getenv("TEMPLATE_STORE_DTYPE", "uint8")  # uint8 | float32
+TEMPLATE_STORE_CHECK_SECONDS = float(os.getenv("TEMPLATE_STORE_CHECK_SECONDS", "2"))
+
+# Passive liveness: off | log (score and report only) | enforce (reject spoofs)
+LIVENESS_MODE = os.getenv("LIVENESS_MODE", "log").lower()
+LIVENESS_BUDGET_MS = float(os.getenv("LIVENESS_BUDGET_MS", "8"))
+LIVENESS_REJECT_SIGNALS = int(os.getenv("LIVENESS_REJECT_SIGNALS", "2"))  # failed signals needed to reject
+LIVENESS_MAX_MOIRE_RATIO = float(os.getenv("LIVENESS_MAX_MOIRE_RATIO", "12"))
+LIVENESS_MAX_SPECULAR_FRACTION = float(os.getenv("LIVENESS_MAX_SPECULAR_FRACTION", "0.04"))
+LIVENESS_MIN_CHROMA_STD = float(os.getenv("LIVENESS_MIN_CHROMA_STD", "2.5"))
+LIVENESS_MIN_SHARPNESS = float(os.getenv("LIVENESS_MIN_SHARPNESS", "40"))
+LIVENESS_MIN_MOTION = float(os.getenv("LIVENESS_MIN_MOTION", "1.5"))
+
+# Staff detail: how many recent check-ins / location pings are eager-loaded
+STAFF_DETAIL_RECENT_LIMIT = int(os.getenv("STAFF_DETAIL_RECENT_LIMIT", "20"))
+
+# Absence/lateness: how often today's (and yesterday's) roster results are recomputed
+ABSENCE_RECOMPUTE_MINUTES = int(os.getenv("ABSENCE_RECOMPUTE_MINUTES", "30"))
+
+# Edge kiosks: upstream is the central backend, authenticated with an admin token
+# of the site's organization; kiosks on the site LAN send EDGE_KIOSK_KEY
+EDGE_UPSTREAM_URL = os.getenv("EDGE_UPSTREAM_URL", "http://localhost:8000").rstrip("/")
+EDGE_UPSTREAM_TOKEN = os.getenv("EDGE_UPSTREAM_TOKEN")
+EDGE_KIOSK_KEY = os.getenv("EDGE_KIOSK_KEY")
+EDGE_SITE_ID = os.getenv("EDGE_SITE_ID", "edge")
+EDGE_SYNC_INTERVAL_SECONDS = float(os.getenv("EDGE_SYNC_INTERVAL_SECONDS", "30"))
+EDGE_SYNC_BATCH_SIZE = int(os.getenv("EDGE_SYNC_BATCH_SIZE", "500"))
+EDGE_SYNC_TIMEOUT_SECONDS = float(os.getenv("EDGE_SYNC_TIMEOUT_SECONDS", "20"))
+# Central side: largest (decompressed) check-in batch accepted from an edge
+EDGE_MAX_BATCH_BYTES = int(os.getenv("EDGE_MAX_BATCH_BYTES", str(8 * 1024 * 1024)))
+
+# On-demand sampling profiler (POST /admin/profile); off unless an admin starts a session
+PROFILER_ENABLED = os.getenv("PROFILER_ENABLED", "true").lower() == "true"
+PROFILER_MAX_SECONDS = float(os.getenv("PROFILER_MAX_SECONDS", "60"))
+PROFILER_INTERVAL_MS = float(os.getenv("PROFILER_INTERVAL_MS", "5"))
+
+# Readiness: warm-up retries back off up to this delay; /readyz pings the database each probe
+WARMUP_RETRY_MAX_SECONDS = float(os.getenv("WARMUP_RETRY_MAX_SECONDS", "30"))
+READY_DB_TIMEOUT_SECONDS = float(os.getenv("READY_DB_TIMEOUT_SECONDS", "2"))
@@ -1,21 +1,113 @@
+import os
+import time
+import itertools
+from sqlalchemy import event, text
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker, declarative_base
-from app.config import DATABASE_URL
+from app.config import (
+    DATABASE_URL,
+    EDGE_MODE,
+    EDGE_DATA_DIR,
+    DATABASE_REPLICA_URLS,
+    REPLICA_MAX_LAG_SECONDS,
+    REPLICA_LAG_CHECK_SECONDS,
+    SQL_ECHO,
+)
+
+def _async_url(url: str) -> str:
+    return url.replace("postgresql://", "postgresql+asyncpg://").replace("sqlite://", "sqlite+aiosqlite://")
+
+# ✅ Edge kiosks keep everything in a local SQLite file (no Postgres on site)
+if EDGE_MODE:
+    os.makedirs(EDGE_DATA_DIR, exist_ok=True)
+    PRIMARY_URL = f"sqlite:///{os.path.join(EDGE_DATA_DIR, 'edge.db')}"
+else:
+    PRIMARY_URL = DATABASE_URL
 
 engine = create_async_engine(
-    DATABASE_URL.replace("postgresql://", "postgresql+asyncpg://"),
-    echo=True
+    _async_url(PRIMARY_URL),
+    echo=SQL_ECHO
 )
 
+if EDGE_MODE:
+    @event.listens_for(engine.sync_engine, "connect")
+    def _sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        # WAL: check-ins (writer) never block the sync loop or status reads, and
+        # synchronous=NORMAL is still durable across application crashes
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute("PRAGMA busy_timeout=5000")
+        cursor.close()
+
 SessionLocal = sessionmaker(
     engine, class_=AsyncSession, expire_on_commit=False
 )
 
+# ✅ Optional read replicas for heavy reporting queries
+replica_engines = [
+    create_async_engine(_async_url(url), echo=SQL_ECHO, pool_pre_ping=True)
+    for url in DATABASE_REPLICA_URLS
+]
+ReplicaSessions = [
+    sessionmaker(replica, class_=AsyncSession, expire_on_commit=False)
+    for replica in replica_engines
+]
+_replica_cycle = itertools.cycle(range(len(ReplicaSessions))) if ReplicaSessions else None
+
+# replica index -> (checked_at, healthy)
+_replica_health = {}
+
 Base = declarative_base()
 
+# Seconds of replay lag; 0 when the replica has applied everything it received
+# (or isn't a streaming replica at all, e.g. a second standalone instance locally)
+_LAG_QUERY = text(
+    "SELECT CASE WHEN NOT pg_is_in_recovery() THEN 0 "
+    "WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+)
+
+async def _replica_is_healthy(index: int) -> bool:
+    checked_at, healthy = _replica_health.get(index, (0.0, False))
+    if time.monotonic() - checked_at < REPLICA_LAG_CHECK_SECONDS:
+        return healthy
+
+    try:
+        async with replica_engines[index].connect() as conn:
+            lag = (await conn.execute(_LAG_QUERY)).scalar() or 0
+        healthy = lag <= REPLICA_MAX_LAG_SECONDS
+        if not healthy:
+            print(f"[Database] Replica {index} lagging {lag:.1f}s, using primary")
+    except Exception as e:
+        print(f"[Database] Replica {index} unavailable: {e}")
+        healthy = False
+
+    _replica_health[index] = (time.monotonic(), healthy)
+    return healthy
+
+async def pick_read_sessionmaker():
+    if not ReplicaSessions:
+        return SessionLocal
+    # Round-robin over healthy replicas, falling back to the primary
+    for _ in range(len(ReplicaSessions)):
+        index = next(_replica_cycle)
+        if await _replica_is_healthy(index):
+            return ReplicaSessions[index]
+    return SessionLocal
+
 async def get_db():
     async with SessionLocal() as session:
         try:
             yield session
         finally:
             await session.close()
+
+async def get_read_db():
+    """Session for read-only reporting queries: a healthy replica if configured, else the primary"""
+    session_factory = await pick_read_sessionmaker()
+    async with session_factory() as session:
+        try:
+            yield session
+        finally:
+            await session.close()
@@ -1,12 +1,58 @@
+import time
+_import_started = time.perf_counter()
+
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 
 from app.routes import admin_routes
 from app.routes import user_routes
 from app.routes import user_activity  # ✅ This was missing
+from app.routes import media_routes
+from app.routes import health_routes
+from app.routes import export_routes
+from app.routes import sync_routes
+from app.routes import roster_routes
+from app.routes import edge_routes
+from app.routes import kiosk_routes
+from app.services import readiness, jobs, audit_capture, absence, edge, idempotency, exports
+from app.config import JOB_WORKER_MODE, COMPRESSION_MIN_BYTES, EDGE_MODE
+from app.services.thumbnails import THUMBNAIL_DIR
+from app.utils.static import ImmutableStaticFiles
+from app.utils.compression import CompressionMiddleware
+from app.utils.profiler import ProfilerMiddleware
+
+readiness.mark_imported(_import_started)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # ✅ Preload OpenCV + detectors in the background; /readyz flips to 200 when done
+    readiness.start_warm_up()
+    if EDGE_MODE:
+        # ✅ Edge kiosk: local SQLite store + background upstream sync, nothing Postgres-only
+        await edge.init_store()
+        edge.start_sync()
+        yield
+        await edge.stop_sync()
+        await readiness.stop_warm_up()
+        return
+    # ✅ Deferred work (absence recompute, template enrolment, exports, ...) runs off the request path
+    if JOB_WORKER_MODE == "inprocess":
+        jobs.start_worker()
+    audit_capture.start_writer()
+    await audit_capture.ensure_retention_scheduled()
+    await absence.ensure_scheduled()
+    await idempotency.ensure_purge_scheduled()
+    await exports.ensure_retention_scheduled()
+    yield
+    await audit_capture.stop_writer()
+    await jobs.stop_worker()
+    await readiness.stop_warm_up()
 
-app = FastAPI()
+# ✅ orjson for every JSON response (native datetime encoding, much faster than stdlib json)
+app = FastAPI(lifespan=lifespan, default_response_class=ORJSONResponse)
 
 # ✅ CORS middleware (important for mobile frontend apps like React Native)
 app.add_middleware(
@@ -17,10 +63,30 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# ✅ Mount static files for accessing uploaded images
-app.mount("/uploads", StaticFiles(directory="uploads"), name="uploads")
+# ✅ Brotli/gzip JSON bodies for mobile clients on slow networks
+app.add_middleware(CompressionMiddleware, minimum_size=COMPRESSION_MIN_BYTES)
+
+# ✅ Request accounting for POST /admin/profile sessions (a None check when idle)
+app.add_middleware(ProfilerMiddleware)
+
+if EDGE_MODE:
+    # ✅ Edge kiosk mode serves only the kiosk API (plus health checks) from its local store
+    app.include_router(kiosk_routes.router, tags=["Kiosk"])
+    app.include_router(health_routes.router, tags=["Health"])
+else:
+    # ✅ Content-hashed thumbnails (must be mounted before the generic /uploads mount)
+    app.mount("/uploads/thumbnails", ImmutableStaticFiles(directory=THUMBNAIL_DIR), name="thumbnails")
+
+    # ✅ Mount static files for accessing uploaded images
+    app.mount("/uploads", StaticFiles(directory="uploads"), name="uploads")
 
-# ✅ Include routes
-app.include_router(admin_routes.router, tags=["Admin"])
-app.include_router(user_routes.router, tags=["User"])
-app.include_router(user_activity.router, tags=["Activity"])
+    # ✅ Include routes
+    app.include_router(admin_routes.router, tags=["Admin"])
+    app.include_router(user_routes.router, tags=["User"])
+    app.include_router(user_activity.router, tags=["Activity"])
+    app.include_router(media_routes.router, tags=["Media"])
+    app.include_router(health_routes.router, tags=["Health"])
+    app.include_router(export_routes.router, tags=["Admin"])
+    app.include_router(sync_routes.router, tags=["Sync"])
+    app.include_router(roster_routes.router, tags=["Admin"])
+    app.include_router(edge_routes.router, tags=["Edge"])
@@ -1,7 +1,13 @@
 from app.models.base import Base
+from app.models.organization import Organization
 from app.models.user import User
 from app.models.attendance import Attendance
 from app.models.user_activity import UserActivity
+from app.models.job import Job
+from app.models.bulk_import_job import BulkImportJob
+from app.models.idempotency_key import IdempotencyKey
+from app.models.sync_tombstone import SyncTombstone
+from app.models.roster import Shift, RosterAssignment, DailyAttendanceStatus
 
 # Import relationships after all models are defined
 from app.models import relationships
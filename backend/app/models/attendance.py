@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, DateTime, ForeignKey,String
+from sqlalchemy import Column, Integer, BigInteger, DateTime, ForeignKey,String, Index, FetchedValue
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.models.base import Base
@@ -8,9 +8,29 @@ class Attendance(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer,  nullable=False)
+    organization_id = Column(Integer, nullable=False)
     timestamp = Column(DateTime, default=func.now())
 
     battery_level = Column(Integer, nullable=True)
     location = Column(String, nullable=True)
+    audit_photo_path = Column(String, nullable=True)
+    # Stamped by the sync_stamp_change trigger on every insert/update (delta sync token)
+    change_seq = Column(BigInteger, server_default=FetchedValue(), server_onupdate=FetchedValue())
+
+    # Fetch id/timestamp via INSERT ... RETURNING instead of a follow-up SELECT
+    __mapper_args__ = {"eager_defaults": True}
+
+    __table_args__ = (
+        # Covering index: per-user history is an index-only scan in timestamp order
+        Index(
+            "ix_attendance_user_timestamp",
+            user_id,
+            timestamp.desc(),
+            postgresql_include=["id", "location", "battery_level"],
+        ),
+        # Admin-wide listings within one organization
+        Index("ix_attendance_org_timestamp", organization_id, timestamp.desc()),
+        Index("ix_attendance_org_change_seq", "organization_id", "change_seq"),
+    )
 
    
\ No newline at end of file
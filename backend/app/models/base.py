@@ -1,2 +1,3 @@
-from sqlalchemy.orm import declarative_base
-Base = declarative_base()
+# Every model shares app.database.Base: one registry, so relationships between
+# any two models resolve and Alembic's target_metadata sees every table
+from app.database import Base
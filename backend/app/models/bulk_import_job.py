@@ -0,0 +1,25 @@
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, DateTime, JSON, Text, ForeignKey, Index
+from app.database import Base
+
+class BulkImportJob(Base):
+    """Progress and per-row report of a bulk staff import, readable from any worker"""
+    __tablename__ = "bulk_import_jobs"
+
+    id = Column(String, primary_key=True)  # uuid4 hex, handed out as job_id
+    organization_id = Column(Integer, ForeignKey("organizations.id"), nullable=False)
+    status = Column(String, nullable=False, default="queued")  # queued, running, completed, failed
+    total = Column(Integer, nullable=False, default=0)
+    processed = Column(Integer, nullable=False, default=0)
+    succeeded = Column(Integer, nullable=False, default=0)
+    failed = Column(Integer, nullable=False, default=0)
+    results = Column(JSON, nullable=False, default=list)
+    error = Column(Text, nullable=True)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        Index("ix_bulk_import_jobs_org_created", "organization_id", "created_at"),
+    )
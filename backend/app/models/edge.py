@@ -0,0 +1,47 @@
+from datetime import datetime
+from sqlalchemy import Column, Integer, Float, String, Date, DateTime, Index, UniqueConstraint
+from sqlalchemy.orm import declarative_base
+
+# Tables of an edge kiosk's local SQLite store. They live in their own metadata:
+# they never exist in the central Postgres database or its Alembic history.
+EdgeBase = declarative_base()
+
+class EdgeStaff(EdgeBase):
+    """Site staff mirrored from the central /sync/staff feed"""
+    __tablename__ = "edge_staff"
+
+    id = Column(Integer, primary_key=True)  # central users.id
+    name = Column(String)
+    email = Column(String)
+    photo_url = Column(String, nullable=True)  # upstream URL; also the template version
+    photo_file = Column(String, nullable=True)  # local copy under EDGE_DATA_DIR/photos
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
+class EdgeCheckIn(EdgeBase):
+    """A check-in recorded on site, kept until the central backend has acknowledged it"""
+    __tablename__ = "edge_checkins"
+
+    id = Column(Integer, primary_key=True)
+    ref = Column(String, nullable=False, unique=True)  # idempotency key for upstream retries
+    user_id = Column(Integer, nullable=False)
+    day = Column(Date, nullable=False)
+    timestamp = Column(DateTime, nullable=False)
+    location = Column(String, nullable=True)
+    battery_level = Column(Float, nullable=True)
+    # pending -> created | duplicate | replaced (outcome reported by the central backend)
+    status = Column(String, nullable=False, default="pending")
+    upstream_id = Column(Integer, nullable=True)  # central attendance.id
+    synced_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        # Same rule as the central backend: one check-in per user per day
+        UniqueConstraint("user_id", "day", name="uq_edge_checkins_user_day"),
+        Index("ix_edge_checkins_status", "status", "id"),
+    )
+
+class EdgeState(EdgeBase):
+    """Small key/value settings, e.g. the staff delta-sync token"""
+    __tablename__ = "edge_state"
+
+    key = Column(String, primary_key=True)
+    value = Column(String, nullable=True)
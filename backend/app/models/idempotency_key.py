@@ -0,0 +1,24 @@
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, DateTime, JSON, Index, UniqueConstraint
+from app.database import Base
+
+class IdempotencyKey(Base):
+    """Claim and outcome of a request sent with an Idempotency-Key, shared by all workers"""
+    __tablename__ = "idempotency_keys"
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, nullable=False)
+    scope = Column(String, nullable=False)  # route name, e.g. attendance_mark
+    key = Column(String, nullable=False)
+    status = Column(String, nullable=False, default="pending")  # pending (being handled), done
+    status_code = Column(Integer, nullable=True)
+    body = Column(JSON, nullable=True)  # JSON result, or the error detail for 4xx
+    headers = Column(JSON, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    # pending: claim lease (a dead worker's claim frees up after it); done: end of the replay window
+    expires_at = Column(DateTime, nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint("user_id", "scope", "key", name="uq_idempotency_keys_user_scope_key"),
+        Index("ix_idempotency_keys_expires_at", "expires_at"),
+    )
@@ -0,0 +1,15 @@
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, DateTime
+from app.database import Base
+
+class Organization(Base):
+    """A site/branch; every user, attendance row and activity belongs to exactly one"""
+    __tablename__ = "organizations"
+
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String, nullable=False)
+    slug = Column(String, unique=True, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+# Organization that pre-tenancy rows were migrated into
+DEFAULT_ORGANIZATION_ID = 1
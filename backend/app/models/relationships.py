@@ -1,6 +1,35 @@
-from sqlalchemy.orm import relationship
+from sqlalchemy import and_, func, select
+from sqlalchemy.orm import aliased, foreign, relationship
+from app.config import STAFF_DETAIL_RECENT_LIMIT
 from app.models.user import User
+from app.models.attendance import Attendance
 from app.models.user_activity import UserActivity
 
-# Add relationships after both models are defined
-User.activities = relationship("UserActivity", back_populates="user")
\ No newline at end of file
+
+def _recent(model, limit: int):
+    """Viewonly collection of a user's newest `limit` rows of model.
+
+    The rows are ranked per user with a window function, so one selectinload()
+    fetches the newest N for every loaded user in a single statement; Postgres
+    pushes the user_id IN (...) filter into the ranking subquery, which walks
+    the (user_id, timestamp DESC) index.
+    """
+    ranked = select(
+        model,
+        func.row_number()
+        .over(partition_by=model.user_id, order_by=(model.timestamp.desc(), model.id.desc()))
+        .label("recent_rank"),
+    ).subquery()
+    recent = aliased(model, ranked)
+    return relationship(
+        recent,
+        primaryjoin=and_(User.id == foreign(recent.user_id), ranked.c.recent_rank <= limit),
+        order_by=ranked.c.recent_rank,
+        viewonly=True,
+        lazy="raise",
+    )
+
+
+# Added after all models are defined
+User.recent_attendance = _recent(Attendance, STAFF_DETAIL_RECENT_LIMIT)
+User.recent_activities = _recent(UserActivity, STAFF_DETAIL_RECENT_LIMIT)
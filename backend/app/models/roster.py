@@ -0,0 +1,55 @@
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, Date, DateTime, Time, ForeignKey, Index, UniqueConstraint
+from app.database import Base
+
+class Shift(Base):
+    """A recurring working window, e.g. 09:00-17:00 Mon-Fri with 10 minutes' grace"""
+    __tablename__ = "shifts"
+
+    id = Column(Integer, primary_key=True, index=True)
+    organization_id = Column(Integer, ForeignKey("organizations.id"), nullable=False)
+    name = Column(String, nullable=False)
+    start_time = Column(Time, nullable=False)  # UTC, like attendance timestamps
+    end_time = Column(Time, nullable=False)
+    grace_minutes = Column(Integer, nullable=False, default=10)
+    weekdays = Column(Integer, nullable=False, default=0b0011111)  # bit 0 = Monday ... bit 6 = Sunday
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        Index("ix_shifts_org", "organization_id"),
+    )
+
+class RosterAssignment(Base):
+    """Puts a user on a shift for a date range (open-ended when effective_to is null)"""
+    __tablename__ = "roster_assignments"
+
+    id = Column(Integer, primary_key=True, index=True)
+    organization_id = Column(Integer, ForeignKey("organizations.id"), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    shift_id = Column(Integer, ForeignKey("shifts.id", ondelete="CASCADE"), nullable=False)
+    effective_from = Column(Date, nullable=False)
+    effective_to = Column(Date, nullable=True)
+
+    __table_args__ = (
+        Index("ix_roster_org_effective", "organization_id", "effective_from"),
+        Index("ix_roster_user", "user_id"),
+    )
+
+class DailyAttendanceStatus(Base):
+    """Materialized outcome per rostered user and day, maintained by services/absence.py"""
+    __tablename__ = "daily_attendance_status"
+
+    id = Column(Integer, primary_key=True, index=True)
+    organization_id = Column(Integer, nullable=False)
+    user_id = Column(Integer, nullable=False)
+    day = Column(Date, nullable=False)
+    shift_id = Column(Integer, nullable=False)
+    status = Column(String, nullable=False)  # present, late, absent, pending (shift not started yet)
+    first_check_in = Column(DateTime, nullable=True)
+    minutes_late = Column(Integer, nullable=False, default=0)
+    computed_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (
+        UniqueConstraint("user_id", "day", name="uq_daily_attendance_status_user_day"),
+        Index("ix_daily_attendance_status_org_day_status", "organization_id", "day", "status"),
+    )
@@ -0,0 +1,19 @@
+from datetime import datetime
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime, Index
+from app.database import Base
+
+class SyncTombstone(Base):
+    """Deleted rows of synced tables, written by the sync_record_delete trigger"""
+    __tablename__ = "sync_tombstones"
+
+    id = Column(BigInteger, primary_key=True)
+    table_name = Column(String, nullable=False)
+    row_id = Column(Integer, nullable=False)
+    organization_id = Column(Integer, nullable=True)
+    user_id = Column(Integer, nullable=True)  # owner, so per-user feeds can filter
+    change_seq = Column(BigInteger, nullable=False)
+    deleted_at = Column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        Index("ix_sync_tombstones_org_table_seq", "organization_id", "table_name", "change_seq"),
+    )
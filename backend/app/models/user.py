@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean
+from sqlalchemy import Column, Integer, BigInteger, String, Boolean, DateTime, ForeignKey, Index, FetchedValue, text
 from sqlalchemy.orm import relationship
 from app.database import Base
 
@@ -7,14 +7,29 @@ class User(Base):
     __tablename__ = "users"
 
     id = Column(Integer, primary_key=True, index=True)
+    organization_id = Column(Integer, ForeignKey("organizations.id"), nullable=False)
     email = Column(String, unique=True, index=True)
     name = Column(String)
     password = Column(String)
     is_admin = Column(Boolean, default=False)
     role = Column(String, default="user")
     photo_path = Column(String, nullable=True)
+    thumbnail_key = Column(String, nullable=True)
+    last_login = Column(DateTime, nullable=True)
+    # Stamped by the sync_stamp_change trigger on every insert/update (delta sync token)
+    change_seq = Column(BigInteger, server_default=FetchedValue(), server_onupdate=FetchedValue())
 
-    activities = relationship("Attendance", back_populates="user")
+    # Async sessions can't lazy load: eager-load with selectinload() instead
+    activities = relationship("UserActivity", back_populates="user", lazy="raise")
+
+    __table_args__ = (
+        # Every admin query is per organization, so indexes lead on organization_id
+        Index("ix_users_org_id", "organization_id", "id"),
+        # Case-insensitive prefix search for the admin staff list
+        Index("ix_users_org_name_prefix", "organization_id", text("lower(name) text_pattern_ops")),
+        Index("ix_users_org_email_prefix", "organization_id", text("lower(email) text_pattern_ops")),
+        Index("ix_users_org_change_seq", "organization_id", "change_seq"),
+    )
 
 
 
@@ -1,6 +1,6 @@
 # app/models/user_activity.py
 
-from sqlalchemy import Column, Integer, Float, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, BigInteger, Float, ForeignKey, DateTime, Index, FetchedValue
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.database import Base
@@ -10,10 +10,18 @@ class UserActivity(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"))
+    organization_id = Column(Integer, ForeignKey("organizations.id"), nullable=False)
     latitude = Column(Float)
     longitude = Column(Float)
     battery_level = Column(Float)
     timestamp = Column(DateTime(timezone=True), server_default=func.now())
+    # Stamped by the sync_stamp_change trigger on every insert/update (delta sync token)
+    change_seq = Column(BigInteger, server_default=FetchedValue(), server_onupdate=FetchedValue())
+
+    __table_args__ = (
+        Index("ix_user_activities_org_timestamp", organization_id, timestamp.desc()),
+        Index("ix_user_activities_org_change_seq", "organization_id", "change_seq"),
+    )
 
     user = relationship("User", back_populates="activities")
 
@@ -1,15 +1,33 @@
 import os
 import shutil
-from fastapi import APIRouter, Depends, UploadFile, File, Form, HTTPException, Header
+import asyncio
+import threading
+import tempfile
+import zipfile
+from fastapi import APIRouter, BackgroundTasks, Depends, UploadFile, File, Form, HTTPException, Header, Query, Request, Response
 from fastapi.security import OAuth2PasswordBearer
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse, ORJSONResponse, PlainTextResponse
+from fastapi.routing import APIRoute
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy import and_, func, desc
-from app.database import get_db
+from sqlalchemy import and_, or_, func, desc
+from sqlalchemy.orm import selectinload
+from app.database import get_db, get_read_db
 from app.models.user import User
 from app.models.user_activity import UserActivity  # Add this import
+from app.models.job import Job
+from app.models.attendance import Attendance
 from passlib.context import CryptContext
-from app.schemas.user import UserLogin, TokenResponse
+from app.schemas.user import UserLogin, TokenResponse, StaffOut, StaffPage
+from app.services import bulk_import, verification_cache, audit_capture, jobs
+from app.services.template_store import get_template_store
+from app.services.storage import get_blob_store, is_blob_key, media_url
+from app.services.thumbnails import generate_thumbnails_from_bytes, thumbnail_url
+from app.utils.conditional import watermark_etag, etag_matches, not_modified, with_etag
+from app.utils.auth import tenant_matches
+from app.utils import profiler
+from app.config import PROFILER_ENABLED, PROFILER_MAX_SECONDS, PROFILER_INTERVAL_MS
 from jose import jwt, JWTError
 from typing import Optional, List
 from pydantic import BaseModel
@@ -21,6 +39,7 @@ pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 # ✅ Fix: Make sure the tokenUrl matches your actual endpoint
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/admin/login")
 
+# Legacy flat photo directory (new photos go to the content-addressed blob store)
 UPLOAD_DIR = "uploads/staff_photos"
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 
@@ -46,6 +65,17 @@ class ActivityOut(BaseModel):
 def hash_password(password: str) -> str:
     return pwd_context.hash(password)
 
+def _escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+def _photo_url(photo_path: Optional[str]) -> Optional[str]:
+    if not photo_path:
+        return None
+    if is_blob_key(photo_path):
+        return media_url(photo_path)
+    # Legacy rows store a path relative to the API root, e.g. uploads/staff_photos/x.jpg
+    return "/" + photo_path.replace("\\", "/").lstrip("/")
+
 # 2. ✅ Enhanced auth functions with better error handling
 async def get_current_user(
     token: str = Depends(oauth2_scheme),
@@ -82,6 +112,10 @@ async def get_current_user(
     if user is None:
         print(f"❌ User not found for email: {email}")  # Debug log
         raise credentials_exception
+
+    if not tenant_matches(payload, user):
+        print(f"❌ Token organization does not match user: {email}")  # Debug log
+        raise credentials_exception
         
     print(f"✅ User validated: {user.email}, is_admin: {user.is_admin}")  # Debug log
     return user
@@ -151,6 +185,10 @@ async def get_current_user_manual(
     if user is None:
         print(f"❌ User not found: {email}")  # Debug log
         raise HTTPException(status_code=401, detail="User not found")
+
+    if not tenant_matches(payload, user):
+        print(f"❌ Token organization does not match user: {email}")  # Debug log
+        raise HTTPException(status_code=401, detail="Invalid token")
         
     print(f"✅ Manual auth successful: {user.email}")  # Debug log
     return user
@@ -189,7 +227,8 @@ async def admin_login(user: UserLogin, db: AsyncSession = Depends(get_db)):
 
     token_data = {
         "sub": admin.email,
-        "admin": True
+        "admin": True,
+        "org": admin.organization_id
     }
     token = jwt.encode(token_data, SECRET_KEY, algorithm="HS256")
     
@@ -205,7 +244,8 @@ async def admin_login(user: UserLogin, db: AsyncSession = Depends(get_db)):
 @router.get("/activities", response_model=List[ActivityOut])
 async def get_all_activities(
     limit: int = 100,
-    db: AsyncSession = Depends(get_db),
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get all activities with user details including last login"""
@@ -218,34 +258,47 @@ async def get_all_activities(
             detail=f"Only admin can view this data. Current user is_admin: {current_user.is_admin}"
         )
 
-    # Join with User table to get username, email and last_login
+    # change_seq is restamped on every update, so renames, role/photo changes and
+    # last_login bumps move its sum as well as inserts and deletes
+    org_id = current_user.organization_id
+    etag = await watermark_etag(
+        db,
+        select(func.count(UserActivity.id), func.max(UserActivity.id), func.sum(UserActivity.change_seq))
+        .where(UserActivity.organization_id == org_id),
+        select(func.count(User.id), func.max(User.id), func.sum(User.change_seq))
+        .where(User.organization_id == org_id),
+        salt=f"activities:{org_id}:{limit}",
+    )
+    if etag_matches(if_none_match, etag):
+        print("✅ Activities unchanged (304)")
+        return not_modified(etag)
+
+    # Join with User table to get username, email and last_login.
+    # Columns are labelled to match ActivityOut so rows map straight to JSON.
     query = (
-        select(UserActivity, User.username, User.email, User.last_login)
+        select(
+            UserActivity.id,
+            UserActivity.user_id,
+            User.name.label("username"),
+            User.email,
+            UserActivity.latitude,
+            UserActivity.longitude,
+            UserActivity.battery_level,
+            UserActivity.timestamp,
+            User.last_login,
+        )
         .join(User, UserActivity.user_id == User.id)
+        .where(UserActivity.organization_id == org_id)
         .order_by(desc(UserActivity.timestamp))
         .limit(limit)
     )
     
     result = await db.execute(query)
-    activities_with_users = result.fetchall()
-    
-    activities = []
-    for activity, username, email, last_login in activities_with_users:
-        activity_out = ActivityOut(
-            id=activity.id,
-            user_id=activity.user_id,
-            username=username,
-            email=email,
-            latitude=activity.latitude,
-            longitude=activity.longitude,
-            battery_level=activity.battery_level,
-            timestamp=activity.timestamp.isoformat(),
-            last_login=last_login.isoformat() if last_login else None
-        )
-        activities.append(activity_out)
+    activities = [row._asdict() for row in result]
     
     print(f"✅ Returning {len(activities)} activities")
-    return activities
+    # Trusted DB output: skip per-row model validation; orjson encodes datetimes natively
+    return with_etag(ORJSONResponse(activities), etag)
 
 # ✅ Add a test endpoint to verify auth is working
 @router.get("/test-auth")
@@ -257,6 +310,129 @@ async def test_auth(current_user: User = Depends(get_current_user)):
         "is_admin": current_user.is_admin
     }
 
+# ✅ Runtime metrics for this worker
+@router.get("/metrics")
+async def get_metrics(current_admin: User = Depends(get_current_admin)):
+    """In-process counters (each uvicorn worker reports its own)"""
+    return {
+        "verification_cache": verification_cache.snapshot(),
+        "audit_capture": await audit_capture.snapshot(),
+        "template_store": get_template_store().snapshot(),
+    }
+
+# ✅ On-demand sampling profiler for this worker
+@router.post("/profile")
+async def profile_worker(
+    request: Request,
+    seconds: float = Query(default=10, gt=0, le=PROFILER_MAX_SECONDS),
+    route: Optional[str] = Query(default=None, description="Route path to focus on, e.g. /attendance/mark"),
+    interval_ms: float = Query(default=PROFILER_INTERVAL_MS, ge=1, le=1000),
+    current_admin: User = Depends(get_current_admin)
+):
+    """Sample this worker's stacks for `seconds`, then return collapsed stacks (flamegraph.pl / speedscope).
+
+    The call blocks for the window so the result comes from the worker that
+    served it; with several uvicorn workers, repeat the call to cover others.
+    """
+    if not PROFILER_ENABLED:
+        raise HTTPException(status_code=404, detail="Profiler is disabled")
+
+    route_regex = endpoint_code = None
+    if route:
+        match = next((r for r in request.app.routes if isinstance(r, APIRoute) and r.path == route), None)
+        if match is None:
+            raise HTTPException(status_code=404, detail=f"No route '{route}'")
+        route_regex, endpoint_code = match.path_regex, match.endpoint.__code__
+
+    session = profiler.ProfileSession(
+        seconds,
+        interval_ms / 1000,
+        asyncio.get_running_loop(),
+        threading.get_ident(),
+        route_path=route,
+        route_regex=route_regex,
+        endpoint_code=endpoint_code,
+    )
+    if not profiler.begin(session):
+        raise HTTPException(status_code=409, detail="A profiling session is already running in this worker")
+
+    try:
+        await asyncio.sleep(seconds)
+    finally:
+        profiler.end()
+
+    summary = session.snapshot()
+    return PlainTextResponse(
+        session.collapsed(),
+        headers={
+            "X-Profile-Pid": str(os.getpid()),
+            "X-Profile-Samples": str(summary["samples"]),
+            "X-Profile-Requests": str(summary["requests"]),
+            "X-Profile-Seconds": str(summary["elapsed_seconds"]),
+            "Cache-Control": "no-store",
+        },
+    )
+
+# ✅ Dead-lettered background jobs of the admin's organization (system-wide jobs have none)
+@router.get("/jobs/dead")
+async def list_dead_jobs(
+    limit: int = Query(default=50, ge=1, le=500),
+    db: AsyncSession = Depends(get_db),
+    current_admin: User = Depends(get_current_admin)
+):
+    result = await db.execute(
+        select(Job)
+        .where(Job.organization_id == current_admin.organization_id, Job.status == "dead")
+        .order_by(desc(Job.updated_at))
+        .limit(limit)
+    )
+    return result.scalars().all()
+
+@router.post("/jobs/{job_id}/retry")
+async def retry_dead_job(
+    job_id: int,
+    db: AsyncSession = Depends(get_db),
+    current_admin: User = Depends(get_current_admin)
+):
+    result = await db.execute(
+        select(Job).where(
+            Job.id == job_id,
+            Job.organization_id == current_admin.organization_id,
+            Job.status == "dead",
+        )
+    )
+    job = result.scalar_one_or_none()
+    if not job:
+        raise HTTPException(status_code=404, detail="Dead job not found")
+
+    job.status = "pending"
+    job.attempts = 0
+    job.run_after = datetime.utcnow()
+    await db.commit()
+    print(f"✅ Job {job_id} requeued by {current_admin.email}")
+    return {"message": "Job requeued", "id": job_id}
+
+# ✅ Audit capture of an accepted check-in
+@router.get("/attendance/{attendance_id}/audit-photo")
+async def get_audit_photo(
+    attendance_id: int,
+    db: AsyncSession = Depends(get_db),
+    current_admin: User = Depends(get_current_admin)
+):
+    result = await db.execute(
+        select(Attendance.audit_photo_path).where(
+            Attendance.id == attendance_id,
+            Attendance.organization_id == current_admin.organization_id
+        )
+    )
+    relative = result.scalar_one_or_none()
+    path = audit_capture.audit_photo_full_path(relative) if relative else None
+    if not path:
+        raise HTTPException(status_code=404, detail="No audit photo for this attendance")
+
+    print(f"🔍 Audit photo for attendance #{attendance_id} viewed by {current_admin.email}")
+    return FileResponse(path, media_type="image/webp", headers={"Cache-Control": "private, max-age=3600"})
+
 # ✅ Debug endpoint for user info
 @router.get("/debug/user-info")
 async def debug_user_info(
@@ -311,6 +487,9 @@ async def add_staff_with_token(
     if not current_admin.is_admin:
         print(f"❌ User {current_admin.email} is not admin")
         raise HTTPException(status_code=403, detail="Admin access required")
+
+    if not tenant_matches(payload, current_admin):
+        raise HTTPException(status_code=401, detail="Invalid token")
     
     print(f"✅ Admin validated: {current_admin.email}")
     
@@ -332,18 +511,18 @@ async def add_staff_with_token(
 
     # Save base64 image
     import base64
-    filename = f"{email.replace('@', '_at_')}.jpg"
-    photo_path = os.path.join(UPLOAD_DIR, filename)
     
     try:
         image_bytes = base64.b64decode(image_data)
-        with open(photo_path, "wb") as f:
-            f.write(image_bytes)
+        photo_path = await get_blob_store().put(image_bytes, ".jpg")
         print(f"✅ Photo saved: {photo_path}")
     except Exception as e:
         print(f"❌ Photo save error: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to save photo")
 
+    # 🖼 Avatar derivatives (non-fatal: the backfill script can regenerate them)
+    thumbnail_key = await run_in_threadpool(generate_thumbnails_from_bytes, image_bytes)
+
     # Create user
     new_user = User(
         name=name,
@@ -352,10 +531,14 @@ async def add_staff_with_token(
         is_admin=False,
         role=role,
         photo_path=photo_path,
+        thumbnail_key=thumbnail_key,
+        organization_id=current_admin.organization_id,
     )
     
     try:
         db.add(new_user)
+        await db.flush()
+        jobs.enqueue(db, "templates.enroll", {"user_ids": [new_user.id]}, organization_id=new_user.organization_id)
         await db.commit()
         print(f"✅ Staff added successfully: {email}")
     except Exception as e:
@@ -364,7 +547,8 @@ async def add_staff_with_token(
 
     return {
         "message": "Staff added successfully with token in body",
-        "photo_url": f"/uploads/staff_photos/{filename}"
+        "photo_url": media_url(photo_path),
+        "thumbnail_url": thumbnail_url(thumbnail_key)
     }
 
 # -----------------------------
@@ -411,18 +595,18 @@ async def add_staff(
         print(f"❌ User already exists: {email}")
         raise HTTPException(status_code=400, detail="User already exists")
 
-    # 🔐 Save uploaded image with unique name
-    filename = f"{email.replace('@', '_at_')}.jpg"
-    photo_path = os.path.join(UPLOAD_DIR, filename)
-    
+    # 🔐 Save uploaded image under its content hash
     try:
-        with open(photo_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
+        image_bytes = await file.read()
+        photo_path = await get_blob_store().put(image_bytes, ".jpg")
         print(f"✅ Photo saved: {photo_path}")
     except Exception as e:
         print(f"❌ Photo save error: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to save photo")
 
+    # 🖼 Avatar derivatives (non-fatal: the backfill script can regenerate them)
+    thumbnail_key = await run_in_threadpool(generate_thumbnails_from_bytes, image_bytes)
+
     new_user = User(
         name=name,
         email=email,
@@ -430,10 +614,14 @@ async def add_staff(
         is_admin=False,
         role=role,
         photo_path=photo_path,
+        thumbnail_key=thumbnail_key,
+        organization_id=admin.organization_id,
     )
     
     try:
         db.add(new_user)
+        await db.flush()
+        jobs.enqueue(db, "templates.enroll", {"user_ids": [new_user.id]}, organization_id=new_user.organization_id)
         await db.commit()
         print(f"✅ Staff added successfully: {email}")
     except Exception as e:
@@ -442,9 +630,62 @@ async def add_staff(
 
     return {
         "message": "Staff added successfully",
-        "photo_url": f"/uploads/staff_photos/{filename}"
+        "photo_url": media_url(photo_path),
+        "thumbnail_url": thumbnail_url(thumbnail_key)
     }
 
+# -----------------------------
+# 📦 Bulk Staff Import (CSV + ZIP of photos)
+# -----------------------------
+@router.post("/bulk-import", status_code=202)
+async def bulk_import_staff(
+    background_tasks: BackgroundTasks,
+    csv_file: UploadFile = File(...),
+    photos_zip: UploadFile = File(...),
+    current_admin: User = Depends(get_current_admin)
+):
+    """CSV columns: name, email, password, role (optional), photo (filename inside the ZIP)"""
+    print(f"🔍 Bulk import request from admin: {current_admin.email}")
+
+    try:
+        rows = bulk_import.parse_csv(await csv_file.read())
+    except (ValueError, UnicodeDecodeError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid CSV: {str(e)}")
+
+    if not rows:
+        raise HTTPException(status_code=400, detail="CSV has no rows")
+
+    # Spool the archive to disk in chunks; members are read one at a time later
+    tmp = tempfile.NamedTemporaryFile(prefix="bulk-import-", suffix=".zip", delete=False)
+    try:
+        with tmp:
+            await run_in_threadpool(shutil.copyfileobj, photos_zip.file, tmp, 1024 * 1024)
+        if not zipfile.is_zipfile(tmp.name):
+            raise HTTPException(status_code=400, detail="photos_zip is not a ZIP archive")
+    except HTTPException:
+        os.remove(tmp.name)
+        raise
+
+    job = await bulk_import.create_job(total=len(rows), organization_id=current_admin.organization_id)
+    background_tasks.add_task(bulk_import.run_import, job, rows, tmp.name)
+
+    print(f"✅ Bulk import {job['job_id']} queued with {len(rows)} rows")
+    return {
+        "job_id": job["job_id"],
+        "total": job["total"],
+        "status_url": f"/admin/bulk-import/{job['job_id']}"
+    }
+
+@router.get("/bulk-import/{job_id}")
+async def bulk_import_status(
+    job_id: str,
+    current_admin: User = Depends(get_current_admin)
+):
+    job = await bulk_import.get_job(job_id)
+    if not job or job["organization_id"] != current_admin.organization_id:
+        raise HTTPException(status_code=404, detail="Import job not found")
+    return job
+
 # -----------------------------
 # 🗑 Delete Staff by Email
 # -----------------------------
@@ -468,13 +709,14 @@ async def delete_staff(
     
     try:
         # Find the user first
-        result = await db.execute(select(User).where(User.email == decoded_email))
+        org_filter = User.organization_id == current_admin.organization_id
+        result = await db.execute(select(User).where(User.email == decoded_email, org_filter))
         user = result.scalar_one_or_none()
         
         if not user:
             print(f"❌ User not found: {decoded_email}")
             # Also try original email in case decoding wasn't needed
-            result = await db.execute(select(User).where(User.email == email))
+            result = await db.execute(select(User).where(User.email == email, org_filter))
             user = result.scalar_one_or_none()
             
             if not user:
@@ -496,16 +738,30 @@ async def delete_staff(
             "photo_path": user.photo_path
         }
 
-        # 🧹 Delete associated photo if it exists
-        if user.photo_path and os.path.exists(user.photo_path):
+        # 🧹 Delete associated photo unless another user shares the same blob
+        if is_blob_key(user.photo_path):
+            shared = await db.execute(
+                select(func.count(User.id)).where(
+                    User.photo_path == user.photo_path,
+                    User.id != user.id
+                )
+            )
+            if shared.scalar() == 0:
+                try:
+                    await get_blob_store().delete(user.photo_path)
+                    print(f"✅ Deleted photo blob: {user.photo_path}")
+                except Exception as e:
+                    print(f"⚠️ Could not delete photo: {str(e)}")
+        elif user.photo_path and os.path.exists(user.photo_path):
             try:
                 os.remove(user.photo_path)
                 print(f"✅ Deleted photo: {user.photo_path}")
             except Exception as e:
                 print(f"⚠️ Could not delete photo: {str(e)}")
 
-        # Delete the user
+        # Delete the user (and drop their row from the shared template store)
         await db.delete(user)
+        jobs.enqueue(db, "templates.remove", {"user_ids": [user_info["id"]]}, organization_id=current_admin.organization_id)
         await db.commit()
         print(f"✅ Staff deleted successfully: {user_info['email']}")
         
@@ -525,15 +781,126 @@ async def delete_staff(
 # -----------------------------
 # 📃 List All Staff (Non-admin)
 # -----------------------------
-@router.get("/list-staff")
+@router.get("/list-staff", response_model=StaffPage)
 async def list_staff(
-    db: AsyncSession = Depends(get_db),
+    q: Optional[str] = None,
+    cursor: Optional[int] = None,
+    limit: int = Query(default=50, ge=1, le=200),
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_read_db),
     current_admin: User = Depends(get_current_admin)
 ):
+    """Staff page ordered by id; pass the returned next_cursor to get the next page"""
     print(f"🔍 List staff request from: {current_admin.email}")  # Debug log
-    
-    result = await db.execute(select(User).where(User.is_admin == False))
-    staff = result.scalars().all()
-    
-    print(f"✅ Found {len(staff)} staff members")  # Debug log
-    return staff
\ No newline at end of file
+
+    # Any insert, delete or update (rename, role, photo) of the org's staff moves
+    # one of these, so a revalidation is answered before the page query runs
+    org_id = current_admin.organization_id
+    etag = await watermark_etag(
+        db,
+        select(func.count(User.id), func.max(User.id), func.sum(User.change_seq))
+        .where(User.organization_id == org_id, User.is_admin == False),
+        salt=f"staff:{org_id}:{q}:{cursor}:{limit}",
+    )
+    if etag_matches(if_none_match, etag):
+        print("✅ Staff list unchanged (304)")  # Debug log
+        return not_modified(etag)
+
+    # Only the columns the staff screen needs (never the password hash)
+    query = (
+        select(User.id, User.name, User.email, User.role, User.photo_path, User.thumbnail_key)
+        .where(User.organization_id == org_id, User.is_admin == False)
+        .order_by(User.id)
+        .limit(limit + 1)
+    )
+    if cursor is not None:
+        query = query.where(User.id > cursor)
+    if q:
+        # Prefix match served by the lower(...) text_pattern_ops indexes
+        pattern = _escape_like(q.strip().lower()) + "%"
+        query = query.where(
+            or_(
+                func.lower(User.name).like(pattern, escape="\\"),
+                func.lower(User.email).like(pattern, escape="\\"),
+            )
+        )
+
+    result = await db.execute(query)
+    rows = result.all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = rows[-1].id
+
+    page = StaffPage(
+        items=[
+            StaffOut(
+                id=row.id,
+                name=row.name,
+                email=row.email,
+                role=row.role,
+                photo_url=_photo_url(row.photo_path),
+                thumbnail_url=thumbnail_url(row.thumbnail_key),
+            )
+            for row in rows
+        ],
+        next_cursor=next_cursor,
+    )
+
+    print(f"✅ Found {len(rows)} staff members")  # Debug log
+    return with_etag(Response(content=page.model_dump_json(), media_type="application/json"), etag)
+
+# -----------------------------
+# 👤 Staff Detail
+# -----------------------------
+@router.get("/staff/{user_id}")
+async def get_staff_detail(
+    user_id: int,
+    db: AsyncSession = Depends(get_read_db),
+    current_admin: User = Depends(get_current_admin)
+):
+    """One staff member with their newest check-ins and location pings.
+
+    Three statements whatever the history size: the user, then one SELECT ... IN
+    per eager-loaded collection (each already limited per user, see
+    app/models/relationships.py).
+    """
+    result = await db.execute(
+        select(User)
+        .where(User.id == user_id, User.organization_id == current_admin.organization_id)
+        .options(selectinload(User.recent_attendance), selectinload(User.recent_activities))
+    )
+    user = result.scalar_one_or_none()
+    if not user:
+        raise HTTPException(status_code=404, detail="Staff not found")
+
+    return ORJSONResponse({
+        "id": user.id,
+        "name": user.name,
+        "email": user.email,
+        "role": user.role,
+        "photo_url": _photo_url(user.photo_path),
+        "thumbnail_url": thumbnail_url(user.thumbnail_key),
+        "last_login": user.last_login,
+        "recent_attendance": [
+            {
+                "id": row.id,
+                "timestamp": row.timestamp,
+                "location": row.location,
+                "battery_level": row.battery_level,
+                "has_audit_photo": row.audit_photo_path is not None,
+            }
+            for row in user.recent_attendance
+        ],
+        "recent_activities": [
+            {
+                "id": row.id,
+                "latitude": row.latitude,
+                "longitude": row.longitude,
+                "battery_level": row.battery_level,
+                "timestamp": row.timestamp,
+            }
+            for row in user.recent_activities
+        ],
+    })
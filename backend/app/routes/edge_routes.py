@@ -0,0 +1,55 @@
+import zlib
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import ORJSONResponse
+from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import EDGE_MAX_BATCH_BYTES
+from app.database import get_db
+from app.models.user import User
+from app.routes.admin_routes import get_current_admin
+from app.schemas.edge import EdgeCheckInBatch
+from app.services import edge
+
+# Central backend side of edge kiosk mode: sites authenticate with an admin
+# token of their organization and upload check-ins recorded while offline.
+router = APIRouter(prefix="/edge", tags=["Edge"])
+
+def _decompress(body: bytes, encoding: str) -> bytes:
+    if encoding in ("", "identity"):
+        if len(body) > EDGE_MAX_BATCH_BYTES:
+            raise HTTPException(status_code=413, detail="Batch too large")
+        return body
+    if encoding != "gzip":
+        raise HTTPException(status_code=415, detail=f"Unsupported Content-Encoding '{encoding}'")
+
+    # Bounded inflate: a small gzip bomb can't expand past the batch limit
+    decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    try:
+        data = decompressor.decompress(body, EDGE_MAX_BATCH_BYTES)
+    except zlib.error:
+        raise HTTPException(status_code=400, detail="Invalid gzip body")
+    if decompressor.unconsumed_tail:
+        raise HTTPException(status_code=413, detail="Batch too large")
+    return data
+
+# ---------- CHECK-IN UPLOAD ----------
+@router.post("/checkins")
+async def upload_checkins(
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+    current_admin: User = Depends(get_current_admin)
+):
+    """Apply a (gzip-compressed) batch of edge check-ins; returns an outcome per ref"""
+    body = _decompress(await request.body(), request.headers.get("content-encoding", "").strip().lower())
+    try:
+        batch = EdgeCheckInBatch.model_validate_json(body)
+    except ValidationError as e:
+        raise HTTPException(status_code=422, detail=e.errors())
+
+    results = await edge.ingest_checkins(db, current_admin.organization_id, batch.checkins)
+
+    counts = {}
+    for result in results:
+        counts[result["status"]] = counts.get(result["status"], 0) + 1
+    print(f"[Edge] Site '{batch.site}' uploaded {len(results)} check-ins: {counts}")
+    return ORJSONResponse({"results": results, "counts": counts})
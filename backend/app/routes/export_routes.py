@@ -0,0 +1,94 @@
+import os
+from datetime import date
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import FileResponse, JSONResponse, StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from app.database import get_db, pick_read_sessionmaker
+from app.models.job import Job
+from app.models.user import User
+from app.routes.admin_routes import get_current_admin
+from app.services import exports, jobs
+
+router = APIRouter(prefix="/admin/exports", tags=["Admin"])
+
+# ---------- STREAMING CSV EXPORT ----------
+@router.get("/attendance.csv.gz")
+async def stream_attendance_csv(
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    user_id: Optional[int] = None,
+    current_admin: User = Depends(get_current_admin)
+):
+    """Gzipped CSV streamed straight from a server-side cursor (constant memory)"""
+    print(f"🔍 CSV export by {current_admin.email}: {start} → {end}, user {user_id}")
+
+    async def body():
+        # The session must live as long as the response body, not the request handler
+        session_factory = await pick_read_sessionmaker()
+        async with session_factory() as db:
+            batches = exports.iter_attendance_batches(db, current_admin.organization_id, start, end, user_id)
+            async for chunk in exports.stream_csv_gzip(batches):
+                yield chunk
+
+    filename = f"attendance_{start or 'all'}_{end or 'now'}.csv.gz"
+    return StreamingResponse(
+        body(),
+        media_type="application/gzip",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+# ---------- BACKGROUND EXPORTS (CSV / XLSX / PARQUET) ----------
+@router.post("/attendance", status_code=202)
+async def create_attendance_export(
+    format: str = Query(default="csv", pattern="^(csv|xlsx|parquet)$"),
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    user_id: Optional[int] = None,
+    db: AsyncSession = Depends(get_db),
+    current_admin: User = Depends(get_current_admin)
+):
+    export_id = exports.new_export_id()
+    jobs.enqueue(db, "export.attendance", {
+        "export_id": export_id,
+        "organization_id": current_admin.organization_id,
+        "format": format,
+        "start": start.isoformat() if start else None,
+        "end": end.isoformat() if end else None,
+        "user_id": user_id,
+    }, max_attempts=2, organization_id=current_admin.organization_id)
+    await db.commit()
+
+    print(f"✅ Export {export_id} ({format}) queued by {current_admin.email}")
+    return {"export_id": export_id, "status_url": f"/admin/exports/{export_id}?format={format}"}
+
+@router.get("/{export_id}")
+async def get_attendance_export(
+    export_id: str,
+    format: str = Query(default="csv", pattern="^(csv|xlsx|parquet)$"),
+    db: AsyncSession = Depends(get_db),
+    current_admin: User = Depends(get_current_admin)
+):
+    """Download the artifact when ready; 202 while it is still being written"""
+    if not export_id.isalnum():
+        raise HTTPException(status_code=404, detail="Export not found")
+
+    path = exports.artifact_path(export_id, format, current_admin.organization_id)
+    if os.path.exists(path):
+        extension, media_type = exports.EXPORT_FORMATS[format]
+        return FileResponse(path, media_type=media_type, filename=f"attendance_{export_id}.{extension}")
+
+    result = await db.execute(
+        select(Job.status, Job.last_error).where(
+            Job.kind == "export.attendance",
+            Job.payload["export_id"].as_string() == export_id,
+            Job.payload["organization_id"].as_integer() == current_admin.organization_id,
+        )
+    )
+    job = result.first()
+    if job is None:
+        raise HTTPException(status_code=404, detail="Export not found")
+    if job.status == "dead":
+        return JSONResponse(status_code=500, content={"status": "failed", "error": job.last_error})
+    return JSONResponse(status_code=202, content={"status": job.status})
@@ -0,0 +1,18 @@
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+from app.services import readiness
+
+router = APIRouter(tags=["Health"])
+
+# ---------- LIVENESS ----------
+@router.get("/healthz")
+async def healthz():
+    """The process is up and serving requests"""
+    return {"status": "ok"}
+
+# ---------- READINESS ----------
+@router.get("/readyz")
+async def readyz():
+    """200 once OpenCV/detectors are warmed up and while the database is reachable, 503 otherwise"""
+    status_code = 200 if await readiness.check() else 503
+    return JSONResponse(status_code=status_code, content=readiness.state)
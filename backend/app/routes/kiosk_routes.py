@@ -0,0 +1,91 @@
+import hmac
+import asyncio
+from pathlib import Path
+from typing import Optional
+from fastapi import APIRouter, Depends, File, Form, Header, HTTPException, UploadFile
+from fastapi.responses import ORJSONResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from app.config import EDGE_KIOSK_KEY
+from app.database import get_db
+from app.models.edge import EdgeStaff
+from app.services import edge
+from app.services.face_recognition import _verify_against_stored
+from app.services.rate_limit import cv_slot
+from app.services.template_store import get_template_store
+
+# Edge kiosk mode (EDGE_MODE=true): check-ins are verified and recorded against
+# the site's local store and reach the central backend through services/edge.py.
+async def require_kiosk_key(x_kiosk_key: Optional[str] = Header(None)):
+    if not EDGE_KIOSK_KEY:
+        raise HTTPException(status_code=503, detail="EDGE_KIOSK_KEY is not configured")
+    if not x_kiosk_key or not hmac.compare_digest(x_kiosk_key, EDGE_KIOSK_KEY):
+        raise HTTPException(status_code=401, detail="Invalid kiosk key")
+
+router = APIRouter(prefix="/kiosk", tags=["Kiosk"], dependencies=[Depends(require_kiosk_key)])
+
+# ---------- STAFF PICKER ----------
+@router.get("/staff")
+async def list_kiosk_staff(db: AsyncSession = Depends(get_db)):
+    result = await db.execute(select(EdgeStaff.id, EdgeStaff.name).order_by(EdgeStaff.name))
+    return ORJSONResponse([row._asdict() for row in result])
+
+# ---------- MARK ATTENDANCE (OFFLINE-CAPABLE) ----------
+@router.post("/attendance/mark")
+async def kiosk_mark_attendance(
+    user_id: int = Form(...),
+    file: UploadFile = File(...),
+    location: str = Form(...),
+    battery_level: str = Form(...),
+    motion_frame: Optional[UploadFile] = File(None),
+    db: AsyncSession = Depends(get_db)
+):
+    staff = await db.get(EdgeStaff, user_id)
+    if not staff:
+        raise HTTPException(status_code=404, detail="Unknown staff member")
+    if not staff.photo_file:
+        raise HTTPException(status_code=409, detail="No enrolled photo on this kiosk yet")
+
+    print(f"[Kiosk] Check-in for {staff.name} at {location}")
+    image_bytes = await file.read()
+    second_frame = await motion_frame.read() if motion_frame is not None else None
+
+    # Same matcher as the central /attendance/mark, fed from the local template cache
+    stored_encoding = get_template_store().get(staff.id, staff.photo_url)
+    liveness = {}
+    async with cv_slot():
+        passed, distance, _ = await asyncio.to_thread(
+            _verify_against_stored, Path(staff.photo_file), image_bytes, stored_encoding, second_frame, liveness
+        )
+    if not passed:
+        print(f"[Kiosk] ❌ Face verification failed for {staff.name} (distance {distance})")
+        raise HTTPException(status_code=403, detail="Face verification failed")
+
+    try:
+        battery_float = float(battery_level)
+    except ValueError:
+        battery_float = 0.0
+
+    try:
+        checkin = await edge.record_checkin(db, staff.id, location, battery_float)
+    except edge.AlreadyMarked:
+        raise HTTPException(status_code=400, detail="Attendance already marked today")
+
+    print(f"[Kiosk] ✅ Recorded check-in {checkin.ref} for {staff.name} (pending upstream)")
+    return {
+        "message": "Attendance marked successfully",
+        "ref": checkin.ref,
+        "timestamp": checkin.timestamp,
+        "user_name": staff.name,
+        "synced": False,
+    }
+
+# ---------- STATUS / MANUAL SYNC ----------
+@router.get("/status")
+async def kiosk_status():
+    return await edge.snapshot()
+
+@router.post("/sync")
+async def kiosk_sync(full: bool = False):
+    """Sync now instead of waiting for the interval; full=true re-pulls every staff member"""
+    return await edge.sync_once(full_staff=full)
@@ -0,0 +1,29 @@
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import FileResponse, Response
+from app.services.storage import get_blob_store, is_blob_key, MEDIA_URL_PREFIX
+from app.utils.static import IMMUTABLE_CACHE_CONTROL
+
+router = APIRouter(prefix=MEDIA_URL_PREFIX, tags=["Media"])
+
+# ---------- CONTENT-ADDRESSED PHOTOS ----------
+@router.get("/{key:path}")
+async def get_media(key: str, request: Request):
+    """Serve a blob through the configured store (local disk or S3 read-through cache)"""
+    if not is_blob_key(key):
+        raise HTTPException(status_code=404, detail="Not found")
+
+    # The key is a content hash, so it doubles as a strong ETag
+    etag = f'"{key.rsplit("/", 1)[-1]}"'
+    headers = {"ETag": etag, "Cache-Control": IMMUTABLE_CACHE_CONTROL}
+
+    if etag in [tag.strip() for tag in request.headers.get("if-none-match", "").split(",")]:
+        return Response(status_code=304, headers=headers)
+
+    try:
+        path = await get_blob_store().local_path(key)
+    except ValueError:
+        path = None
+    if not path:
+        raise HTTPException(status_code=404, detail="Not found")
+
+    return FileResponse(path, headers=headers)
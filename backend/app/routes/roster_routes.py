@@ -0,0 +1,159 @@
+from datetime import date, datetime, time
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel
+from sqlalchemy import func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from app.database import get_db, get_read_db
+from app.models.roster import Shift, RosterAssignment, DailyAttendanceStatus
+from app.models.user import User
+from app.routes.admin_routes import get_current_admin
+from app.services import jobs
+
+router = APIRouter(prefix="/admin", tags=["Admin"])
+
+class ShiftCreate(BaseModel):
+    name: str
+    start_time: time
+    end_time: time
+    grace_minutes: int = 10
+    weekdays: List[int] = [0, 1, 2, 3, 4]  # 0 = Monday
+
+class ShiftOut(BaseModel):
+    id: int
+    name: str
+    start_time: time
+    end_time: time
+    grace_minutes: int
+    weekdays: List[int]
+
+class RosterCreate(BaseModel):
+    user_id: int
+    shift_id: int
+    effective_from: date
+    effective_to: Optional[date] = None
+
+def _shift_out(shift: Shift) -> ShiftOut:
+    return ShiftOut(
+        id=shift.id,
+        name=shift.name,
+        start_time=shift.start_time,
+        end_time=shift.end_time,
+        grace_minutes=shift.grace_minutes,
+        weekdays=[day for day in range(7) if shift.weekdays & (1 << day)],
+    )
+
+# ---------- SHIFTS ----------
+@router.post("/shifts", response_model=ShiftOut)
+async def create_shift(
+    shift: ShiftCreate,
+    db: AsyncSession = Depends(get_db),
+    current_admin: User = Depends(get_current_admin)
+):
+    if not shift.weekdays or any(day not in range(7) for day in shift.weekdays):
+        raise HTTPException(status_code=400, detail="weekdays must be values 0 (Monday) to 6 (Sunday)")
+
+    new_shift = Shift(
+        organization_id=current_admin.organization_id,
+        name=shift.name,
+        start_time=shift.start_time,
+        end_time=shift.end_time,
+        grace_minutes=shift.grace_minutes,
+        weekdays=sum(1 << day for day in set(shift.weekdays)),
+    )
+    db.add(new_shift)
+    await db.commit()
+    print(f"✅ Shift '{shift.name}' created by {current_admin.email}")
+    return _shift_out(new_shift)
+
+@router.get("/shifts", response_model=List[ShiftOut])
+async def list_shifts(
+    db: AsyncSession = Depends(get_read_db),
+    current_admin: User = Depends(get_current_admin)
+):
+    result = await db.execute(
+        select(Shift).where(Shift.organization_id == current_admin.organization_id).order_by(Shift.id)
+    )
+    return [_shift_out(shift) for shift in result.scalars().all()]
+
+# ---------- ROSTER ----------
+@router.post("/roster")
+async def assign_roster(
+    assignment: RosterCreate,
+    db: AsyncSession = Depends(get_db),
+    current_admin: User = Depends(get_current_admin)
+):
+    org_id = current_admin.organization_id
+    user = await db.execute(select(User.id).where(User.id == assignment.user_id, User.organization_id == org_id))
+    shift = await db.execute(select(Shift.id).where(Shift.id == assignment.shift_id, Shift.organization_id == org_id))
+    if user.scalar_one_or_none() is None or shift.scalar_one_or_none() is None:
+        raise HTTPException(status_code=404, detail="User or shift not found")
+    if assignment.effective_to and assignment.effective_to < assignment.effective_from:
+        raise HTTPException(status_code=400, detail="effective_to is before effective_from")
+
+    new_assignment = RosterAssignment(organization_id=org_id, **assignment.model_dump())
+    db.add(new_assignment)
+    await db.flush()
+
+    # Today's results change immediately if the assignment covers today
+    today = datetime.utcnow().date()
+    if assignment.effective_from <= today and (assignment.effective_to is None or assignment.effective_to >= today):
+        jobs.enqueue(db, "absence.compute", {"day": today.isoformat(), "organization_id": org_id}, organization_id=org_id)
+    await db.commit()
+
+    print(f"✅ User {assignment.user_id} rostered on shift {assignment.shift_id} by {current_admin.email}")
+    return {"id": new_assignment.id, "message": "Roster assignment created"}
+
+# ---------- PRECOMPUTED ATTENDANCE REPORT ----------
+@router.get("/attendance-report")
+async def attendance_report(
+    day: Optional[date] = None,
+    status: Optional[str] = Query(default=None, pattern="^(present|late|absent|pending)$"),
+    db: AsyncSession = Depends(get_read_db),
+    current_admin: User = Depends(get_current_admin)
+):
+    """Absentees and late arrivals for a day, read from daily_attendance_status"""
+    day = day or datetime.utcnow().date()
+    org_id = current_admin.organization_id
+    filters = [DailyAttendanceStatus.organization_id == org_id, DailyAttendanceStatus.day == day]
+
+    counts = await db.execute(
+        select(DailyAttendanceStatus.status, func.count()).where(*filters).group_by(DailyAttendanceStatus.status)
+    )
+
+    query = (
+        select(
+            DailyAttendanceStatus.user_id,
+            User.name.label("user_name"),
+            User.email.label("user_email"),
+            DailyAttendanceStatus.shift_id,
+            DailyAttendanceStatus.status,
+            DailyAttendanceStatus.first_check_in,
+            DailyAttendanceStatus.minutes_late,
+            DailyAttendanceStatus.computed_at,
+        )
+        .join(User, User.id == DailyAttendanceStatus.user_id)
+        .where(*filters)
+        .order_by(DailyAttendanceStatus.status, User.name)
+    )
+    if status:
+        query = query.where(DailyAttendanceStatus.status == status)
+
+    rows = [row._asdict() for row in await db.execute(query)]
+    return ORJSONResponse({"day": day, "summary": dict(counts.all()), "items": rows})
+
+@router.post("/attendance-report/recompute", status_code=202)
+async def recompute_attendance_report(
+    day: date,
+    db: AsyncSession = Depends(get_db),
+    current_admin: User = Depends(get_current_admin)
+):
+    """Queue a recompute after roster changes for past days"""
+    jobs.enqueue(
+        db, "absence.compute", {"day": day.isoformat(), "organization_id": current_admin.organization_id},
+        organization_id=current_admin.organization_id,
+    )
+    await db.commit()
+    return {"message": f"Recompute for {day} queued"}
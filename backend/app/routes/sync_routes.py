@@ -0,0 +1,130 @@
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import ORJSONResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from app.database import get_db, get_read_db
+from app.models.attendance import Attendance
+from app.models.user import User
+from app.models.user_activity import UserActivity
+from app.routes.admin_routes import get_current_admin, _photo_url
+from app.services.sync import current_token, changed_since, deleted_since, sync_page
+from app.services.thumbnails import thumbnail_url
+from app.utils.auth import get_current_user
+
+# Delta sync: pass the token from the previous response as ?since= to get only
+# rows created/updated/deleted after it; omit it for a full snapshot.
+router = APIRouter(prefix="/sync", tags=["Sync"])
+
+# ---------- MY ATTENDANCE ----------
+@router.get("/attendance/me")
+async def sync_my_attendance(
+    since: Optional[int] = None,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    token = await current_token(db)
+    query = changed_since(
+        select(Attendance.id, Attendance.user_id, Attendance.timestamp, Attendance.battery_level, Attendance.location)
+        .where(Attendance.user_id == current_user.id),
+        Attendance,
+        since,
+    )
+    rows = [row._asdict() for row in await db.execute(query)]
+    deletes = await deleted_since(db, "attendance", since, current_user.organization_id, user_id=current_user.id)
+
+    print(f"[Sync] attendance/me for {current_user.email}: {len(rows)} changed, {len(deletes)} deleted since {since}")
+    return ORJSONResponse(sync_page(token, since, rows, deletes))
+
+# ---------- ALL ATTENDANCE (ADMIN) ----------
+@router.get("/attendance")
+async def sync_all_attendance(
+    since: Optional[int] = None,
+    db: AsyncSession = Depends(get_read_db),
+    current_user: User = Depends(get_current_user)
+):
+    if not current_user.is_admin:
+        raise HTTPException(status_code=403, detail="Only admin can access this")
+
+    token = await current_token(db)
+    query = changed_since(
+        select(
+            Attendance.id,
+            Attendance.timestamp,
+            Attendance.location,
+            Attendance.battery_level,
+            User.id.label("user_id"),
+            User.name.label("user_name"),
+            User.email.label("user_email"),
+        )
+        .join(User, Attendance.user_id == User.id)
+        .where(Attendance.organization_id == current_user.organization_id),
+        Attendance,
+        since,
+    )
+    rows = [row._asdict() for row in await db.execute(query)]
+    deletes = await deleted_since(db, "attendance", since, current_user.organization_id)
+
+    print(f"[Sync] attendance: {len(rows)} changed, {len(deletes)} deleted since {since}")
+    return ORJSONResponse(sync_page(token, since, rows, deletes))
+
+# ---------- STAFF (ADMIN) ----------
+@router.get("/staff")
+async def sync_staff(
+    since: Optional[int] = None,
+    db: AsyncSession = Depends(get_read_db),
+    current_admin: User = Depends(get_current_admin)
+):
+    token = await current_token(db)
+    query = changed_since(
+        select(User.id, User.name, User.email, User.role, User.photo_path, User.thumbnail_key)
+        .where(User.organization_id == current_admin.organization_id, User.is_admin == False),
+        User,
+        since,
+    )
+    rows = [
+        {
+            "id": row.id,
+            "name": row.name,
+            "email": row.email,
+            "role": row.role,
+            "photo_url": _photo_url(row.photo_path),
+            "thumbnail_url": thumbnail_url(row.thumbnail_key),
+        }
+        for row in await db.execute(query)
+    ]
+    deletes = await deleted_since(db, "users", since, current_admin.organization_id)
+
+    print(f"[Sync] staff: {len(rows)} changed, {len(deletes)} deleted since {since}")
+    return ORJSONResponse(sync_page(token, since, rows, deletes))
+
+# ---------- ACTIVITIES (ADMIN) ----------
+@router.get("/activities")
+async def sync_activities(
+    since: Optional[int] = None,
+    db: AsyncSession = Depends(get_read_db),
+    current_admin: User = Depends(get_current_admin)
+):
+    token = await current_token(db)
+    query = changed_since(
+        select(
+            UserActivity.id,
+            UserActivity.user_id,
+            User.name.label("username"),
+            User.email,
+            UserActivity.latitude,
+            UserActivity.longitude,
+            UserActivity.battery_level,
+            UserActivity.timestamp,
+            User.last_login,
+        )
+        .join(User, UserActivity.user_id == User.id)
+        .where(UserActivity.organization_id == current_admin.organization_id),
+        UserActivity,
+        since,
+    )
+    rows = [row._asdict() for row in await db.execute(query)]
+    deletes = await deleted_since(db, "user_activities", since, current_admin.organization_id)
+
+    print(f"[Sync] activities: {len(rows)} changed, {len(deletes)} deleted since {since}")
+    return ORJSONResponse(sync_page(token, since, rows, deletes))
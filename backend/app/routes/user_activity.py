@@ -1,10 +1,12 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Header
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from app.models.user_activity import UserActivity
 from app.database import get_db
 from app.utils.auth import get_current_user
-from typing import List
+from app.services.rate_limit import rate_limit
+from app.services import idempotency
+from typing import List, Optional
 from pydantic import BaseModel
 from datetime import datetime
 
@@ -26,14 +28,24 @@ class ActivityOut(BaseModel):
     class Config:
         from_attributes = True
 
-@router.post("/activity", response_model=ActivityOut)
+@router.post("/activity", response_model=ActivityOut, dependencies=[Depends(rate_limit("activity"))])
 async def create_activity(
     activity: ActivityCreate,
+    idempotency_key: Optional[str] = Header(None),
     db: AsyncSession = Depends(get_db),
     current_user = Depends(get_current_user)
 ):
+    return await idempotency.run(
+        current_user.id,
+        "activity",
+        idempotency_key,
+        lambda: _create_activity(activity, db, current_user),
+    )
+
+async def _create_activity(activity: ActivityCreate, db: AsyncSession, current_user) -> ActivityOut:
     new_activity = UserActivity(
         user_id=current_user.id,
+        organization_id=current_user.organization_id,
         latitude=activity.latitude,
         longitude=activity.longitude,
         battery_level=activity.battery_level
@@ -41,4 +53,4 @@ async def create_activity(
     db.add(new_activity)
     await db.commit()
     await db.refresh(new_activity)
-    return new_activity
\ No newline at end of file
+    return ActivityOut.model_validate(new_activity)
\ No newline at end of file
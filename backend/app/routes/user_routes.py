@@ -1,18 +1,24 @@
-from fastapi import APIRouter, HTTPException, Depends, UploadFile, File, Form
+from fastapi import APIRouter, BackgroundTasks, HTTPException, Depends, UploadFile, File, Form, Header
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from sqlalchemy import and_, func
-from app.database import get_db
+from app.database import get_db, get_read_db
 from app.models.user import User
 from app.models.attendance import Attendance
 from app.schemas.user import UserLogin, TokenResponse
 from app.services.face_recognition import verify_face
+from app.services.rate_limit import rate_limit, cv_slot
+from app.services import idempotency, jobs, audit_capture
+from app.services.attendance_calendar import calendar_summary, day_bounds, month_range
 from app.utils.auth import get_current_user
+from app.utils.conditional import watermark_etag, etag_matches, not_modified, with_etag
 from passlib.context import CryptContext
 from fastapi.security import OAuth2PasswordRequestForm
-from datetime import datetime
+from datetime import datetime, date
+from typing import Optional
 from jose import jwt
 from sqlalchemy.orm import joinedload
+from fastapi.responses import ORJSONResponse
 from app.models.user import User
 from app.models.attendance import Attendance
 import os
@@ -32,18 +38,38 @@ async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSessi
     if not db_user or not pwd_context.verify(form_data.password, db_user.password):
         raise HTTPException(status_code=401, detail="Invalid credentials")
 
-    token_data = {"sub": db_user.email}
+    token_data = {"sub": db_user.email, "org": db_user.organization_id}
     token = jwt.encode(token_data, SECRET_KEY, algorithm=ALGORITHM)
     return {"access_token": token, "token_type": "bearer"}
 
 # ---------- MARK ATTENDANCE via FACE ----------
-@router.post("/attendance/mark")
+@router.post("/attendance/mark", dependencies=[Depends(rate_limit("attendance_mark"))])
 async def mark_attendance(
+    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
     location: str = Form(...),
     battery_level: str = Form(...),
+    motion_frame: Optional[UploadFile] = File(None),
+    idempotency_key: Optional[str] = Header(None),
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
+):
+    # ✅ Retries with the same Idempotency-Key get the original response without re-verifying
+    return await idempotency.run(
+        current_user.id,
+        "attendance_mark",
+        idempotency_key,
+        lambda: _mark_attendance(file, location, battery_level, db, current_user, background_tasks, motion_frame),
+    )
+
+async def _mark_attendance(
+    file: UploadFile,
+    location: str,
+    battery_level: str,
+    db: AsyncSession,
+    current_user: User,
+    background_tasks: BackgroundTasks,
+    motion_frame: Optional[UploadFile] = None
 ):
     try:
         print(f"[Mark Attendance] User: {current_user.name} ({current_user.email})")
@@ -54,10 +80,16 @@ async def mark_attendance(
         # Read image data
         image_bytes = await file.read()
         print(f"[Mark Attendance] Image bytes read: {len(image_bytes)} bytes")
+        # Optional second frame taken a moment later, for the liveness motion check
+        second_frame = await motion_frame.read() if motion_frame is not None else None
 
         # ✅ Verify face
         print(f"[Mark Attendance] Starting face verification...")
-        is_verified = await verify_face(image_bytes, current_user.id, db)
+        match_details = {}
+        async with cv_slot():
+            is_verified = await verify_face(
+                image_bytes, current_user.id, db, details=match_details, second_frame=second_frame
+            )
         
         if not is_verified:
             print(f"[Mark Attendance] ❌ Face verification failed for {current_user.name}")
@@ -89,14 +121,34 @@ async def mark_attendance(
 
         new_attendance = Attendance(
             user_id=current_user.id,
+            organization_id=current_user.organization_id,
             location=location,
             battery_level=battery_float
         )
         db.add(new_attendance)
+        await db.flush()
+
+        # ✅ Everything beyond the attendance row itself happens in the background
+        jobs.enqueue(db, "attendance.marked", {
+            "attendance_id": new_attendance.id,
+            "user_id": current_user.id,
+            "location": location,
+            "battery_level": battery_float,
+            "day": today.isoformat(),
+        }, organization_id=current_user.organization_id)
         await db.commit()
-        await db.refresh(new_attendance)
 
         print(f"[Mark Attendance] ✅ Attendance saved successfully - ID: {new_attendance.id}")
+
+        # 📸 Keep the accepted face as evidence (queued after the response is sent)
+        if audit_capture.AUDIT_CAPTURE_ENABLED:
+            background_tasks.add_task(
+                audit_capture.submit,
+                new_attendance.id,
+                image_bytes,
+                match_details.get("face_box"),
+                new_attendance.timestamp or datetime.utcnow(),
+            )
         
         return {
             "message": "Attendance marked successfully", 
@@ -115,7 +167,7 @@ async def mark_attendance(
         raise HTTPException(status_code=500, detail="Internal server error during attendance marking")
 
 # ---------- DEBUG ENDPOINT (Remove in production) ----------
-@router.post("/attendance/debug-face")
+@router.post("/attendance/debug-face", dependencies=[Depends(rate_limit("debug_face"))])
 async def debug_face_verification(
     file: UploadFile = File(...),
     db: AsyncSession = Depends(get_db),
@@ -126,7 +178,9 @@ async def debug_face_verification(
         image_bytes = await file.read()
         print(f"[Debug] Testing face verification for {current_user.name}")
         
-        is_verified = await verify_face(image_bytes, current_user.id, db)
+        match_details = {}
+        async with cv_slot():
+            is_verified = await verify_face(image_bytes, current_user.id, db, details=match_details)
         
         return {
             "user_id": current_user.id,
@@ -135,8 +189,12 @@ async def debug_face_verification(
             "photo_path": current_user.photo_path,
             "face_verified": is_verified,
             "image_size_bytes": len(image_bytes),
+            "distance": match_details.get("distance"),
+            "liveness": match_details.get("liveness"),
             "message": f"Face verification {'✅ PASSED' if is_verified else '❌ FAILED'}"
         }
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"[Debug] Error: {e}")
         import traceback
@@ -150,40 +208,96 @@ async def debug_face_verification(
 # ---------- VIEW MY ATTENDANCE ----------
 @router.get("/attendance/me")
 async def view_my_attendance(
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    if_none_match: Optional[str] = Header(None),
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
+    # count/max(id) move on inserts and deletes; change_seq is restamped on every update.
+    # sum, not max: stamps are xids, and a lower xid can commit after a higher one
+    etag = await watermark_etag(
+        db,
+        select(func.count(Attendance.id), func.max(Attendance.id), func.sum(Attendance.change_seq))
+        .where(Attendance.user_id == current_user.id),
+        salt=f"me:{current_user.id}:{start}:{end}",
+    )
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+
     result = await db.execute(
-        select(Attendance).where(Attendance.user_id == current_user.id).order_by(Attendance.timestamp.desc())
+        select(
+            Attendance.id,
+            Attendance.user_id,
+            Attendance.timestamp,
+            Attendance.battery_level,
+            Attendance.location,
+        )
+        .where(Attendance.user_id == current_user.id, *day_bounds(start, end))
+        .order_by(Attendance.timestamp.desc())
     )
-    return result.scalars().all()
+    return with_etag(ORJSONResponse([row._asdict() for row in result]), etag)
+
+# ---------- MY ATTENDANCE CALENDAR ----------
+@router.get("/attendance/me/calendar")
+async def my_attendance_calendar(
+    month: Optional[str] = None,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Month view: present days, first check-in per day and streaks (month=YYYY-MM or start/end)"""
+    if start is None or end is None:
+        try:
+            start, end = month_range(month or datetime.utcnow().strftime("%Y-%m"))
+        except ValueError:
+            raise HTTPException(status_code=400, detail="month must be YYYY-MM")
+    if end < start or (end - start).days > 366:
+        raise HTTPException(status_code=400, detail="Invalid date range (max 366 days)")
+
+    summary = await calendar_summary(db, current_user.id, start, end)
+    print(f"[Calendar] {current_user.email}: {summary['present_days']} present days {start}..{end}")
+    return ORJSONResponse(summary)
 
 # ---------- ADMIN: VIEW ALL ATTENDANCE ----------
 @router.get("/attendance/all")
 async def get_all_attendance(
-    db: AsyncSession = Depends(get_db),
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
     if not current_user.is_admin:
         raise HTTPException(status_code=403, detail="Only admin can access this")
 
+    # Users are part of the body too (name/email), so include their watermark;
+    # sum(change_seq) catches updates (renames, edited rows) that count/max(id) don't
+    org_id = current_user.organization_id
+    etag = await watermark_etag(
+        db,
+        select(func.count(Attendance.id), func.max(Attendance.id), func.sum(Attendance.change_seq))
+        .where(Attendance.organization_id == org_id),
+        select(func.count(User.id), func.max(User.id), func.sum(User.change_seq)).where(User.organization_id == org_id),
+        salt=f"all:{org_id}",
+    )
+    if etag_matches(if_none_match, etag):
+        print("✅ Attendance list unchanged (304)")
+        return not_modified(etag)
+
     result = await db.execute(
-        select(Attendance, User)
+        select(
+            Attendance.id,
+            Attendance.timestamp,
+            Attendance.location,
+            Attendance.battery_level,
+            User.id.label("user_id"),
+            User.name.label("user_name"),
+            User.email.label("user_email"),
+        )
         .join(User, Attendance.user_id == User.id)
+        .where(Attendance.organization_id == org_id)
         .order_by(Attendance.timestamp.desc())
     )
     
-    attendance_with_user = result.all()
-    
-    return [
-        {
-            "id": attendance.id,
-            "timestamp": attendance.timestamp,
-            "location": attendance.location,
-            "battery_level": attendance.battery_level,
-            "user_id": user.id,
-            "user_name": user.name,
-            "user_email": user.email,
-        }
-        for attendance, user in attendance_with_user
-    ]
\ No newline at end of file
+    # Returning a Response skips FastAPI's jsonable_encoder pass over every row
+    return with_etag(ORJSONResponse([row._asdict() for row in result]), etag)
\ No newline at end of file
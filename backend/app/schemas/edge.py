@@ -0,0 +1,14 @@
+from typing import List, Optional
+from datetime import datetime
+from pydantic import BaseModel
+
+class EdgeCheckInIn(BaseModel):
+    ref: str
+    user_id: int
+    timestamp: datetime
+    location: Optional[str] = None
+    battery_level: Optional[float] = None
+
+class EdgeCheckInBatch(BaseModel):
+    site: str
+    checkins: List[EdgeCheckInIn]
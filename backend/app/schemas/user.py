@@ -1,3 +1,4 @@
+from typing import List, Optional
 from pydantic import BaseModel, EmailStr
 
 class UserLogin(BaseModel):
@@ -15,3 +16,15 @@ class UserBase(BaseModel):
 
     class Config:
         orm_mode = True
+
+class StaffOut(BaseModel):
+    id: int
+    name: Optional[str] = None
+    email: str
+    role: Optional[str] = None
+    photo_url: Optional[str] = None
+    thumbnail_url: Optional[str] = None
+
+class StaffPage(BaseModel):
+    items: List[StaffOut]
+    next_cursor: Optional[int] = None
@@ -0,0 +1,49 @@
+import asyncio
+import sys
+import os
+from sqlalchemy.future import select
+
+# Add parent directory to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+
+from app.database import SessionLocal
+from app.models.user import User
+from app.services.storage import get_blob_store, is_blob_key
+from app.services.thumbnails import generate_thumbnails, generate_thumbnails_from_bytes
+
+async def backfill_thumbnails(force: bool = False):
+    async with SessionLocal() as db:
+        try:
+            query = select(User).where(User.photo_path.isnot(None))
+            if not force:
+                query = query.where(User.thumbnail_key.is_(None))
+            result = await db.execute(query)
+            users = result.scalars().all()
+
+            print(f"Backfilling thumbnails for {len(users)} users")
+
+            done = 0
+            failed = 0
+            for user in users:
+                if is_blob_key(user.photo_path):
+                    image_bytes = await get_blob_store().get(user.photo_path)
+                    key = await asyncio.to_thread(generate_thumbnails_from_bytes, image_bytes)
+                else:
+                    key = await asyncio.to_thread(generate_thumbnails, user.photo_path)
+                if key is None:
+                    failed += 1
+                    print(f"Skipped {user.email}: could not process {user.photo_path}")
+                    continue
+                user.thumbnail_key = key
+                done += 1
+
+            await db.commit()
+            print(f"Thumbnails backfilled: {done}, failed: {failed}")
+
+        except Exception as e:
+            print(f"Error backfilling thumbnails: {e}")
+            await db.rollback()
+
+if __name__ == "__main__":
+    asyncio.run(backfill_thumbnails(force="--force" in sys.argv))
@@ -0,0 +1,70 @@
+import argparse
+import sys
+import os
+import time
+
+# Add parent directory to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+import cv2
+import numpy as np
+
+from app.config import LIVENESS_BUDGET_MS
+from app.services.face_recognition import check_liveness, detect_faces
+
+def synthetic_frame(seed):
+    """640x480 camera-like frame with a textured 200x200 'face' region"""
+    rng = np.random.default_rng(seed)
+    img = rng.integers(60, 200, (480, 640, 3), dtype=np.uint8)
+    img = cv2.GaussianBlur(img, (5, 5), 0)
+    return img, (220, 140, 200, 200)
+
+def load_frame(path):
+    img = cv2.imread(path)
+    if img is None:
+        raise SystemExit(f"Could not read {path}")
+    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+    faces = detect_faces(gray)
+    if len(faces) == 0:
+        raise SystemExit(f"No face detected in {path}")
+    x, y, w, h = max(faces, key=lambda f: f[2] * f[3])
+    return img, (int(x), int(y), int(w), int(h))
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure per-frame cost of the passive liveness stage")
+    parser.add_argument("images", nargs="*", help="Face photos to use (default: synthetic frames)")
+    parser.add_argument("--iterations", type=int, default=500)
+    parser.add_argument("--motion", action="store_true", help="Include the two-frame motion check")
+    parser.add_argument("--budget-ms", type=float, default=LIVENESS_BUDGET_MS)
+    args = parser.parse_args()
+
+    frames = [load_frame(path) for path in args.images] or [synthetic_frame(seed) for seed in range(4)]
+    prepared = []
+    for img, box in frames:
+        gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+        # A slightly shifted copy stands in for the second frame
+        second = np.roll(gray, 2, axis=1) if args.motion else None
+        prepared.append((img, gray, box, second))
+
+    for img, gray, box, second in prepared:  # warm up
+        check_liveness(img, gray, box, second)
+
+    timings = []
+    for i in range(args.iterations):
+        img, gray, box, second = prepared[i % len(prepared)]
+        started = time.perf_counter()
+        check_liveness(img, gray, box, second)
+        timings.append((time.perf_counter() - started) * 1000)
+
+    p50, p95, worst = percentile(timings, 50), percentile(timings, 95), max(timings)
+    print(f"Liveness over {args.iterations} frames{' (with motion)' if args.motion else ''}")
+    print(f"  p50 {p50:.2f} ms   p95 {p95:.2f} ms   max {worst:.2f} ms   budget {args.budget_ms:.1f} ms")
+
+    if p95 > args.budget_ms:
+        print("❌ p95 exceeds the liveness budget")
+        sys.exit(1)
+    print("✅ Within budget")
@@ -0,0 +1,80 @@
+import argparse
+import json
+import sys
+import os
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+# Add parent directory to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+import orjson
+from fastapi.encoders import jsonable_encoder
+
+from app.routes.admin_routes import ActivityOut
+
+def make_rows(count):
+    """Rows shaped like the /admin/activities projection"""
+    start = datetime(2026, 1, 1, 9, 0, 0)
+    return [
+        {
+            "id": i,
+            "user_id": i % 250,
+            "username": f"Staff {i % 250}",
+            "email": f"staff{i % 250}@example.com",
+            "latitude": 22.5726 + i * 1e-6,
+            "longitude": 88.3639 - i * 1e-6,
+            "battery_level": float(i % 100),
+            "timestamp": start + timedelta(minutes=i),
+            "last_login": start if i % 3 else None,
+        }
+        for i in range(count)
+    ]
+
+def before(rows):
+    # Previous path: a Pydantic model per row, then jsonable_encoder + stdlib json
+    items = [
+        ActivityOut(
+            **{
+                **row,
+                "timestamp": row["timestamp"].isoformat(),
+                "last_login": row["last_login"].isoformat() if row["last_login"] else None,
+            }
+        )
+        for row in rows
+    ]
+    return json.dumps(jsonable_encoder(items)).encode()
+
+def after(rows):
+    # Current path: plain dict rows straight into orjson
+    return orjson.dumps(rows)
+
+def measure(fn, rows, repeat):
+    fn(rows)  # warm up
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        body = fn(rows)
+        timings.append(time.perf_counter() - started)
+
+    tracemalloc.start()
+    fn(rows)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return min(timings), peak, len(body)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare list-endpoint serialization paths")
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    rows = make_rows(args.rows)
+    results = {name: measure(fn, rows, args.repeat) for name, fn in (("before", before), ("after", after))}
+
+    print(f"Serializing {args.rows} rows (best of {args.repeat})")
+    for name, (seconds, peak, size) in results.items():
+        print(f"  {name:<7} {seconds * 1000:8.1f} ms   peak {peak / 1024:9.0f} KiB   body {size / 1024:7.0f} KiB")
+    speedup = results["before"][0] / results["after"][0] if results["after"][0] else float("inf")
+    print(f"  speedup {speedup:.1f}x")
@@ -1,3 +1,4 @@
+import argparse
 import asyncio
 import sys
 import os
@@ -10,17 +11,27 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
 
 from app.database import SessionLocal
 from app.models.user import User
+from app.models.organization import Organization
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
-async def create_single_admin():
+async def create_single_admin(args):
     async with SessionLocal() as db:
         try:
+            # Find or create the site this admin manages
+            result = await db.execute(select(Organization).where(Organization.slug == args.org))
+            organization = result.scalar_one_or_none()
+            if organization is None:
+                organization = Organization(slug=args.org, name=args.org_name or args.org.title())
+                db.add(organization)
+                await db.flush()
+                print(f"Organization '{args.org}' created")
+
             # Check if admin exists
             result = await db.execute(
-                select(User).where(User.is_admin == True)
+                select(User).where(User.is_admin == True, User.organization_id == organization.id)
             )
-            existing_admin = result.scalar_one_or_none()
+            existing_admin = result.scalars().first()
             
             if existing_admin:
                 print("Admin already exists")
@@ -28,11 +39,12 @@ async def create_single_admin():
 
             # Create admin user
             admin = User(
-                email="admin@example.com",
-                password=pwd_context.hash("admin123"),
+                email=args.email,
+                password=pwd_context.hash(args.password),
                 name="Admin",
                 is_admin=True,
-                role="admin"
+                role="admin",
+                organization_id=organization.id
             )
             
             db.add(admin)
@@ -44,4 +56,9 @@ async def create_single_admin():
             await db.rollback()
 
 if __name__ == "__main__":
-    asyncio.run(create_single_admin())
+    parser = argparse.ArgumentParser(description="Create the admin account for an organization")
+    parser.add_argument("--org", default="default", help="Organization slug (created if missing)")
+    parser.add_argument("--org-name", help="Display name for a new organization")
+    parser.add_argument("--email", default="admin@example.com")
+    parser.add_argument("--password", default="admin123")
+    asyncio.run(create_single_admin(parser.parse_args()))
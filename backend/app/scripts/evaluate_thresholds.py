@@ -0,0 +1,222 @@
+import argparse
+import json
+import sys
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from statistics import NormalDist
+
+# Add parent directory to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+import numpy as np
+
+from app.services.face_recognition import (
+    BASE_MATCH_THRESHOLD,
+    FACE_COUNT_MULTIPLIERS,
+    CROWD_MULTIPLIER,
+    detect_faces,
+    encode_face,
+    match_threshold,
+)
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".webp", ".bmp")
+
+# Corpus layout: <root>/<person>/<images>. The enrollment photo is the file
+# whose name starts with "enroll" (else the first file by name); every other
+# image is a check-in probe for that person.
+
+def load_corpus(root):
+    people = {}
+    for person in sorted(os.listdir(root)):
+        folder = os.path.join(root, person)
+        if not os.path.isdir(folder):
+            continue
+        images = sorted(f for f in os.listdir(folder) if f.lower().endswith(IMAGE_EXTENSIONS))
+        if len(images) < 2:
+            continue
+        enroll = next((f for f in images if f.lower().startswith("enroll")), images[0])
+        people[person] = {
+            "enroll": os.path.join(folder, enroll),
+            "probes": [os.path.join(folder, f) for f in images if f != enroll],
+        }
+    return people
+
+def process_image(path):
+    """Production pipeline for one image: decode, grayscale, detect, encode every face"""
+    import cv2
+
+    timings = {}
+    started = time.perf_counter()
+    img = cv2.imread(path)
+    timings["decode_ms"] = (time.perf_counter() - started) * 1000
+    if img is None:
+        return path, None, [], timings
+
+    started = time.perf_counter()
+    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+    faces = detect_faces(gray)
+    timings["detect_ms"] = (time.perf_counter() - started) * 1000
+
+    started = time.perf_counter()
+    encodings = [encode_face(gray, box) for box in faces]
+    timings["encode_ms"] = (time.perf_counter() - started) * 1000
+
+    largest = None
+    if len(faces):
+        largest = int(max(range(len(faces)), key=lambda i: faces[i][2] * faces[i][3]))
+    return path, largest, encodings, timings
+
+def min_distances(templates, probe_faces, probe_offsets, face_chunk=128, template_chunk=16):
+    """[probe, template] matrix of best-face distances, as verify_face computes them.
+
+    Uses the same wrapping uint8 subtraction as production (template_distance),
+    so the numbers match what the thresholds are compared to.
+    Blocks keep the intermediate difference tensor around 80 MB.
+    """
+    face_dist = np.empty((len(probe_faces), len(templates)), dtype=np.float32)
+    for f in range(0, len(probe_faces), face_chunk):
+        faces = probe_faces[f:f + face_chunk]
+        for t in range(0, len(templates), template_chunk):
+            block = templates[t:t + template_chunk]
+            # uint8 difference (wraps exactly like production), then float norm
+            diffs = (block[None, :, :] - faces[:, None, :]).astype(np.float32)
+            face_dist[f:f + face_chunk, t:t + template_chunk] = np.sqrt(np.einsum("ftd,ftd->ft", diffs, diffs))
+    # Best face per probe image
+    return np.minimum.reduceat(face_dist, probe_offsets[:-1], axis=0)
+
+def curves(genuine, impostor, points=200):
+    """FAR/FRR over normalized base thresholds; DET coordinates are probit-scaled"""
+    normal = NormalDist()
+    clip = lambda p: min(max(p, 1e-6), 1 - 1e-6)
+    high = max(genuine.max(initial=0), impostor.max(initial=0)) * 1.05 or 1.0
+    roc = []
+    for threshold in np.linspace(0, high, points):
+        far = float(np.mean(impostor < threshold)) if impostor.size else 0.0
+        frr = float(np.mean(genuine >= threshold)) if genuine.size else 0.0
+        roc.append({
+            "threshold": round(float(threshold), 1),
+            "far": far,
+            "frr": frr,
+            "tar": 1 - frr,
+            "det_far_probit": round(normal.inv_cdf(clip(far)), 4),
+            "det_frr_probit": round(normal.inv_cdf(clip(frr)), 4),
+        })
+    return roc
+
+def recommend(roc, targets=(0.01, 0.001)):
+    eer = min(roc, key=lambda p: abs(p["far"] - p["frr"]))
+    recommended = {"eer": {"threshold": eer["threshold"], "rate": round((eer["far"] + eer["frr"]) / 2, 4)}}
+    for target in targets:
+        # Highest threshold (fewest false rejects) that keeps FAR under the target
+        allowed = [p for p in roc if p["far"] <= target]
+        if allowed:
+            best = max(allowed, key=lambda p: p["threshold"])
+            recommended[f"far_{target}"] = {"threshold": best["threshold"], "far": best["far"], "frr": best["frr"]}
+    return recommended
+
+def summarize(values):
+    values = np.asarray(values)
+    if not values.size:
+        return None
+    return {
+        "mean": round(float(values.mean()), 2),
+        "p50": round(float(np.percentile(values, 50)), 2),
+        "p95": round(float(np.percentile(values, 95)), 2),
+        "max": round(float(values.max()), 2),
+    }
+
+def evaluate(args):
+    people = load_corpus(args.corpus)
+    if len(people) < 2:
+        raise SystemExit("Need at least two people with an enrollment photo and a probe each")
+
+    paths = [p["enroll"] for p in people.values()] + [probe for p in people.values() for probe in p["probes"]]
+    print(f"Processing {len(paths)} images for {len(people)} people with {args.workers} workers...")
+
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+        processed = {path: (largest, encodings, timings) for path, largest, encodings, timings
+                     in executor.map(process_image, paths, chunksize=8)}
+    pipeline_seconds = time.perf_counter() - started
+
+    # Enrollment templates (largest face), skipping people whose photo has no face
+    names, templates = [], []
+    for name, person in people.items():
+        largest, encodings, _ = processed[person["enroll"]]
+        if largest is not None:
+            names.append(name)
+            templates.append(encodings[largest])
+    templates = np.stack(templates)
+    index = {name: i for i, name in enumerate(names)}
+
+    probe_owner, probe_faces, offsets, multipliers, no_face = [], [], [0], [], 0
+    for name, person in people.items():
+        if name not in index:
+            continue
+        for probe in person["probes"]:
+            _, encodings, _ = processed[probe]
+            if not encodings:
+                no_face += 1  # rejected before any comparison (a false reject for genuine users)
+                continue
+            probe_owner.append(index[name])
+            probe_faces.extend(encodings)
+            offsets.append(len(probe_faces))
+            multipliers.append(match_threshold(len(encodings), 1.0))
+
+    started = time.perf_counter()
+    distances = min_distances(templates, np.stack(probe_faces), np.asarray(offsets))
+    # Normalize by the face-count multiplier so one base threshold sweep covers all cases
+    scores = distances / np.asarray(multipliers)[:, None]
+    genuine_mask = np.zeros_like(scores, dtype=bool)
+    genuine_mask[np.arange(len(probe_owner)), probe_owner] = True
+    genuine, impostor = scores[genuine_mask], scores[~genuine_mask]
+    compare_seconds = time.perf_counter() - started
+
+    roc = curves(genuine, impostor, args.points)
+    current_far = float(np.mean(impostor < BASE_MATCH_THRESHOLD))
+    current_frr = float(np.mean(genuine >= BASE_MATCH_THRESHOLD))
+
+    timings = [processed[path][2] for path in paths]
+    report = {
+        "corpus": {
+            "people": len(people),
+            "enrolled": len(names),
+            "probes": len(probe_owner),
+            "probes_without_face": no_face,
+            "genuine_pairs": int(genuine.size),
+            "impostor_pairs": int(impostor.size),
+        },
+        "current": {
+            "base_threshold": BASE_MATCH_THRESHOLD,
+            "multipliers": {**{str(k): v for k, v in FACE_COUNT_MULTIPLIERS.items()}, "3+": CROWD_MULTIPLIER},
+            "far": current_far,
+            "frr": current_frr,
+        },
+        "recommended": recommend(roc),
+        "roc": roc,
+        "timings": {
+            "per_image_ms": {stage: summarize([t[stage] for t in timings if stage in t])
+                             for stage in ("decode_ms", "detect_ms", "encode_ms")},
+            "pipeline_seconds": round(pipeline_seconds, 2),
+            "images_per_second": round(len(paths) / pipeline_seconds, 1) if pipeline_seconds else None,
+            "compare_seconds": round(compare_seconds, 3),
+        },
+    }
+
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+
+    print(f"Genuine {genuine.size} / impostor {impostor.size} comparisons in {compare_seconds:.2f}s")
+    print(f"Current threshold {BASE_MATCH_THRESHOLD}: FAR {current_far:.4f}, FRR {current_frr:.4f}")
+    for name, point in report["recommended"].items():
+        print(f"Recommended ({name}): {point}")
+    print(f"Report written to {args.output}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure FAR/FRR of the face-matching thresholds on a labelled corpus")
+    parser.add_argument("corpus", help="Directory with one sub-directory of images per person")
+    parser.add_argument("--output", default="threshold_report.json")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--points", type=int, default=200, help="Threshold steps in the ROC/DET sweep")
+    evaluate(parser.parse_args())
@@ -0,0 +1,37 @@
+import argparse
+import asyncio
+import sys
+import os
+from datetime import date
+
+# Add parent directory to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+
+from app.database import pick_read_sessionmaker
+from app.services.exports import write_export, EXPORT_FORMATS
+from app.models.organization import DEFAULT_ORGANIZATION_ID
+
+async def export_attendance(args):
+    session_factory = await pick_read_sessionmaker()
+    async with session_factory() as db:
+        path = await write_export(
+            db,
+            args.organization_id,
+            args.format,
+            args.output,
+            start=date.fromisoformat(args.start) if args.start else None,
+            end=date.fromisoformat(args.end) if args.end else None,
+            user_id=args.user_id,
+        )
+    print(f"Export written to {path}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export attendance without loading the table into memory")
+    parser.add_argument("--format", choices=sorted(EXPORT_FORMATS), default="csv")
+    parser.add_argument("--start", help="YYYY-MM-DD (inclusive)")
+    parser.add_argument("--end", help="YYYY-MM-DD (inclusive)")
+    parser.add_argument("--user-id", type=int)
+    parser.add_argument("--organization-id", type=int, default=DEFAULT_ORGANIZATION_ID)
+    parser.add_argument("--output", required=True)
+    asyncio.run(export_attendance(parser.parse_args()))
@@ -0,0 +1,14 @@
+import asyncio
+import sys
+import os
+
+# Add parent directory to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+
+from app.config import AUDIT_RETENTION_DAYS
+from app.services.audit_capture import purge_expired
+
+if __name__ == "__main__":
+    days = int(sys.argv[1]) if len(sys.argv) > 1 else AUDIT_RETENTION_DAYS
+    asyncio.run(purge_expired(days))
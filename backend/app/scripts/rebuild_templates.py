@@ -0,0 +1,281 @@
+import argparse
+import asyncio
+import json
+import sys
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+# Add parent directory to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from sqlalchemy.future import select
+
+from app.config import TEMPLATE_STORE_DTYPE
+from app.database import SessionLocal
+from app.models.user import User
+from app.services import template_store
+from app.services.face_recognition import (
+    TEMPLATE_PIPELINE_VERSION,
+    _encode_largest_face,
+    _find_stored_photo,
+    template_version_for,
+)
+
+# Re-extracts every enrolled photo into the template store of the pipeline
+# version this code produces (TEMPLATE_PIPELINE_VERSION), e.g. after changing
+# detect_faces/encode_face and bumping it. There is no way to target another
+# version: the encodings would come from this code under that version's label.
+#
+# Progress is checkpointed under <store file>.rebuild/ after every batch:
+#   staging.bin     encoded rows appended in order (fixed size, so row N is at N * row_bytes)
+#   progress.jsonl  one line per photo: user_id, status, row or error, ms
+# An interrupted run picks up where it stopped; the live store file for that
+# version is only replaced at the end, so old and new templates coexist until then.
+
+ROW_BYTES = {"uint8": template_store.TEMPLATE_DIM, "float32": template_store.TEMPLATE_DIM * 4}
+
+
+def encode_photo(user_id, path):
+    """Runs in a pool worker: decode + detect + encode one enrolled photo"""
+    import cv2
+
+    started = time.perf_counter()
+    encoding, error = None, None
+    try:
+        img = cv2.imread(path)
+        if img is None:
+            error = "unreadable image"
+        else:
+            encoding = _encode_largest_face(img, path)
+            if encoding is None:
+                error = "no face detected"
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+    return user_id, encoding, error, (time.perf_counter() - started) * 1000
+
+
+class Checkpoint:
+    """Append-only staging rows + progress log; both fsynced once per batch"""
+
+    def __init__(self, work_dir, dtype):
+        self.work_dir = work_dir
+        self.dtype = dtype
+        self.row_bytes = ROW_BYTES[dtype]
+        self.staging_path = os.path.join(work_dir, "staging.bin")
+        self.progress_path = os.path.join(work_dir, "progress.jsonl")
+        self.entries = {}  # user_id -> latest progress record
+
+        os.makedirs(work_dir, exist_ok=True)
+        meta_path = os.path.join(work_dir, "meta.json")
+        if os.path.exists(meta_path):
+            with open(meta_path) as f:
+                staged_dtype = json.load(f)["dtype"]
+            if staged_dtype != dtype:
+                raise SystemExit(f"{work_dir} holds {staged_dtype} rows; resume with --dtype {staged_dtype}")
+        else:
+            with open(meta_path, "w") as f:
+                json.dump({"dtype": dtype}, f)
+        self._load()
+        self._staging = open(self.staging_path, "ab")
+        self._progress = open(self.progress_path, "a")
+
+    def _load(self):
+        if os.path.exists(self.progress_path):
+            with open(self.progress_path) as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        break  # torn last line from a crash mid-write
+                    self.entries[record["user_id"]] = record
+
+        # Rows written without a progress line (crash between the two fsyncs)
+        # are simply never referenced; only a torn partial row is cut off
+        size = os.path.getsize(self.staging_path) if os.path.exists(self.staging_path) else 0
+        if size % self.row_bytes:
+            with open(self.staging_path, "r+b") as f:
+                f.truncate(size - size % self.row_bytes)
+        self.next_row = size // self.row_bytes
+
+    def pending(self, user_ids, retry_failed):
+        return [
+            uid for uid in user_ids
+            if uid not in self.entries or (retry_failed and self.entries[uid]["status"] == "failed")
+        ]
+
+    def commit(self, results):
+        """results: [(record, encoding or None)]"""
+        import numpy as np
+
+        for record, encoding in results:
+            if encoding is not None:
+                self._staging.write(np.ascontiguousarray(encoding, dtype=self.dtype).tobytes())
+                record["row"] = self.next_row
+                self.next_row += 1
+        self._staging.flush()
+        os.fsync(self._staging.fileno())
+
+        for record, _ in results:
+            self._progress.write(json.dumps(record) + "\n")
+            self.entries[record["user_id"]] = record
+        self._progress.flush()
+        os.fsync(self._progress.fileno())
+
+    def rows(self):
+        import numpy as np
+
+        self._staging.flush()
+        if not self.next_row:
+            return None
+        return np.memmap(self.staging_path, dtype=self.dtype, mode="r",
+                         shape=(self.next_row, template_store.TEMPLATE_DIM))
+
+    def clear(self):
+        self._staging.close()
+        self._progress.close()
+        for path in (self.staging_path, self.progress_path, os.path.join(self.work_dir, "meta.json")):
+            if os.path.exists(path):
+                os.remove(path)
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    return round(sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))], 2)
+
+
+async def rebuild_templates(args):
+    version = TEMPLATE_PIPELINE_VERSION
+    path = template_store.store_path(version)
+    work_dir = f"{path}.rebuild"
+    checkpoint = Checkpoint(work_dir, args.dtype)
+
+    async with SessionLocal() as db:
+        result = await db.execute(select(User).where(User.photo_path.isnot(None)).order_by(User.id))
+        users = {user.id: user for user in result.scalars().all()}
+
+    todo = checkpoint.pending(list(users), args.retry_failed)
+    print(f"Pipeline {version}: {len(users)} enrolled users, "
+          f"{len(users) - len(todo)} already checkpointed, {len(todo)} to process with {args.workers} workers")
+
+    loop = asyncio.get_running_loop()
+    processed = 0
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        for offset in range(0, len(todo), args.batch_size):
+            batch = [users[uid] for uid in todo[offset:offset + args.batch_size]]
+
+            # Photo lookup (possibly an S3 fetch into the local cache) stays in this process
+            futures, results = [], []
+            for user in batch:
+                stored_path = await _find_stored_photo(user)
+                record = {"user_id": user.id, "photo_path": user.photo_path}
+                if stored_path is None:
+                    results.append(({**record, "status": "failed", "error": "photo not found", "ms": 0}, None))
+                    continue
+                record["template_version"] = template_version_for(user.photo_path, stored_path)
+                futures.append((record, loop.run_in_executor(pool, encode_photo, user.id, str(stored_path))))
+
+            for record, future in futures:
+                _, encoding, error, ms = await future
+                record.update(status="ok" if encoding is not None else "failed", ms=round(ms, 2))
+                if error:
+                    record["error"] = error
+                results.append((record, encoding))
+
+            checkpoint.commit(results)
+            processed += len(results)
+            elapsed = time.perf_counter() - started
+            print(f"  {offset + len(batch)}/{len(todo)} photos ({processed / elapsed:.1f}/s)")
+
+    elapsed = time.perf_counter() - started
+    report = build_report(checkpoint, processed, elapsed, version)
+
+    if not args.no_finalize:
+        await finalize(checkpoint, path, args.dtype, report)
+
+    report_path = args.report or os.path.join(work_dir, "report.json")
+    with open(report_path, "w") as f:
+        json.dump(report, f, indent=2)
+    print_report(report)
+    print(f"Report written to {report_path}")
+
+
+def build_report(checkpoint, processed, elapsed, version):
+    records = list(checkpoint.entries.values())
+    timings = sorted(r["ms"] for r in records if r.get("ms"))
+    failures = [r for r in records if r["status"] == "failed"]
+    by_error = {}
+    for r in failures:
+        by_error[r["error"]] = by_error.get(r["error"], 0) + 1
+    return {
+        "pipeline_version": version,
+        "photos": len(records),
+        "succeeded": len(records) - len(failures),
+        "failed": len(failures),
+        "this_run": {
+            "processed": processed,
+            "seconds": round(elapsed, 2),
+            "photos_per_second": round(processed / elapsed, 2) if elapsed > 0 else None,
+        },
+        "encode_ms": {
+            "p50": percentile(timings, 0.50),
+            "p95": percentile(timings, 0.95),
+            "max": timings[-1] if timings else None,
+        },
+        "failures_by_error": by_error,
+        "failures": [{"user_id": r["user_id"], "photo_path": r["photo_path"], "error": r["error"]} for r in failures],
+    }
+
+
+async def finalize(checkpoint, path, dtype, report):
+    """Swap the rebuilt rows into the store, skipping photos replaced or users deleted meanwhile"""
+    async with SessionLocal() as db:
+        result = await db.execute(select(User.id, User.photo_path))
+        current = dict(result.all())
+
+    rows = checkpoint.rows()
+    templates, stale = {}, 0
+    for record in checkpoint.entries.values():
+        if record["status"] != "ok":
+            continue
+        if current.get(record["user_id"]) != record["photo_path"]:
+            # The enrollment job for the new photo (or the removal) owns this user now
+            stale += 1
+            continue
+        templates[record["user_id"]] = (record["template_version"], rows[record["row"]])
+
+    generation = await asyncio.to_thread(template_store.rebuild, templates, path, dtype)
+    report["finalized"] = {"path": path, "generation": generation, "templates": len(templates), "stale_skipped": stale}
+    checkpoint.clear()
+
+
+def print_report(report):
+    run = report["this_run"]
+    timings = report["encode_ms"]
+    print(f"\nTemplates {report['pipeline_version']}: {report['succeeded']} ok, {report['failed']} failed "
+          f"of {report['photos']} photos")
+    print(f"This run: {run['processed']} photos in {run['seconds']}s ({run['photos_per_second']}/s), "
+          f"encode p50 {timings['p50']} ms, p95 {timings['p95']} ms")
+    for error, count in sorted(report["failures_by_error"].items(), key=lambda item: -item[1]):
+        print(f"  {count:6d}  {error}")
+    for failure in report["failures"][:20]:
+        print(f"  ❌ user {failure['user_id']}: {failure['photo_path']} ({failure['error']})")
+    if len(report["failures"]) > 20:
+        print(f"  ... {len(report['failures']) - 20} more in the report file")
+    if "finalized" in report:
+        done = report["finalized"]
+        print(f"✅ {done['path']} generation {done['generation']} ({done['templates']} templates, "
+              f"{done['stale_skipped']} replaced while rebuilding)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Re-extract face templates for all enrolled users")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--batch-size", type=int, default=64, help="Photos per checkpoint")
+    parser.add_argument("--dtype", default=TEMPLATE_STORE_DTYPE, choices=sorted(ROW_BYTES))
+    parser.add_argument("--retry-failed", action="store_true", help="Process photos that failed in an earlier run again")
+    parser.add_argument("--no-finalize", action="store_true", help="Only checkpoint; leave the live store untouched")
+    parser.add_argument("--report", help="Where to write the JSON report (default: <store>.rebuild/report.json)")
+    asyncio.run(rebuild_templates(parser.parse_args()))
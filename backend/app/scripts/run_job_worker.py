@@ -0,0 +1,22 @@
+import asyncio
+import signal
+import sys
+import os
+
+# Add parent directory to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+
+from app.services.jobs import JobWorker
+from app.services import job_handlers  # noqa: F401  (registers handlers)
+
+async def main():
+    # Run with JOB_WORKER_MODE=external on the API so only these processes execute jobs
+    worker = JobWorker()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, worker.stop)
+    await worker.run()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,108 @@
+from datetime import date, datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.services import jobs
+
+# One statement for the whole day: everyone rostered on `day` (latest
+# assignment wins), outer-joined to their first check-in. Rostered users with
+# no matching attendance row (the anti-join side) are absent, or pending
+# while their shift's grace period hasn't passed yet.
+_UPSERT_DAY = """
+WITH rostered AS (
+    SELECT DISTINCT ON (r.user_id)
+        r.organization_id,
+        r.user_id,
+        r.shift_id,
+        CAST(:day AS date) + s.start_time AS shift_start,
+        CAST(:day AS date) + s.start_time + make_interval(mins => s.grace_minutes) AS late_after
+    FROM roster_assignments r
+    JOIN shifts s ON s.id = r.shift_id
+    WHERE r.effective_from <= :day
+      AND (r.effective_to IS NULL OR r.effective_to >= :day)
+      AND (s.weekdays & :weekday_bit) <> 0
+      {filters}
+    ORDER BY r.user_id, r.effective_from DESC
+),
+first_check_in AS (
+    SELECT a.user_id, min(a.timestamp) AS first_check_in
+    FROM attendance a
+    WHERE a.timestamp >= :day_start AND a.timestamp < :day_end
+      AND a.user_id IN (SELECT user_id FROM rostered)
+    GROUP BY a.user_id
+)
+INSERT INTO daily_attendance_status
+    (organization_id, user_id, day, shift_id, status, first_check_in, minutes_late, computed_at)
+SELECT
+    r.organization_id,
+    r.user_id,
+    :day,
+    r.shift_id,
+    CASE
+        WHEN f.first_check_in IS NULL AND :now < r.late_after THEN 'pending'
+        WHEN f.first_check_in IS NULL THEN 'absent'
+        WHEN f.first_check_in > r.late_after THEN 'late'
+        ELSE 'present'
+    END,
+    f.first_check_in,
+    COALESCE(GREATEST(0, floor(EXTRACT(EPOCH FROM f.first_check_in - r.shift_start) / 60)), 0)::int,
+    :now
+FROM rostered r
+LEFT JOIN first_check_in f ON f.user_id = r.user_id
+ON CONFLICT (user_id, day) DO UPDATE SET
+    organization_id = EXCLUDED.organization_id,
+    shift_id = EXCLUDED.shift_id,
+    status = EXCLUDED.status,
+    first_check_in = EXCLUDED.first_check_in,
+    minutes_late = EXCLUDED.minutes_late,
+    computed_at = EXCLUDED.computed_at
+"""
+
+# Rows for users who are no longer rostered that day (assignment ended/removed)
+_DELETE_STALE = """
+DELETE FROM daily_attendance_status d
+WHERE d.day = :day AND d.computed_at < :now
+{filters}
+"""
+
+
+def _filters(alias: str, organization_id: Optional[int], user_id: Optional[int]) -> str:
+    clauses = []
+    if organization_id is not None:
+        clauses.append(f"AND {alias}.organization_id = :organization_id")
+    if user_id is not None:
+        clauses.append(f"AND {alias}.user_id = :user_id")
+    return " ".join(clauses)
+
+
+async def compute_day(
+    db: AsyncSession,
+    day: date,
+    organization_id: Optional[int] = None,
+    user_id: Optional[int] = None,
+) -> int:
+    """Recompute daily_attendance_status for `day` (optionally one org or one user).
+
+    Returns the number of rostered users written. The caller commits.
+    """
+    now = datetime.utcnow()
+    params = {
+        "day": day,
+        "weekday_bit": 1 << day.weekday(),
+        "day_start": datetime.combine(day, datetime.min.time()),
+        "day_end": datetime.combine(day + timedelta(days=1), datetime.min.time()),
+        "now": now,
+        "organization_id": organization_id,
+        "user_id": user_id,
+    }
+    result = await db.execute(text(_UPSERT_DAY.format(filters=_filters("r", organization_id, user_id))), params)
+    # Everything still rostered was just stamped with computed_at = now
+    await db.execute(text(_DELETE_STALE.format(filters=_filters("d", organization_id, user_id))), params)
+    return result.rowcount
+
+
+async def ensure_scheduled() -> None:
+    """Make sure the periodic absence.compute job is queued (it reschedules itself)"""
+    await jobs.ensure_periodic("absence.compute")
@@ -0,0 +1,88 @@
+from datetime import date, datetime, timedelta
+from typing import Optional, Tuple
+
+from sqlalchemy import Integer, cast, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from app.models.attendance import Attendance
+
+
+def month_range(month: str) -> Tuple[date, date]:
+    """'2026-10' -> (2026-10-01, 2026-10-31)"""
+    first = datetime.strptime(month, "%Y-%m").date()
+    next_month = (first.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return first, next_month - timedelta(days=1)
+
+
+def day_bounds(start: Optional[date], end: Optional[date]):
+    """Half-open timestamp bounds for an inclusive date range (index-friendly, no date() on the column)"""
+    conditions = []
+    if start:
+        conditions.append(Attendance.timestamp >= datetime.combine(start, datetime.min.time()))
+    if end:
+        conditions.append(Attendance.timestamp < datetime.combine(end + timedelta(days=1), datetime.min.time()))
+    return conditions
+
+
+async def calendar_summary(db: AsyncSession, user_id: int, start: date, end: date) -> dict:
+    """Per-day presence, first check-in and streaks for one user, aggregated in SQL.
+
+    Streaks are runs of consecutive present days inside [start, end]; a run that
+    began before `start` is counted from `start`.
+    """
+    day = func.date(Attendance.timestamp).label("day")
+
+    # One row per present day (served from ix_attendance_user_timestamp)
+    daily = (
+        select(
+            day,
+            func.min(Attendance.timestamp).label("first_check_in"),
+            func.count().label("check_ins"),
+        )
+        .where(Attendance.user_id == user_id, *day_bounds(start, end))
+        .group_by(day)
+        .cte("daily")
+    )
+
+    # Gaps and islands: consecutive days share the same (day - row_number)
+    islands = select(
+        daily.c.day,
+        daily.c.first_check_in,
+        daily.c.check_ins,
+        (daily.c.day - cast(func.row_number().over(order_by=daily.c.day), Integer)).label("island"),
+    ).cte("islands")
+
+    query = select(
+        islands.c.day,
+        islands.c.first_check_in,
+        islands.c.check_ins,
+        func.row_number().over(partition_by=islands.c.island, order_by=islands.c.day).label("streak"),
+        func.count().over(partition_by=islands.c.island).label("run_length"),
+    ).order_by(islands.c.day)
+
+    rows = (await db.execute(query)).all()
+
+    current_streak = 0
+    today = datetime.utcnow().date()
+    if rows and rows[-1].day >= min(end, today) - timedelta(days=1):
+        # Streak still running at the end of the range (today or yesterday for the current month)
+        current_streak = rows[-1].streak
+
+    return {
+        "start": start,
+        "end": end,
+        "present_days": len(rows),
+        "total_check_ins": sum(row.check_ins for row in rows),
+        "longest_streak": max((row.run_length for row in rows), default=0),
+        "current_streak": current_streak,
+        "days": [
+            {
+                "date": row.day,
+                "first_check_in": row.first_check_in,
+                "check_ins": row.check_ins,
+                "streak": row.streak,
+            }
+            for row in rows
+        ],
+    }
@@ -0,0 +1,231 @@
+import os
+import time
+import shutil
+import asyncio
+import hashlib
+from datetime import datetime, timedelta
+from typing import Optional, Tuple
+
+from sqlalchemy import update
+
+from app.config import (
+    AUDIT_CAPTURE_ENABLED,
+    AUDIT_DIR,
+    AUDIT_RETENTION_DAYS,
+    AUDIT_QUEUE_SIZE,
+    AUDIT_WEBP_QUALITY,
+    AUDIT_MAX_FACE_PX,
+)
+from app.database import SessionLocal
+from app.models.attendance import Attendance
+from app.services import jobs
+
+# Accepted check-in frames waiting to be written: (attendance_id, image_bytes, face_box, taken_at)
+_queue: Optional[asyncio.Queue] = None
+_writer_task: Optional[asyncio.Task] = None
+
+stats = {"written": 0, "deduplicated": 0, "dropped": 0, "failed": 0, "purged": 0}
+
+_disk_usage_cache: Tuple[float, Optional[int]] = (0.0, None)
+
+
+async def submit(attendance_id: int, image_bytes: bytes, face_box: Optional[tuple], taken_at: datetime) -> bool:
+    """Queue a frame for capture. Never blocks: when the writer is behind, the frame is dropped.
+
+    A coroutine so BackgroundTasks runs it on the event loop: asyncio.Queue must
+    not be touched from the threadpool that runs sync background tasks.
+    """
+    if not AUDIT_CAPTURE_ENABLED or _queue is None:
+        return False
+    try:
+        _queue.put_nowait((attendance_id, image_bytes, face_box, taken_at))
+        return True
+    except asyncio.QueueFull:
+        stats["dropped"] += 1
+        print(f"[Audit] ⚠️ Writer queue full, skipped capture for attendance #{attendance_id}")
+        return False
+
+
+def _crop_and_encode(image_bytes: bytes, face_box: Optional[tuple]) -> Optional[bytes]:
+    import cv2
+    import numpy as np
+
+    img = cv2.imdecode(np.frombuffer(image_bytes, np.uint8), cv2.IMREAD_COLOR)
+    if img is None:
+        return None
+
+    if face_box is None:
+        # Verification was answered from cache, so detect again (off the request path)
+        from app.services.face_recognition import detect_faces
+        gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+        faces = detect_faces(gray)
+        if len(faces) == 0:
+            return None
+        face_box = max(faces, key=lambda f: f[2] * f[3])
+
+    x, y, w, h = face_box
+    # Keep a margin around the detection so the evidence shows hairline/chin
+    pad_w, pad_h = w // 4, h // 4
+    top, left = max(0, y - pad_h), max(0, x - pad_w)
+    crop = img[top:y + h + pad_h, left:x + w + pad_w]
+
+    longest = max(crop.shape[:2])
+    if longest > AUDIT_MAX_FACE_PX:
+        scale = AUDIT_MAX_FACE_PX / longest
+        crop = cv2.resize(crop, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+
+    ok, encoded = cv2.imencode(".webp", crop, [cv2.IMWRITE_WEBP_QUALITY, AUDIT_WEBP_QUALITY])
+    return encoded.tobytes() if ok else None
+
+
+def _store(data: bytes, taken_at: datetime) -> str:
+    """Write under AUDIT_DIR/YYYY/MM/DD/<sha256>.webp; identical crops share one file"""
+    digest = hashlib.sha256(data).hexdigest()
+    relative = os.path.join(taken_at.strftime("%Y"), taken_at.strftime("%m"), taken_at.strftime("%d"), f"{digest}.webp")
+    path = os.path.join(AUDIT_DIR, relative)
+
+    if os.path.exists(path):
+        stats["deduplicated"] += 1
+        return relative
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+    stats["written"] += 1
+    return relative
+
+
+async def _writer_loop() -> None:
+    while True:
+        attendance_id, image_bytes, face_box, taken_at = await _queue.get()
+        try:
+            data = await asyncio.to_thread(_crop_and_encode, image_bytes, face_box)
+            if data is None:
+                print(f"[Audit] No face crop for attendance #{attendance_id}")
+                continue
+
+            relative = await asyncio.to_thread(_store, data, taken_at)
+            async with SessionLocal() as db:
+                await db.execute(
+                    update(Attendance).where(Attendance.id == attendance_id).values(audit_photo_path=relative)
+                )
+                await db.commit()
+            print(f"[Audit] ✅ Captured face for attendance #{attendance_id} ({len(data)} bytes)")
+        except Exception as e:
+            stats["failed"] += 1
+            print(f"[Audit] ❌ Capture failed for attendance #{attendance_id}: {e}")
+        finally:
+            _queue.task_done()
+
+
+def start_writer() -> None:
+    global _queue, _writer_task
+    if not AUDIT_CAPTURE_ENABLED:
+        return
+    os.makedirs(AUDIT_DIR, exist_ok=True)
+    _queue = asyncio.Queue(maxsize=AUDIT_QUEUE_SIZE)
+    _writer_task = asyncio.create_task(_writer_loop())
+
+
+async def stop_writer() -> None:
+    if _writer_task is None:
+        return
+    # Give queued captures a moment to flush before shutting down
+    try:
+        await asyncio.wait_for(_queue.join(), timeout=5)
+    except asyncio.TimeoutError:
+        pass
+    _writer_task.cancel()
+
+
+def audit_photo_full_path(relative: str) -> Optional[str]:
+    path = os.path.normpath(os.path.join(AUDIT_DIR, relative))
+    # Never serve anything outside the audit store
+    if not path.startswith(os.path.normpath(AUDIT_DIR) + os.sep):
+        return None
+    return path if os.path.exists(path) else None
+
+
+async def purge_expired(retention_days: int = AUDIT_RETENTION_DAYS) -> int:
+    """Delete day directories older than the retention window and unlink their rows"""
+    cutoff = datetime.utcnow().date() - timedelta(days=retention_days)
+
+    def _digit_dirs(path: str):
+        """(number, path) of the digit-named subdirectories; stray files and names are skipped"""
+        try:
+            names = os.listdir(path)
+        except OSError as e:
+            print(f"[Audit] ⚠️ Could not list {path}: {e}")
+            return []
+        return [
+            (int(name), os.path.join(path, name))
+            for name in names
+            if name.isdigit() and os.path.isdir(os.path.join(path, name))
+        ]
+
+    def _purge() -> int:
+        removed = 0
+        if not os.path.isdir(AUDIT_DIR):
+            return 0
+        for year, year_dir in _digit_dirs(AUDIT_DIR):
+            for month, month_dir in _digit_dirs(year_dir):
+                for day, shard in _digit_dirs(month_dir):
+                    try:
+                        if datetime(year, month, day).date() >= cutoff:
+                            continue
+                        count = len(os.listdir(shard))
+                        shutil.rmtree(shard)
+                        removed += count
+                    except (ValueError, OSError) as e:
+                        # Not a real date, or a shard we can't delete: leave it for the next run
+                        print(f"[Audit] ⚠️ Skipping {shard}: {e}")
+        return removed
+
+    removed = await asyncio.to_thread(_purge)
+
+    async with SessionLocal() as db:
+        await db.execute(
+            update(Attendance)
+            .where(Attendance.audit_photo_path.isnot(None), Attendance.timestamp < cutoff)
+            .values(audit_photo_path=None)
+        )
+        await db.commit()
+
+    stats["purged"] += removed
+    print(f"[Audit] Retention: removed {removed} captures older than {cutoff}")
+    return removed
+
+
+async def ensure_retention_scheduled() -> None:
+    """Make sure exactly one audit.retention job is queued (it reschedules itself daily)"""
+    if not AUDIT_CAPTURE_ENABLED:
+        return
+    await jobs.ensure_periodic("audit.retention")
+
+
+def _disk_usage_bytes() -> int:
+    total = 0
+    for root, _, files in os.walk(AUDIT_DIR):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+
+async def snapshot() -> dict:
+    global _disk_usage_cache
+    checked_at, usage = _disk_usage_cache
+    # Walking the store is O(files), so refresh the figure at most once a minute
+    if usage is None or time.monotonic() - checked_at > 60:
+        usage = await asyncio.to_thread(_disk_usage_bytes)
+        _disk_usage_cache = (time.monotonic(), usage)
+    return {
+        **stats,
+        "enabled": AUDIT_CAPTURE_ENABLED,
+        "queued": _queue.qsize() if _queue is not None else 0,
+        "disk_usage_bytes": usage,
+    }
@@ -0,0 +1,255 @@
+import os
+import csv
+import io
+import uuid
+import asyncio
+import zipfile
+import zlib
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional
+
+from passlib.context import CryptContext
+from sqlalchemy import update
+from sqlalchemy.future import select
+
+from app.config import BULK_IMPORT_WORKERS, BULK_IMPORT_BATCH_SIZE, BULK_IMPORT_MAX_PHOTO_BYTES
+from app.database import SessionLocal
+from app.models.bulk_import_job import BulkImportJob
+from app.models.user import User
+from app.services import jobs
+from app.services.face_recognition import encode_image_bytes
+from app.services.storage import get_blob_store
+from app.services.thumbnails import generate_thumbnails_from_bytes
+
+REQUIRED_COLUMNS = {"name", "email", "password", "photo"}
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+READ_CHUNK_BYTES = 64 * 1024
+
+_executor: Optional[ProcessPoolExecutor] = None
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(max_workers=BULK_IMPORT_WORKERS)
+    return _executor
+
+
+def _prepare_row(password: str, image_bytes: bytes) -> dict:
+    """CPU-bound part of enrolment, run in the process pool"""
+    if encode_image_bytes(image_bytes) is None:
+        return {"ok": False, "error": "No face detected in photo"}
+
+    return {
+        "ok": True,
+        "password_hash": pwd_context.hash(password),
+        "thumbnail_key": generate_thumbnails_from_bytes(image_bytes),
+    }
+
+
+def parse_csv(csv_bytes: bytes) -> List[dict]:
+    reader = csv.DictReader(io.StringIO(csv_bytes.decode("utf-8-sig")))
+    missing = REQUIRED_COLUMNS - set(reader.fieldnames or [])
+    if missing:
+        raise ValueError(f"CSV is missing columns: {', '.join(sorted(missing))}")
+    return [{k: (v or "").strip() for k, v in row.items() if k} for row in reader]
+
+
+def _as_dict(row: BulkImportJob) -> dict:
+    return {
+        "job_id": row.id,
+        "organization_id": row.organization_id,
+        "status": row.status,
+        "total": row.total,
+        "processed": row.processed,
+        "succeeded": row.succeeded,
+        "failed": row.failed,
+        "started_at": row.started_at.isoformat() if row.started_at else None,
+        "finished_at": row.finished_at.isoformat() if row.finished_at else None,
+        "error": row.error,
+        "results": row.results or [],
+    }
+
+
+async def create_job(total: int, organization_id: int) -> dict:
+    """Persist a queued job; the worker running it updates the row after every batch"""
+    row = BulkImportJob(id=uuid.uuid4().hex, organization_id=organization_id, total=total, results=[])
+    async with SessionLocal() as db:
+        db.add(row)
+        await db.commit()
+        return _as_dict(row)
+
+
+async def get_job(job_id: str) -> Optional[dict]:
+    async with SessionLocal() as db:
+        row = await db.get(BulkImportJob, job_id)
+        return _as_dict(row) if row else None
+
+
+async def _save(job: dict) -> None:
+    async with SessionLocal() as db:
+        await db.execute(
+            update(BulkImportJob)
+            .where(BulkImportJob.id == job["job_id"])
+            .values(
+                status=job["status"],
+                processed=job["processed"],
+                succeeded=job["succeeded"],
+                failed=job["failed"],
+                results=list(job["results"]),
+                error=job.get("error"),
+                started_at=job["started_at"],
+                finished_at=job["finished_at"],
+            )
+        )
+        await db.commit()
+
+
+def _read_member(archive: zipfile.ZipFile, info: zipfile.ZipInfo) -> Optional[bytes]:
+    """Member bytes, or None if it is larger than BULK_IMPORT_MAX_PHOTO_BYTES.
+
+    The header size is checked first, then the decompressed stream is read in
+    chunks and cut off at the limit, so nothing larger is ever held in memory.
+    """
+    if info.file_size > BULK_IMPORT_MAX_PHOTO_BYTES:
+        return None
+    chunks, size = [], 0
+    with archive.open(info) as member:
+        while True:
+            chunk = member.read(READ_CHUNK_BYTES)
+            if not chunk:
+                return b"".join(chunks)
+            size += len(chunk)
+            if size > BULK_IMPORT_MAX_PHOTO_BYTES:
+                return None
+            chunks.append(chunk)
+
+
+async def run_import(job: dict, rows: List[dict], zip_path: str) -> None:
+    """Enrol every CSV row, reading photos lazily from the ZIP on disk"""
+    job["status"] = "running"
+    job["started_at"] = datetime.utcnow()
+    loop = asyncio.get_running_loop()
+    executor = _get_executor()
+    store = get_blob_store()
+
+    try:
+        await _save(job)
+        with zipfile.ZipFile(zip_path) as archive:
+            # Photos are matched by base name so folders inside the ZIP don't matter
+            members = {
+                os.path.basename(info.filename): info
+                for info in archive.infolist()
+                if not info.is_dir()
+            }
+
+            for start in range(0, len(rows), BULK_IMPORT_BATCH_SIZE):
+                batch = rows[start:start + BULK_IMPORT_BATCH_SIZE]
+                await _import_batch(job, batch, start, archive, members, loop, executor, store)
+                await _save(job)
+
+        job["status"] = "completed"
+    except Exception as e:
+        print(f"[Bulk Import] ❌ Job {job['job_id']} failed: {e}")
+        job["status"] = "failed"
+        job["error"] = str(e)
+    finally:
+        job["finished_at"] = datetime.utcnow()
+        if os.path.exists(zip_path):
+            os.remove(zip_path)
+        try:
+            await _save(job)
+        except Exception as e:
+            print(f"[Bulk Import] ⚠️ Could not save final status of {job['job_id']}: {e}")
+        print(f"[Bulk Import] Job {job['job_id']}: {job['succeeded']} added, {job['failed']} failed")
+
+
+async def _import_batch(job, batch, offset, archive, members, loop, executor, store) -> None:
+    def record(row_number: int, email: str, status: str, error: str = None):
+        job["results"].append({"row": row_number, "email": email, "status": status, "error": error})
+        job["processed"] += 1
+        if status == "created":
+            job["succeeded"] += 1
+        else:
+            job["failed"] += 1
+
+    async with SessionLocal() as db:
+        # One existence check for the whole batch instead of one per row
+        emails = [row.get("email") for row in batch if row.get("email")]
+        result = await db.execute(select(User.email).where(User.email.in_(emails)))
+        taken = set(result.scalars().all())
+
+        pending = []
+        for i, row in enumerate(batch):
+            row_number = offset + i + 2  # 1-based, after the header line
+            email = row.get("email")
+            if not all(row.get(col) for col in REQUIRED_COLUMNS):
+                record(row_number, email, "error", "Missing required fields")
+                continue
+            if email in taken:
+                record(row_number, email, "error", "User already exists")
+                continue
+            info = members.get(os.path.basename(row["photo"]))
+            if info is None:
+                record(row_number, email, "error", f"Photo '{row['photo']}' not in archive")
+                continue
+
+            try:
+                image_bytes = _read_member(archive, info)
+            except (zipfile.BadZipFile, zlib.error) as e:
+                record(row_number, email, "error", f"Photo '{row['photo']}' is unreadable: {e}")
+                continue
+            if image_bytes is None:
+                limit_mb = BULK_IMPORT_MAX_PHOTO_BYTES / (1024 * 1024)
+                record(row_number, email, "error", f"Photo '{row['photo']}' is larger than {limit_mb:g} MB")
+                continue
+
+            taken.add(email)
+            future = loop.run_in_executor(executor, _prepare_row, row["password"], image_bytes)
+            pending.append((row_number, row, image_bytes, future))
+
+        new_users = []
+        for row_number, row, image_bytes, future in pending:
+            try:
+                prepared = await future
+            except Exception as e:
+                record(row_number, row["email"], "error", f"Processing failed: {e}")
+                continue
+            if not prepared["ok"]:
+                record(row_number, row["email"], "error", prepared["error"])
+                continue
+
+            photo_path = await store.put(image_bytes, ".jpg")
+            new_users.append((row_number, User(
+                name=row["name"],
+                email=row["email"],
+                password=prepared["password_hash"],
+                is_admin=False,
+                role=row.get("role") or "user",
+                photo_path=photo_path,
+                thumbnail_key=prepared["thumbnail_key"],
+                organization_id=job["organization_id"],
+            )))
+
+        if not new_users:
+            return
+
+        try:
+            db.add_all([user for _, user in new_users])
+            await db.flush()
+            # One template store rewrite per batch rather than per user
+            jobs.enqueue(
+                db, "templates.enroll", {"user_ids": [user.id for _, user in new_users]},
+                organization_id=job["organization_id"],
+            )
+            await db.commit()
+            for row_number, user in new_users:
+                record(row_number, user.email, "created")
+        except Exception as e:
+            await db.rollback()
+            print(f"[Bulk Import] ❌ Batch insert failed: {e}")
+            for row_number, user in new_users:
+                record(row_number, user.email, "error", "Database error")
@@ -0,0 +1,390 @@
+import os
+import gzip
+import uuid
+import asyncio
+import hashlib
+from datetime import datetime
+from typing import Optional
+
+import orjson
+from sqlalchemy import delete, func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.future import select
+
+from app.config import (
+    EDGE_DATA_DIR,
+    EDGE_UPSTREAM_URL,
+    EDGE_UPSTREAM_TOKEN,
+    EDGE_SITE_ID,
+    EDGE_SYNC_INTERVAL_SECONDS,
+    EDGE_SYNC_BATCH_SIZE,
+    EDGE_SYNC_TIMEOUT_SECONDS,
+)
+from app.database import engine, SessionLocal
+from app.models.edge import EdgeBase, EdgeStaff, EdgeCheckIn, EdgeState
+
+# Edge kiosk mode. The site instance mirrors its organization's staff (and their
+# photos, encoded into the local template store) from the central /sync/staff
+# feed, verifies and records check-ins against its SQLite store, and pushes
+# them upstream in gzip-compressed batches to POST /edge/checkins. The central
+# backend resolves same-day conflicts and reports an outcome per check-in.
+
+PHOTO_DIR = os.path.join(EDGE_DATA_DIR, "photos")
+STAFF_TOKEN_KEY = "staff_sync_token"
+
+state = {
+    "last_sync_at": None,
+    "last_error": None,
+    "online": False,
+    "pushed": 0,
+    "duplicates": 0,
+    "replaced": 0,
+}
+
+_sync_task: Optional[asyncio.Task] = None
+_wakeup: Optional[asyncio.Event] = None
+_sync_lock: Optional[asyncio.Lock] = None
+
+
+class AlreadyMarked(Exception):
+    pass
+
+
+async def init_store() -> None:
+    os.makedirs(PHOTO_DIR, exist_ok=True)
+    async with engine.begin() as conn:
+        await conn.run_sync(EdgeBase.metadata.create_all)
+    print(f"[Edge] Local store ready ({engine.url.database})")
+
+
+# ---------- Check-ins ----------
+
+async def record_checkin(db, user_id: int, location: str, battery_level: float) -> EdgeCheckIn:
+    """Store a verified check-in locally; raises AlreadyMarked for a second one on the same day"""
+    now = datetime.utcnow()
+    checkin = EdgeCheckIn(
+        ref=uuid.uuid4().hex,
+        user_id=user_id,
+        day=now.date(),
+        timestamp=now,
+        location=location,
+        battery_level=battery_level,
+    )
+    db.add(checkin)
+    try:
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        raise AlreadyMarked()
+    wake()
+    return checkin
+
+
+def wake() -> None:
+    """Push new check-ins now instead of at the next interval"""
+    if _wakeup is not None:
+        _wakeup.set()
+
+
+# ---------- Upstream sync ----------
+
+def _client():
+    import httpx
+
+    return httpx.AsyncClient(
+        base_url=EDGE_UPSTREAM_URL,
+        headers={"Authorization": f"Bearer {EDGE_UPSTREAM_TOKEN}"},
+        timeout=EDGE_SYNC_TIMEOUT_SECONDS,
+    )
+
+
+async def _get_state(db, key: str) -> Optional[str]:
+    return (await db.execute(select(EdgeState.value).where(EdgeState.key == key))).scalar_one_or_none()
+
+
+async def _set_state(db, key: str, value: Optional[str]) -> None:
+    row = await db.get(EdgeState, key)
+    if row is None:
+        db.add(EdgeState(key=key, value=value))
+    else:
+        row.value = value
+
+
+async def _download_photo(client, photo_url: str) -> Optional[str]:
+    # Named after the URL: a replaced photo gets a new URL, so files are never rewritten in place
+    name = hashlib.sha256(photo_url.encode()).hexdigest()[:32] + os.path.splitext(photo_url)[1][:5]
+    path = os.path.join(PHOTO_DIR, name)
+    if os.path.exists(path):
+        return path
+
+    response = await client.get(photo_url)
+    if response.status_code != 200:
+        print(f"[Edge] ⚠️ Could not download {photo_url}: HTTP {response.status_code}")
+        return None
+    tmp_path = f"{path}.part"
+    with open(tmp_path, "wb") as f:
+        f.write(response.content)
+    os.replace(tmp_path, path)
+    return path
+
+
+async def pull_staff(client, full: bool = False) -> int:
+    """Apply the staff delta since the last pull (everything when full); photos are downloaded and encoded locally"""
+    from app.services import template_store
+    from app.services.face_recognition import TEMPLATE_PIPELINE_VERSION, _read_and_encode_image
+
+    async with SessionLocal() as db:
+        since = None if full else await _get_state(db, STAFF_TOKEN_KEY)
+        response = await client.get("/sync/staff", params={"since": since} if since else None)
+        response.raise_for_status()
+        page = response.json()
+
+        upserts, gone, no_template = {}, set(page["deletes"]), set()
+        seen = {row["id"] for row in page["upserts"]}
+        result = await db.execute(select(EdgeStaff).where(EdgeStaff.id.in_(seen)))
+        mirrored = {staff.id: staff for staff in result.scalars().all()}
+
+        # Downloads and encoding happen before anything is flushed, so SQLite's
+        # write lock is only held for the final statements, never across HTTP
+        for row in page["upserts"]:
+            staff = mirrored.get(row["id"])
+            if staff is None:
+                staff = EdgeStaff(id=row["id"])
+                db.add(staff)
+            staff.name, staff.email, staff.updated_at = row["name"], row["email"], datetime.utcnow()
+            if row["photo_url"] == staff.photo_url and staff.photo_file:
+                continue
+
+            staff.photo_url = row["photo_url"]
+            staff.photo_file = await _download_photo(client, row["photo_url"]) if row["photo_url"] else None
+            encoding = await asyncio.to_thread(_read_and_encode_image, staff.photo_file) if staff.photo_file else None
+            if encoding is None:
+                no_template.add(staff.id)
+            else:
+                upserts[staff.id] = (staff.photo_url, encoding)
+
+        if page["full"]:
+            # A full snapshot replaces the mirror: anyone not in it is gone
+            stale = await db.execute(select(EdgeStaff.id).where(EdgeStaff.id.notin_(seen)))
+            gone.update(stale.scalars().all())
+        if gone:
+            await db.execute(delete(EdgeStaff).where(EdgeStaff.id.in_(gone)))
+        await _set_state(db, STAFF_TOKEN_KEY, str(page["token"]))
+        await db.commit()
+
+    # After the commit: a template that didn't make it is re-encoded from the photo at check-in
+    if upserts or gone or no_template:
+        path = template_store.store_path(TEMPLATE_PIPELINE_VERSION)
+        await asyncio.to_thread(template_store.apply_changes, upserts, gone | no_template, path)
+
+    if page["upserts"] or gone:
+        print(f"[Edge] Staff: {len(page['upserts'])} changed ({len(upserts)} encoded, "
+              f"{len(no_template)} without a usable photo), {len(gone)} removed")
+    return len(page["upserts"]) + len(page["deletes"])
+
+
+async def push_checkins(client) -> int:
+    """Send pending check-ins in compressed batches until none are left; returns how many were sent"""
+    sent = 0
+    while True:
+        async with SessionLocal() as db:
+            result = await db.execute(
+                select(EdgeCheckIn)
+                .where(EdgeCheckIn.status == "pending")
+                .order_by(EdgeCheckIn.id)
+                .limit(EDGE_SYNC_BATCH_SIZE)
+            )
+            batch = result.scalars().all()
+            if not batch:
+                return sent
+
+            body = gzip.compress(orjson.dumps({
+                "site": EDGE_SITE_ID,
+                "checkins": [
+                    {
+                        "ref": c.ref,
+                        "user_id": c.user_id,
+                        "timestamp": c.timestamp,
+                        "location": c.location,
+                        "battery_level": c.battery_level,
+                    }
+                    for c in batch
+                ],
+            }))
+            response = await client.post(
+                "/edge/checkins",
+                content=body,
+                headers={"Content-Type": "application/json", "Content-Encoding": "gzip"},
+            )
+            response.raise_for_status()
+
+            # Outcomes are keyed by ref, so a lost response just means the batch is resent
+            # and the central backend answers "duplicate" for rows it already has
+            outcomes = {item["ref"]: item for item in response.json()["results"]}
+            now = datetime.utcnow()
+            for checkin in batch:
+                outcome = outcomes.get(checkin.ref)
+                if outcome is None:
+                    continue
+                checkin.status = outcome["status"]
+                checkin.upstream_id = outcome.get("attendance_id")
+                checkin.synced_at = now
+                if outcome["status"] == "duplicate":
+                    state["duplicates"] += 1
+                elif outcome["status"] == "replaced":
+                    state["replaced"] += 1
+            await db.commit()
+
+        sent += len(batch)
+        state["pushed"] += len(batch)
+        print(f"[Edge] ✅ Pushed {len(batch)} check-ins upstream ({len(body)} bytes compressed)")
+
+
+async def sync_once(full_staff: bool = False) -> dict:
+    """One pull + push round; safe to call from the loop and from POST /kiosk/sync at once"""
+    global _sync_lock
+    if _sync_lock is None:
+        _sync_lock = asyncio.Lock()
+
+    async with _sync_lock:
+        try:
+            async with _client() as client:
+                staff_changes = await pull_staff(client, full_staff)
+                pushed = await push_checkins(client)
+            state.update(online=True, last_error=None, last_sync_at=datetime.utcnow())
+            return {"staff_changes": staff_changes, "pushed": pushed}
+        except Exception as e:
+            # Offline is the normal case on flaky links: keep recording locally and retry later
+            state.update(online=False, last_error=f"{type(e).__name__}: {e}")
+            print(f"[Edge] ⚠️ Sync failed, will retry: {e}")
+            return {"error": state["last_error"]}
+
+
+async def _sync_loop() -> None:
+    while True:
+        # Cleared first: a check-in recorded during the round triggers another one right away
+        _wakeup.clear()
+        await sync_once()
+        try:
+            await asyncio.wait_for(_wakeup.wait(), timeout=EDGE_SYNC_INTERVAL_SECONDS)
+        except asyncio.TimeoutError:
+            pass
+
+
+def start_sync() -> None:
+    global _sync_task, _wakeup
+    if not EDGE_UPSTREAM_TOKEN:
+        print("[Edge] ⚠️ EDGE_UPSTREAM_TOKEN not set, running offline only")
+        return
+    _wakeup = asyncio.Event()
+    _sync_task = asyncio.create_task(_sync_loop())
+
+
+async def stop_sync() -> None:
+    if _sync_task is None:
+        return
+    _sync_task.cancel()
+    # One last push so a clean shutdown doesn't strand check-ins until the next start
+    try:
+        await asyncio.wait_for(sync_once(), timeout=EDGE_SYNC_TIMEOUT_SECONDS)
+    except asyncio.TimeoutError:
+        pass
+
+
+async def snapshot() -> dict:
+    async with SessionLocal() as db:
+        counts = dict((await db.execute(
+            select(EdgeCheckIn.status, func.count()).group_by(EdgeCheckIn.status)
+        )).all())
+        staff = (await db.execute(select(func.count()).select_from(EdgeStaff))).scalar()
+    return {**state, "site": EDGE_SITE_ID, "staff": staff, "checkins": counts}
+
+
+# ---------- Central side: POST /edge/checkins ----------
+
+async def ingest_checkins(db, organization_id: int, checkins: list) -> list:
+    """Merge a batch of edge check-ins under the one-check-in-per-user-per-day rule.
+
+    Outcome per ref:
+      created    no check-in that day yet
+      duplicate  a check-in at or before this time exists that day; nothing changes.
+                 Resends of a batch whose response was lost land here too, whether
+                 the original was created or replaced, since the stored row then
+                 carries this very timestamp
+      replaced   this one is earlier than the stored one, which takes its time,
+                 location and battery (first arrival is what lateness is judged on).
+                 The row keeps its id; the update restamps its change_seq, which
+                 the list watermarks and the delta sync feed key on
+      rejected   the user isn't in the caller's organization
+    """
+    from app.models.attendance import Attendance
+    from app.models.user import User
+    from app.services import jobs
+    from app.services.attendance_calendar import day_bounds
+
+    if not checkins:
+        return []
+
+    user_ids = {c.user_id for c in checkins}
+    result = await db.execute(select(User.id).where(User.id.in_(user_ids), User.organization_id == organization_id))
+    known = set(result.scalars().all())
+
+    # First stored check-in per (user, day) over the batch's date range, in one query
+    days = sorted({c.timestamp.date() for c in checkins})
+    result = await db.execute(
+        select(Attendance)
+        .where(Attendance.user_id.in_(known), *day_bounds(days[0], days[-1]))
+        .order_by(Attendance.timestamp)
+    )
+    first = {}
+    for row in result.scalars().all():
+        first.setdefault((row.user_id, row.timestamp.date()), row)
+
+    outcomes, touched = [], {}
+    for checkin in sorted(checkins, key=lambda c: c.timestamp):
+        if checkin.user_id not in known:
+            outcomes.append(({"ref": checkin.ref, "status": "rejected", "error": "unknown user"}, None))
+            continue
+
+        key = (checkin.user_id, checkin.timestamp.date())
+        stored = first.get(key)
+        if stored is None:
+            stored = Attendance(
+                user_id=checkin.user_id,
+                organization_id=organization_id,
+                timestamp=checkin.timestamp,
+                location=checkin.location,
+                battery_level=checkin.battery_level,
+            )
+            db.add(stored)
+            first[key] = touched[key] = stored
+            status = "created"
+        elif stored.timestamp <= checkin.timestamp:
+            status = "duplicate"
+        else:
+            stored.timestamp = checkin.timestamp
+            stored.location = checkin.location
+            stored.battery_level = checkin.battery_level
+            # The audit capture showed the later check-in, not this one
+            stored.audit_photo_path = None
+            touched[key] = stored
+            status = "replaced"
+        outcomes.append(({"ref": checkin.ref, "status": status}, stored))
+
+    await db.flush()
+    for (user_id, day), row in touched.items():
+        jobs.enqueue(db, "attendance.marked", {
+            "attendance_id": row.id,
+            "user_id": user_id,
+            "location": row.location,
+            "battery_level": row.battery_level,
+            "day": day.isoformat(),
+        }, organization_id=organization_id)
+    await db.commit()
+
+    results = []
+    for outcome, row in outcomes:
+        if row is not None:
+            outcome["attendance_id"] = row.id
+        results.append(outcome)
+    return results
@@ -0,0 +1,233 @@
+import os
+import io
+import csv
+import time
+import zlib
+import uuid
+import asyncio
+from datetime import datetime, date, timedelta
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from app.config import EXPORT_DIR, EXPORT_BATCH_SIZE, EXPORT_RETENTION_HOURS
+from app.models.attendance import Attendance
+from app.models.user import User
+from app.services import jobs
+
+EXPORT_FORMATS = {
+    "csv": ("csv.gz", "application/gzip"),
+    "xlsx": ("xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+    "parquet": ("parquet", "application/vnd.apache.parquet"),
+}
+
+COLUMNS = ["id", "timestamp", "user_id", "user_name", "user_email", "location", "battery_level"]
+
+
+class UserLookup:
+    """user_id -> (name, email), filled one batch query at a time for ids not seen yet"""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+        self.cache: Dict[int, Tuple[Optional[str], Optional[str]]] = {}
+
+    async def resolve(self, user_ids) -> None:
+        missing = {uid for uid in user_ids if uid not in self.cache}
+        if not missing:
+            return
+        result = await self.db.execute(select(User.id, User.name, User.email).where(User.id.in_(missing)))
+        for uid, name, email in result.all():
+            self.cache[uid] = (name, email)
+        for uid in missing:
+            self.cache.setdefault(uid, (None, None))
+
+    def get(self, user_id: int) -> Tuple[Optional[str], Optional[str]]:
+        return self.cache.get(user_id, (None, None))
+
+
+async def iter_attendance_batches(
+    db: AsyncSession,
+    organization_id: int,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    user_id: Optional[int] = None,
+    batch_size: int = EXPORT_BATCH_SIZE,
+) -> AsyncIterator[List[list]]:
+    """Yield rows in batches from a server-side cursor; memory is O(batch_size)"""
+    query = (
+        select(Attendance.id, Attendance.timestamp, Attendance.user_id, Attendance.location, Attendance.battery_level)
+        .where(Attendance.organization_id == organization_id)
+        .order_by(Attendance.timestamp, Attendance.id)
+        .execution_options(yield_per=batch_size)
+    )
+    if start:
+        query = query.where(Attendance.timestamp >= datetime.combine(start, datetime.min.time()))
+    if end:
+        # end is inclusive
+        query = query.where(Attendance.timestamp < datetime.combine(end + timedelta(days=1), datetime.min.time()))
+    if user_id is not None:
+        query = query.where(Attendance.user_id == user_id)
+
+    users = UserLookup(db)
+    result = await db.stream(query)
+    async for partition in result.partitions():
+        await users.resolve(row.user_id for row in partition)
+        batch = []
+        for row in partition:
+            name, email = users.get(row.user_id)
+            batch.append([row.id, row.timestamp, row.user_id, name, email, row.location, row.battery_level])
+        yield batch
+
+
+# Row encoding, compression and file writes below run in worker threads, one
+# batch at a time: the event loop only fetches the next batch from the cursor.
+
+async def stream_csv_gzip(batches: AsyncIterator[List[list]]) -> AsyncIterator[bytes]:
+    """Gzip-compressed CSV, produced chunk by chunk for StreamingResponse or a file"""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)  # gzip container
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def encode(batch: List[list]) -> bytes:
+        for row in batch:
+            writer.writerow([value.isoformat() if isinstance(value, datetime) else value for value in row])
+        chunk = compressor.compress(buffer.getvalue().encode())
+        buffer.seek(0)
+        buffer.truncate()
+        return chunk
+
+    writer.writerow(COLUMNS)
+    async for batch in batches:
+        chunk = await asyncio.to_thread(encode, batch)
+        if chunk:
+            yield chunk
+
+    chunk = compressor.compress(buffer.getvalue().encode())
+    yield chunk + compressor.flush()
+
+
+async def write_xlsx(batches: AsyncIterator[List[list]], path: str) -> None:
+    try:
+        from openpyxl import Workbook
+    except ImportError:
+        raise RuntimeError("XLSX export requires the 'openpyxl' package")
+
+    def append(sheet, batch: List[list]) -> None:
+        for row in batch:
+            sheet.append(row)
+
+    # write_only mode streams rows to disk instead of building the sheet in memory
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet("Attendance")
+    sheet.append(COLUMNS)
+    async for batch in batches:
+        await asyncio.to_thread(append, sheet, batch)
+    await asyncio.to_thread(workbook.save, path)
+
+
+async def write_parquet(batches: AsyncIterator[List[list]], path: str) -> None:
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError("Parquet export requires the 'pyarrow' package")
+
+    schema = pa.schema([
+        ("id", pa.int64()),
+        ("timestamp", pa.timestamp("us")),
+        ("user_id", pa.int64()),
+        ("user_name", pa.string()),
+        ("user_email", pa.string()),
+        ("location", pa.string()),
+        ("battery_level", pa.float64()),
+    ])
+    def write_batch(writer, batch: List[list]) -> None:
+        columns = list(zip(*batch)) if batch else [[] for _ in COLUMNS]
+        writer.write_table(pa.Table.from_arrays([pa.array(col, type=field.type) for col, field in zip(columns, schema)], schema=schema))
+
+    # One row group per batch keeps memory flat regardless of table size
+    writer = await asyncio.to_thread(pq.ParquetWriter, path, schema, compression="zstd")
+    try:
+        async for batch in batches:
+            await asyncio.to_thread(write_batch, writer, batch)
+    finally:
+        await asyncio.to_thread(writer.close)
+
+
+async def write_export(
+    db: AsyncSession,
+    organization_id: int,
+    fmt: str,
+    path: str,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    user_id: Optional[int] = None,
+) -> str:
+    """Write an export to path atomically (readers never see a partial file)"""
+    batches = iter_attendance_batches(db, organization_id, start, end, user_id)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.part"
+
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format '{fmt}'")
+
+    try:
+        if fmt == "csv":
+            with open(tmp_path, "wb") as f:
+                async for chunk in stream_csv_gzip(batches):
+                    await asyncio.to_thread(f.write, chunk)
+        elif fmt == "xlsx":
+            await write_xlsx(batches, tmp_path)
+        else:
+            await write_parquet(batches, tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        # Failed, timed out or cancelled: a retry starts over, so drop the partial file
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return path
+
+
+def _purge_dir(cutoff: float) -> int:
+    removed = 0
+    if not os.path.isdir(EXPORT_DIR):
+        return 0
+    for org in os.listdir(EXPORT_DIR):
+        org_dir = os.path.join(EXPORT_DIR, org)
+        if not org.isdigit() or not os.path.isdir(org_dir):
+            continue
+        for name in os.listdir(org_dir):
+            path = os.path.join(org_dir, name)
+            try:
+                # Finished artifacts, and .part files a crashed worker left behind
+                if os.path.isfile(path) and os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+                    removed += 1
+            except OSError as e:
+                print(f"[Exports] ⚠️ Could not remove {path}: {e}")
+    return removed
+
+
+async def purge_expired(retention_hours: float = EXPORT_RETENTION_HOURS) -> int:
+    """Delete export files older than the retention window; their download URLs then 404"""
+    cutoff = time.time() - retention_hours * 3600
+    removed = await asyncio.to_thread(_purge_dir, cutoff)
+    print(f"[Exports] Retention: removed {removed} files older than {retention_hours:g}h")
+    return removed
+
+
+async def ensure_retention_scheduled() -> None:
+    """Make sure one export.retention job is queued (it reschedules itself hourly)"""
+    await jobs.ensure_periodic("export.retention")
+
+
+def new_export_id() -> str:
+    return uuid.uuid4().hex
+
+
+def artifact_path(export_id: str, fmt: str, organization_id: int) -> str:
+    # Per-organization directories: an export id alone never reaches another site's file
+    extension, _ = EXPORT_FORMATS[fmt]
+    return os.path.join(EXPORT_DIR, str(organization_id), f"{export_id}.{extension}")
@@ -1,23 +1,94 @@
+from __future__ import annotations
+
 import os
-import httpx
-import cv2
-import numpy as np
+import time
+import asyncio
 from pathlib import Path
+from typing import Optional, Tuple, TYPE_CHECKING
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from app.models.user import User
+from app.services.storage import get_blob_store, is_blob_key
+from app.services import verification_cache
+from app.services.template_store import get_template_store
+from app.config import (
+    LIVENESS_MODE,
+    LIVENESS_BUDGET_MS,
+    LIVENESS_REJECT_SIGNALS,
+    LIVENESS_MAX_MOIRE_RATIO,
+    LIVENESS_MAX_SPECULAR_FRACTION,
+    LIVENESS_MIN_CHROMA_STD,
+    LIVENESS_MIN_SHARPNESS,
+    LIVENESS_MIN_MOTION,
+)
+
+# cv2/numpy are imported lazily so that importing the app (and admin scripts)
+# doesn't pay for OpenCV; warm_up() loads them ahead of the first request.
+if TYPE_CHECKING:
+    import numpy as np
+
+_face_cascade = None
+
+# (user_id, template_version) pairs already queued for the template store in this worker
+_enrollment_requested = set()
+
+def _get_face_cascade():
+    global _face_cascade
+    if _face_cascade is None:
+        import cv2
+        _face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + "haarcascade_frontalface_default.xml")
+    return _face_cascade
+
+def warm_up() -> float:
+    """Import OpenCV, load the detector, run one detection pass and map the template
+    store, so the first check-in on this worker pays for none of it. Returns seconds taken."""
+    started = time.perf_counter()
+    import cv2
+    import numpy as np
+
+    dummy = np.zeros((240, 320), dtype=np.uint8)
+    _get_face_cascade().detectMultiScale(dummy, scaleFactor=1.05, minNeighbors=3, minSize=(30, 30), maxSize=(300, 300))
+    get_template_store().snapshot()
+
+    elapsed = time.perf_counter() - started
+    print(f"[Face Verify] Warm-up finished in {elapsed * 1000:.0f} ms")
+    return elapsed
 
 def _read_and_encode_image(image_path: Path) -> np.ndarray:
+    import cv2
+
     img = cv2.imread(str(image_path))
     if img is None:
         print(f"[Stored Image] Could not read image: {image_path}")
         return None
         
-    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-    
-    # Use better face detection parameters
-    face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + "haarcascade_frontalface_default.xml")
-    faces = face_cascade.detectMultiScale(
+    return _encode_largest_face(img, str(image_path))
+
+def encode_image_bytes(image_bytes: bytes) -> np.ndarray:
+    """Same template as _read_and_encode_image, for photos that are already in memory"""
+    import cv2
+    import numpy as np
+
+    img = cv2.imdecode(np.frombuffer(image_bytes, np.uint8), cv2.IMREAD_COLOR)
+    if img is None:
+        print("[Stored Image] Could not decode image bytes")
+        return None
+
+    return _encode_largest_face(img, "uploaded photo")
+
+# Match acceptance: distance must be below BASE_MATCH_THRESHOLD times the
+# multiplier for the number of faces in the frame (crowded scenes get leniency).
+# app/scripts/evaluate_thresholds.py measures FAR/FRR for these values.
+BASE_MATCH_THRESHOLD = 15000
+FACE_COUNT_MULTIPLIERS = {1: 1.0, 2: 1.2}
+CROWD_MULTIPLIER = 1.5
+
+def match_threshold(face_count: int, base_threshold: float = BASE_MATCH_THRESHOLD) -> float:
+    return base_threshold * FACE_COUNT_MULTIPLIERS.get(face_count, CROWD_MULTIPLIER)
+
+def detect_faces(gray: np.ndarray):
+    """Haar detection with the parameters used for both enrollment and check-in"""
+    return _get_face_cascade().detectMultiScale(
         gray, 
         scaleFactor=1.05,  # Smaller steps for better detection
         minNeighbors=3,    # Reduced for more lenient detection
@@ -25,16 +96,17 @@ def _read_and_encode_image(image_path: Path) -> np.ndarray:
         maxSize=(300, 300) # Add maximum size
     )
 
-    if len(faces) == 0:
-        print(f"[Stored Image] No faces detected in {image_path}")
-        return None
+# Identifies the detect/encode pipeline that produced a template. Bump it whenever
+# detect_faces/encode_face change, then run app/scripts/rebuild_templates.py:
+# each version has its own template store file, so workers on the old code keep
+# matching against old templates while the new file is built.
+TEMPLATE_PIPELINE_VERSION = "v1"
 
-    # Use the largest face (most confident detection)
-    largest_face = max(faces, key=lambda f: f[2] * f[3])
-    x, y, w, h = largest_face
-    
-    print(f"[Stored Image] Found face at ({x},{y}) size {w}x{h}")
-    
+def encode_face(gray: np.ndarray, box) -> np.ndarray:
+    """100x100 histogram-equalized crop, flattened (the template format)"""
+    import cv2
+
+    x, y, w, h = box
     face = gray[y:y+h, x:x+w]
     
     # Resize to standard size and normalize
@@ -45,7 +117,157 @@ def _read_and_encode_image(image_path: Path) -> np.ndarray:
     
     return face_normalized.flatten()
 
-async def verify_face(image_bytes: bytes, user_id: int, db: AsyncSession) -> bool:
+def template_distance(stored: np.ndarray, live: np.ndarray) -> float:
+    """Match distance between two templates, on the scale the thresholds were tuned on.
+
+    The difference is taken in uint8 and wraps mod 256, as the original
+    np.linalg.norm(stored - live) on uint8 crops did. Rows from a float32 store
+    hold the same 0-255 values, so they are cast back first and every store
+    dtype gives identical distances.
+    """
+    import numpy as np
+
+    diff = np.asarray(stored).astype(np.uint8, copy=False) - np.asarray(live).astype(np.uint8, copy=False)
+    return float(np.linalg.norm(diff))
+
+def _encode_largest_face(img: np.ndarray, source: str) -> np.ndarray:
+    import cv2
+
+    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+    faces = detect_faces(gray)
+
+    if len(faces) == 0:
+        print(f"[Stored Image] No faces detected in {source}")
+        return None
+
+    # Use the largest face (most confident detection)
+    largest_face = max(faces, key=lambda f: f[2] * f[3])
+    x, y, w, h = largest_face
+    
+    print(f"[Stored Image] Found face at ({x},{y}) size {w}x{h}")
+    
+    return encode_face(gray, largest_face)
+
+def _moire_ratio(face_gray: np.ndarray) -> float:
+    """Strongest high-frequency peak relative to the band's median energy.
+
+    Screens and halftone prints add periodic patterns that show up as isolated
+    spikes in the spectrum; skin texture spreads energy smoothly.
+    """
+    import cv2
+    import numpy as np
+
+    patch = cv2.resize(face_gray, (64, 64), interpolation=cv2.INTER_AREA).astype(np.float32)
+    patch -= patch.mean()
+    spectrum = np.abs(np.fft.fftshift(np.fft.fft2(patch)))
+
+    yy, xx = np.ogrid[-32:32, -32:32]
+    radius = np.sqrt(xx * xx + yy * yy)
+    band = spectrum[(radius > 12) & (radius < 30)]
+    return float(band.max() / (np.median(band) + 1e-6))
+
+def _specular_fraction(face_bgr: np.ndarray) -> float:
+    """Share of near-white, unsaturated pixels (glare off glossy paper or glass)"""
+    import cv2
+    import numpy as np
+
+    hsv = cv2.cvtColor(face_bgr, cv2.COLOR_BGR2HSV)
+    glare = (hsv[:, :, 2] > 240) & (hsv[:, :, 1] < 30)
+    return float(np.count_nonzero(glare)) / glare.size
+
+def _chroma_std(face_bgr: np.ndarray) -> float:
+    """Mean Cr/Cb standard deviation; recaptured faces lose most colour texture"""
+    import cv2
+
+    ycrcb = cv2.cvtColor(face_bgr, cv2.COLOR_BGR2YCrCb)
+    return float((ycrcb[:, :, 1].std() + ycrcb[:, :, 2].std()) / 2)
+
+def _sharpness(face_gray: np.ndarray) -> float:
+    """Variance of the Laplacian; re-photographed prints/screens come out soft"""
+    import cv2
+
+    return float(cv2.Laplacian(face_gray, cv2.CV_32F).var())
+
+def _micro_motion(face_gray: np.ndarray, second_gray: np.ndarray, face_box: tuple) -> float:
+    """Residual difference between two frames after removing rigid translation.
+
+    A photo or screen moves as one plane (the shift explains everything); a real
+    face blinks and shifts expression, leaving a residual.
+    """
+    import cv2
+    import numpy as np
+
+    x, y, w, h = face_box
+    second = second_gray[y:y + h, x:x + w]
+    if second.shape != face_gray.shape:
+        return 0.0
+
+    first = face_gray.astype(np.float32)
+    second = second.astype(np.float32)
+    (dx, dy), _ = cv2.phaseCorrelate(first, second)
+    aligned = cv2.warpAffine(second, np.float32([[1, 0, -dx], [0, 1, -dy]]), (w, h), borderMode=cv2.BORDER_REPLICATE)
+    # Ignore the border the shift exposed
+    margin = int(max(abs(dx), abs(dy))) + 2
+    residual = np.abs(first - aligned)[margin:h - margin, margin:w - margin]
+    return float(residual.mean()) if residual.size else 0.0
+
+def check_liveness(
+    img: np.ndarray,
+    gray: np.ndarray,
+    face_box: tuple,
+    second_gray: Optional[np.ndarray] = None,
+) -> dict:
+    """Passive liveness on an already decoded frame and detected face box.
+
+    Each cheap signal votes; the frame is rejected when LIVENESS_REJECT_SIGNALS
+    or more fail. Returns the scores, failed signals, "live" and "elapsed_ms".
+    """
+    started = time.perf_counter()
+    x, y, w, h = face_box
+    face_gray = gray[y:y + h, x:x + w]
+    face_bgr = img[y:y + h, x:x + w]
+
+    scores = {
+        "moire_ratio": _moire_ratio(face_gray),
+        "specular_fraction": _specular_fraction(face_bgr),
+        "chroma_std": _chroma_std(face_bgr),
+        "sharpness": _sharpness(face_gray),
+    }
+    failed = []
+    if scores["moire_ratio"] > LIVENESS_MAX_MOIRE_RATIO:
+        failed.append("moire")
+    if scores["specular_fraction"] > LIVENESS_MAX_SPECULAR_FRACTION:
+        failed.append("specular")
+    if scores["chroma_std"] < LIVENESS_MIN_CHROMA_STD:
+        failed.append("color_texture")
+    if scores["sharpness"] < LIVENESS_MIN_SHARPNESS:
+        failed.append("sharpness")
+
+    if second_gray is not None:
+        scores["motion"] = _micro_motion(face_gray, second_gray, face_box)
+        if scores["motion"] < LIVENESS_MIN_MOTION:
+            failed.append("motion")
+
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    if elapsed_ms > LIVENESS_BUDGET_MS:
+        print(f"[Liveness] ⚠️ {elapsed_ms:.1f} ms exceeds budget of {LIVENESS_BUDGET_MS:.0f} ms")
+
+    return {
+        "live": len(failed) < LIVENESS_REJECT_SIGNALS,
+        "failed": failed,
+        "scores": {name: round(value, 4) for name, value in scores.items()},
+        "elapsed_ms": round(elapsed_ms, 2),
+    }
+
+async def verify_face(
+    image_bytes: bytes,
+    user_id: int,
+    db: AsyncSession,
+    details: Optional[dict] = None,
+    second_frame: Optional[bytes] = None,
+) -> bool:
+    """If a details dict is passed it receives "distance", "face_box" (x, y, w, h) of the best match
+    and "liveness". second_frame (a frame taken shortly after) enables the micro-motion check."""
     result = await db.execute(select(User).where(User.id == user_id))
     user = result.scalar_one_or_none()
 
@@ -56,6 +278,81 @@ async def verify_face(image_bytes: bytes, user_id: int, db: AsyncSession) -> boo
     print(f"[Face Verify] Verifying face for user: {user.name}")
     print(f"[Face Verify] Database photo_path: {user.photo_path}")
     
+    stored_path = await _find_stored_photo(user)
+    if not stored_path:
+        return False
+
+    # ✅ Near-identical resubmissions (double taps, retries) reuse the previous outcome.
+    # The template version changes whenever the enrolled photo does. Not when liveness
+    # is enforced: a re-capture of an accepted frame (a phone showing it) is exactly
+    # what the liveness check has to see, so every frame goes through it.
+    template_version = template_version_for(user.photo_path, stored_path)
+    frame_hash = None
+    if LIVENESS_MODE != "enforce":
+        frame_hash = await asyncio.to_thread(verification_cache.perceptual_hash, image_bytes)
+    if frame_hash is not None:
+        cached = verification_cache.get(user.id, template_version, frame_hash)
+        if cached is not None:
+            passed, distance = cached
+            if details is not None:
+                # No detection or liveness ran for this frame
+                details.update(distance=distance, face_box=None, liveness=None)
+            print(f"[Face Verify] Cache hit: {'✅ PASSED' if passed else '❌ FAILED'} (distance {distance:.2f})")
+            return passed
+
+    # ✅ Enrolled template from the shared memory-mapped store (no decode/detect of the stored photo)
+    stored_encoding = get_template_store().get(user.id, template_version)
+    if stored_encoding is None:
+        _request_enrollment(user.id, user.organization_id, template_version)
+
+    # CV work runs off the event loop so other requests keep flowing
+    liveness = {}
+    passed, distance, face_box = await asyncio.to_thread(
+        _verify_against_stored, stored_path, image_bytes, stored_encoding, second_frame, liveness
+    )
+    if details is not None:
+        details["distance"] = distance
+        details["face_box"] = face_box
+        details["liveness"] = liveness or None
+
+    if frame_hash is not None and distance is not None:
+        verification_cache.put(user.id, template_version, frame_hash, passed, distance)
+    return passed
+
+def template_version_for(photo_path: str, stored_path: Path) -> str:
+    # Blob keys are content hashes, so the key alone identifies the photo on every host
+    if is_blob_key(photo_path):
+        return photo_path
+    return f"{photo_path}:{os.path.getmtime(stored_path):.0f}"
+
+def _request_enrollment(user_id: int, organization_id: int, template_version: str) -> None:
+    """Queue a templates.enroll job (once per worker) so later verifications hit the store"""
+    if (user_id, template_version) in _enrollment_requested:
+        return
+    _enrollment_requested.add((user_id, template_version))
+
+    async def _enqueue():
+        from app.database import SessionLocal
+        from app.services import jobs
+        try:
+            async with SessionLocal() as db:
+                jobs.enqueue(db, "templates.enroll", {"user_ids": [user_id]}, organization_id=organization_id)
+                await db.commit()
+        except Exception as e:
+            _enrollment_requested.discard((user_id, template_version))
+            print(f"[Face Verify] Could not queue template enrollment for user {user_id}: {e}")
+
+    asyncio.create_task(_enqueue())
+
+async def _find_stored_photo(user: User) -> Optional[Path]:
+    # Content-addressed photos are read through the blob store (local or S3 cache)
+    if is_blob_key(user.photo_path):
+        blob_path = await get_blob_store().local_path(user.photo_path)
+        if not blob_path:
+            print(f"[Face Verify] Photo blob '{user.photo_path}' not found for user {user.name}")
+            return None
+        return Path(blob_path)
+
     # Get just the filename (e.g., "karan.jpg")
     photo_filename = Path(user.photo_path).name
     
@@ -90,14 +387,28 @@ async def verify_face(image_bytes: bytes, user_id: int, db: AsyncSession) -> boo
                     stored_path = Path(found_path)
                     break
         
-        if not stored_path:
-            return False
+    return stored_path
+
+def _verify_against_stored(
+    stored_path: Path,
+    image_bytes: bytes,
+    stored_encoding: Optional[np.ndarray] = None,
+    second_frame: Optional[bytes] = None,
+    liveness: Optional[dict] = None,
+) -> Tuple[bool, Optional[float], Optional[tuple]]:
+    """Returns (passed, best distance, best face box); distance is None when no comparison could be made.
 
-    # Get encoding from stored image
-    stored_encoding = _read_and_encode_image(stored_path)
+    Liveness results (when enabled) are written into the liveness dict.
+    """
+    import cv2
+    import numpy as np
+
+    # Get encoding from stored image (unless the template store already had it)
+    if stored_encoding is None:
+        stored_encoding = _read_and_encode_image(stored_path)
     if stored_encoding is None:
         print("[Face Verify] Could not extract face from stored image")
-        return False
+        return False, None, None
 
     # Process uploaded image
     try:
@@ -106,7 +417,7 @@ async def verify_face(image_bytes: bytes, user_id: int, db: AsyncSession) -> boo
         
         if live_img is None:
             print("[Face Verify] Failed to decode uploaded image")
-            return False
+            return False, None, None
             
         print(f"[Face Verify] Uploaded image size: {live_img.shape}")
         
@@ -114,66 +425,64 @@ async def verify_face(image_bytes: bytes, user_id: int, db: AsyncSession) -> boo
         gray = cv2.cvtColor(live_img, cv2.COLOR_BGR2GRAY)
         
         # Better face detection for live image
-        face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + "haarcascade_frontalface_default.xml")
-        faces = face_cascade.detectMultiScale(
-            gray, 
-            scaleFactor=1.05,
-            minNeighbors=3,
-            minSize=(30, 30),
-            maxSize=(300, 300)
-        )
+        faces = detect_faces(gray)
 
         print(f"[Face Verify] Detected {len(faces)} faces in uploaded image")
 
         if len(faces) == 0:
             print("[Face Verify] No face found in uploaded image")
-            return False
+            return False, None, None
 
         # Try matching with each detected face (in case multiple people)
         best_distance = float('inf')
         best_face_info = None
+        best_face_box = None
         
         for i, (x, y, w, h) in enumerate(faces):
             face_size = w * h
             print(f"[Face Verify] Testing face {i+1}: ({x},{y}) size {w}x{h} (area: {face_size})")
             
-            live_face = gray[y:y+h, x:x+w]
-            face_resized = cv2.resize(live_face, (100, 100))
-            
             # Apply same normalization as stored image
-            face_normalized = cv2.equalizeHist(face_resized)
-            live_encoding = face_normalized.flatten()
+            live_encoding = encode_face(gray, (x, y, w, h))
 
             # Calculate distance
-            distance = np.linalg.norm(stored_encoding - live_encoding)
+            distance = template_distance(stored_encoding, live_encoding)
             print(f"[Face Verify] Face {i+1} distance: {distance:.2f}")
             
             if distance < best_distance:
                 best_distance = distance
                 best_face_info = f"face {i+1} (size: {w}x{h})"
+                best_face_box = (int(x), int(y), int(w), int(h))
 
-        # Use dynamic threshold based on image conditions
-        base_threshold = 15000
-        
         # Adjust threshold based on number of faces (crowded scenes need more leniency)
+        threshold = match_threshold(len(faces))
         if len(faces) > 2:
-            threshold = base_threshold * 1.5  # 22500 for crowded scenes
             print(f"[Face Verify] Multiple faces detected, using lenient threshold")
-        elif len(faces) == 2:
-            threshold = base_threshold * 1.2  # 18000 for two faces
-        else:
-            threshold = base_threshold  # 15000 for single face
         
         print(f"[Face Verify] Best match: {best_face_info}")
         print(f"[Face Verify] Best distance: {best_distance:.2f}, Threshold: {threshold}")
         
         verification_passed = best_distance < threshold
+
+        # 🛡 Passive liveness on the matched face, reusing this decode/detection pass
+        if verification_passed and LIVENESS_MODE != "off" and liveness is not None:
+            second_gray = None
+            if second_frame:
+                second_gray = cv2.imdecode(np.frombuffer(second_frame, np.uint8), cv2.IMREAD_GRAYSCALE)
+                if second_gray is not None and second_gray.shape != gray.shape:
+                    second_gray = None
+            liveness.update(check_liveness(live_img, gray, best_face_box, second_gray))
+            print(f"[Liveness] {'✅ live' if liveness['live'] else '❌ spoof suspected'} "
+                  f"{liveness['scores']} failed={liveness['failed']} ({liveness['elapsed_ms']} ms)")
+            if not liveness["live"] and LIVENESS_MODE == "enforce":
+                verification_passed = False
+
         print(f"[Face Verify] Verification: {'✅ PASSED' if verification_passed else '❌ FAILED'}")
 
-        return verification_passed
+        return verification_passed, float(best_distance), best_face_box
         
     except Exception as e:
         print(f"[Face Verify] Error processing uploaded image: {e}")
         import traceback
         traceback.print_exc()
-        return False
\ No newline at end of file
+        return False, None, None
\ No newline at end of file
@@ -0,0 +1,248 @@
+import time
+import asyncio
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from fastapi import HTTPException
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import delete, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.future import select
+
+from app.config import (
+    IDEMPOTENCY_TTL_SECONDS,
+    IDEMPOTENCY_MAX_ENTRIES,
+    IDEMPOTENCY_BACKEND,
+    IDEMPOTENCY_LEASE_SECONDS,
+    IDEMPOTENCY_WAIT_SECONDS,
+)
+from app.database import SessionLocal
+from app.models.idempotency_key import IdempotencyKey
+from app.services import jobs
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+
+# How often a duplicate polls the shared store while another worker handles the original
+POLL_SECONDS = 0.2
+
+CacheKey = Tuple[int, str, str]
+
+# Fast path in front of the shared store (or the whole store with IDEMPOTENCY_BACKEND=memory):
+# (user_id, scope, key) -> (expires_at, result or HTTPException)
+_results: "OrderedDict[CacheKey, Tuple[float, Any]]" = OrderedDict()
+
+# Requests currently executing in this process, so concurrent duplicates wait instead of re-running
+_in_flight: Dict[CacheKey, asyncio.Future] = {}
+
+
+def _lookup(cache_key: CacheKey) -> Optional[Tuple[float, Any]]:
+    entry = _results.get(cache_key)
+    if entry is None:
+        return None
+    if entry[0] < time.monotonic():
+        del _results[cache_key]
+        return None
+    return entry
+
+
+def _store(cache_key: CacheKey, outcome: Any) -> None:
+    _results[cache_key] = (time.monotonic() + IDEMPOTENCY_TTL_SECONDS, outcome)
+    _results.move_to_end(cache_key)
+    while len(_results) > IDEMPOTENCY_MAX_ENTRIES:
+        _results.popitem(last=False)
+
+
+def _replay(outcome: Any) -> Any:
+    if isinstance(outcome, HTTPException):
+        raise HTTPException(status_code=outcome.status_code, detail=outcome.detail, headers=outcome.headers)
+    return outcome
+
+
+def _remembered(outcome: Any) -> bool:
+    """Results and client errors (4xx other than 429) are replayed; other errors run again"""
+    if isinstance(outcome, HTTPException):
+        return 400 <= outcome.status_code < 500 and outcome.status_code != 429
+    return True
+
+
+def _shared() -> bool:
+    return IDEMPOTENCY_BACKEND == "database"
+
+
+def _key_filter(cache_key: CacheKey):
+    user_id, scope, key = cache_key
+    return (IdempotencyKey.user_id == user_id, IdempotencyKey.scope == scope, IdempotencyKey.key == key)
+
+
+def _outcome_from_row(row: IdempotencyKey) -> Any:
+    if row.status_code is not None and row.status_code >= 400:
+        return HTTPException(status_code=row.status_code, detail=row.body, headers=row.headers)
+    return row.body
+
+
+async def _claim(cache_key: CacheKey) -> Tuple[bool, Optional[IdempotencyKey]]:
+    """Insert a pending row for the key: (True, None) if this request owns it now,
+    else (False, the existing row or None if it vanished meanwhile)"""
+    user_id, scope, key = cache_key
+    now = datetime.utcnow()
+    async with SessionLocal() as db:
+        # A finished entry past its TTL, or a claim abandoned by a dead worker, is free again
+        await db.execute(delete(IdempotencyKey).where(*_key_filter(cache_key), IdempotencyKey.expires_at < now))
+        db.add(IdempotencyKey(
+            user_id=user_id,
+            scope=scope,
+            key=key,
+            status="pending",
+            expires_at=now + timedelta(seconds=IDEMPOTENCY_LEASE_SECONDS),
+        ))
+        try:
+            await db.commit()
+            return True, None
+        except IntegrityError:
+            await db.rollback()
+        result = await db.execute(select(IdempotencyKey).where(*_key_filter(cache_key)))
+        return False, result.scalar_one_or_none()
+
+
+async def _claim_or_wait(cache_key: CacheKey) -> Optional[Any]:
+    """None once this request owns the key; otherwise the outcome another worker stored"""
+    deadline = time.monotonic() + IDEMPOTENCY_WAIT_SECONDS
+    while True:
+        claimed, row = await _claim(cache_key)
+        if claimed:
+            return None
+        if row is not None and row.status == "done":
+            return _outcome_from_row(row)
+        if time.monotonic() > deadline:
+            raise HTTPException(
+                status_code=409,
+                detail="A request with this Idempotency-Key is still being processed",
+                headers={"Retry-After": "5"},
+            )
+        await asyncio.sleep(POLL_SECONDS)
+
+
+async def _release(cache_key: CacheKey) -> None:
+    """Free the key so a retry runs again"""
+    async with SessionLocal() as db:
+        await db.execute(delete(IdempotencyKey).where(*_key_filter(cache_key)))
+        await db.commit()
+
+
+async def _finish(cache_key: CacheKey, outcome: Any) -> None:
+    """Publish a remembered outcome to other workers, or release the key"""
+    if not _remembered(outcome):
+        await _release(cache_key)
+        return
+    if isinstance(outcome, HTTPException):
+        values = {"status_code": outcome.status_code, "body": jsonable_encoder(outcome.detail),
+                  "headers": outcome.headers}
+    else:
+        values = {"status_code": 200, "body": jsonable_encoder(outcome), "headers": None}
+    async with SessionLocal() as db:
+        await db.execute(
+            update(IdempotencyKey)
+            .where(*_key_filter(cache_key))
+            .values(status="done", expires_at=datetime.utcnow() + timedelta(seconds=IDEMPOTENCY_TTL_SECONDS),
+                    **values)
+        )
+        await db.commit()
+
+
+async def is_replay(user_id: int, scope: str, key: Optional[str]) -> bool:
+    """True if a replay would be answered from cache or coalesced (lets callers skip quota charges)"""
+    if not key:
+        return False
+    cache_key = (user_id, scope, key)
+    if _lookup(cache_key) is not None or cache_key in _in_flight:
+        return True
+    if not _shared():
+        return False
+    async with SessionLocal() as db:
+        result = await db.execute(
+            select(IdempotencyKey.id)
+            .where(*_key_filter(cache_key), IdempotencyKey.expires_at >= datetime.utcnow())
+        )
+        return result.first() is not None
+
+
+async def run(user_id: int, scope: str, key: Optional[str], handler: Callable[[], Awaitable[Any]]) -> Any:
+    """Run handler once per (user, scope, key) and replay its outcome for retries.
+
+    Successful results and client errors (4xx other than 429) are remembered for
+    IDEMPOTENCY_TTL_SECONDS; server errors and throttling are not, so retries
+    after those run again. With the database backend the key is claimed in
+    idempotency_keys first, so a retry that lands on another worker waits for
+    (and replays) the original instead of running it twice; this process's
+    cache and in-flight futures only save that round trip.
+    """
+    if not key:
+        return await handler()
+
+    cache_key = (user_id, scope, key)
+
+    entry = _lookup(cache_key)
+    if entry is not None:
+        print(f"[Idempotency] Replaying {scope} result for user {user_id}")
+        return _replay(entry[1])
+
+    pending = _in_flight.get(cache_key)
+    if pending is not None:
+        print(f"[Idempotency] Waiting for in-flight {scope} for user {user_id}")
+        return _replay(await asyncio.shield(pending))
+
+    future = asyncio.get_running_loop().create_future()
+    _in_flight[cache_key] = future
+    claimed = False
+    try:
+        stored = await _claim_or_wait(cache_key) if _shared() else None
+        if stored is not None:
+            print(f"[Idempotency] Replaying {scope} result for user {user_id} from the shared store")
+            outcome = stored
+        else:
+            claimed = _shared()
+            try:
+                outcome = await handler()
+            except HTTPException as e:
+                outcome = e
+            if claimed:
+                await _finish(cache_key, outcome)
+                claimed = False
+        if _remembered(outcome):
+            _store(cache_key, outcome)
+        future.set_result(outcome)
+    except HTTPException as e:
+        future.set_result(e)
+        raise
+    except BaseException:
+        if claimed:
+            try:
+                await _release(cache_key)
+            except Exception as e:
+                print(f"[Idempotency] ⚠️ Could not release {scope} key for user {user_id}: {e}")
+        future.set_exception(HTTPException(status_code=500, detail="Original request failed, please retry"))
+        # Nobody may be waiting; mark the exception as retrieved to avoid asyncio warnings
+        future.exception()
+        raise
+    finally:
+        _in_flight.pop(cache_key, None)
+
+    if isinstance(outcome, HTTPException):
+        raise outcome
+    return outcome
+
+
+async def ensure_purge_scheduled() -> None:
+    """Make sure one idempotency.purge job is queued (it reschedules itself hourly)"""
+    if not _shared():
+        return
+    await jobs.ensure_periodic("idempotency.purge")
+
+
+async def purge_expired() -> int:
+    """Drop finished entries past their replay window (and abandoned claims)"""
+    async with SessionLocal() as db:
+        result = await db.execute(delete(IdempotencyKey).where(IdempotencyKey.expires_at < datetime.utcnow()))
+        await db.commit()
+        return result.rowcount or 0
@@ -0,0 +1,148 @@
+from datetime import date, datetime, timedelta
+from app.config import ABSENCE_RECOMPUTE_MINUTES, EXPORT_JOB_TIMEOUT_SECONDS
+from app.database import SessionLocal, pick_read_sessionmaker
+from app.services.jobs import job_handler, enqueue
+
+# Handlers for deferred work. Anything that doesn't have to happen before the
+# client gets its response belongs here instead of in the route.
+
+@job_handler("attendance.marked")
+async def on_attendance_marked(payload: dict) -> None:
+    from app.services import absence
+
+    print(
+        f"[Audit] Attendance #{payload['attendance_id']} marked by user {payload['user_id']} "
+        f"at {payload.get('location')} (battery {payload.get('battery_level')}%)"
+    )
+
+    # A (late) check-in only changes this user's row for the day
+    day = date.fromisoformat(payload["day"]) if payload.get("day") else datetime.utcnow().date()
+    async with SessionLocal() as db:
+        await absence.compute_day(db, day, user_id=payload["user_id"])
+        await db.commit()
+
+
+@job_handler("absence.compute")
+async def compute_absences(payload: dict) -> None:
+    """Recompute roster outcomes; without a day, refreshes yesterday and today, then reschedules"""
+    from app.services import absence
+
+    if payload.get("day"):
+        days = [date.fromisoformat(payload["day"])]
+    else:
+        today = datetime.utcnow().date()
+        days = [today - timedelta(days=1), today]
+
+    async with SessionLocal() as db:
+        for day in days:
+            written = await absence.compute_day(db, day, organization_id=payload.get("organization_id"))
+            print(f"[Absence] {day}: {written} rostered users evaluated")
+        if not payload.get("day"):
+            enqueue(db, "absence.compute", {}, delay_seconds=ABSENCE_RECOMPUTE_MINUTES * 60)
+        await db.commit()
+
+
+@job_handler("audit.retention")
+async def purge_audit_photos(payload: dict) -> None:
+    from app.services import audit_capture
+
+    await audit_capture.purge_expired()
+
+    # Run again tomorrow
+    async with SessionLocal() as db:
+        enqueue(db, "audit.retention", {}, delay_seconds=24 * 3600)
+        await db.commit()
+
+
+@job_handler("idempotency.purge")
+async def purge_idempotency_keys(payload: dict) -> None:
+    from app.services import idempotency
+
+    purged = await idempotency.purge_expired()
+    print(f"[Idempotency] Purged {purged} expired keys")
+
+    # Run again in an hour
+    async with SessionLocal() as db:
+        enqueue(db, "idempotency.purge", {}, delay_seconds=3600)
+        await db.commit()
+
+
+@job_handler("templates.enroll")
+async def enroll_templates(payload: dict) -> None:
+    """Encode the enrolled photos of payload["user_ids"] into the shared template store"""
+    import asyncio
+    from sqlalchemy.future import select
+    from app.models.user import User
+    from app.services import template_store
+    from app.services.face_recognition import (
+        TEMPLATE_PIPELINE_VERSION,
+        _find_stored_photo,
+        _read_and_encode_image,
+        template_version_for,
+    )
+
+    async with SessionLocal() as db:
+        result = await db.execute(select(User).where(User.id.in_(payload["user_ids"])))
+        users = result.scalars().all()
+
+    upserts, removals = {}, []
+    for user in users:
+        stored_path = await _find_stored_photo(user) if user.photo_path else None
+        encoding = await asyncio.to_thread(_read_and_encode_image, stored_path) if stored_path else None
+        if encoding is None:
+            removals.append(user.id)
+            continue
+        upserts[user.id] = (template_version_for(user.photo_path, stored_path), encoding)
+
+    # Users deleted before the job ran
+    removals.extend(set(payload["user_ids"]) - {user.id for user in users})
+    if upserts or removals:
+        path = template_store.store_path(TEMPLATE_PIPELINE_VERSION)
+        await asyncio.to_thread(template_store.apply_changes, upserts, removals, path)
+
+
+@job_handler("templates.remove")
+async def remove_templates(payload: dict) -> None:
+    import asyncio
+    from app.services import template_store
+    from app.services.face_recognition import TEMPLATE_PIPELINE_VERSION
+
+    # Every pipeline version's file: a removed user must not match on old code either
+    for version in template_store.stored_versions() or [TEMPLATE_PIPELINE_VERSION]:
+        path = template_store.store_path(version)
+        await asyncio.to_thread(template_store.apply_changes, {}, payload["user_ids"], path)
+
+
+# Large exports run for minutes; they get their own (long) limit instead of JOB_TIMEOUT_SECONDS
+@job_handler("export.attendance", timeout=EXPORT_JOB_TIMEOUT_SECONDS)
+async def export_attendance(payload: dict) -> None:
+    from app.services import exports
+
+    from app.models.organization import DEFAULT_ORGANIZATION_ID
+
+    # Exports queued before tenancy carry no organization
+    organization_id = payload.get("organization_id", DEFAULT_ORGANIZATION_ID)
+    session_factory = await pick_read_sessionmaker()
+    async with session_factory() as db:
+        await exports.write_export(
+            db,
+            organization_id,
+            payload["format"],
+            exports.artifact_path(payload["export_id"], payload["format"], organization_id),
+            start=date.fromisoformat(payload["start"]) if payload.get("start") else None,
+            end=date.fromisoformat(payload["end"]) if payload.get("end") else None,
+            user_id=payload.get("user_id"),
+        )
+    print(f"[Exports] ✅ Export {payload['export_id']} ({payload['format']}) ready")
+
+
+@job_handler("export.retention")
+async def purge_exports(payload: dict) -> None:
+    from app.services import exports
+
+    await exports.purge_expired()
+
+    # Run again in an hour
+    async with SessionLocal() as db:
+        enqueue(db, "export.retention", {}, delay_seconds=3600)
+        await db.commit()
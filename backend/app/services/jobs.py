@@ -0,0 +1,259 @@
+import asyncio
+import traceback
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, Optional
+
+from sqlalchemy import and_, delete, event, or_, text, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from app.config import (
+    JOB_CONCURRENCY,
+    JOB_POLL_SECONDS,
+    JOB_LOCK_TIMEOUT_SECONDS,
+    JOB_TIMEOUT_SECONDS,
+    JOB_RETRY_BASE_SECONDS,
+    JOB_MAX_ATTEMPTS,
+)
+from app.database import SessionLocal, engine
+from app.models.job import Job
+
+JobHandler = Callable[[dict], Awaitable[None]]
+
+_handlers: Dict[str, JobHandler] = {}
+
+# kind -> seconds a single run may take (None: no limit); JOB_TIMEOUT_SECONDS otherwise
+_timeouts: Dict[str, Optional[float]] = {}
+
+_DEFAULT_TIMEOUT = object()
+
+# Set when new jobs are committed in this process, so the local worker picks them up immediately
+_wakeup: Optional[asyncio.Event] = None
+
+
+def job_handler(kind: str, timeout=_DEFAULT_TIMEOUT):
+    """Register an async handler for a job kind: @job_handler("attendance.marked").
+
+    timeout overrides JOB_TIMEOUT_SECONDS for this kind (None = run until done).
+    """
+    def decorator(fn: JobHandler) -> JobHandler:
+        _handlers[kind] = fn
+        if timeout is not _DEFAULT_TIMEOUT:
+            _timeouts[kind] = timeout
+        return fn
+    return decorator
+
+
+def _wake() -> None:
+    if _wakeup is not None:
+        _wakeup.set()
+
+
+def _on_commit(session) -> None:
+    if session.info.pop("jobs_enqueued", False):
+        _wake()
+
+
+def _on_rollback(session) -> None:
+    # The jobs were rolled back with the rest of the transaction: nothing to wake for
+    session.info.pop("jobs_enqueued", None)
+
+
+def _wake_after_commit(db: AsyncSession) -> None:
+    """Wake the local worker once the caller's transaction commits.
+
+    The two listeners are attached once per session and only act on a flag in
+    session.info, so enqueueing many jobs (or rolling back) never piles up listeners.
+    """
+    session = db.sync_session
+    session.info["jobs_enqueued"] = True
+    if not session.info.get("jobs_listening"):
+        session.info["jobs_listening"] = True
+        event.listen(session, "after_commit", _on_commit)
+        event.listen(session, "after_rollback", _on_rollback)
+
+
+def enqueue(
+    db: AsyncSession,
+    kind: str,
+    payload: dict,
+    max_attempts: int = JOB_MAX_ATTEMPTS,
+    delay_seconds: float = 0,
+    organization_id: Optional[int] = None,
+) -> Job:
+    """Add a job to the caller's transaction.
+
+    The job is committed atomically with the caller's own writes, so it can't be
+    lost between "row saved" and "work scheduled" (or run for a rolled-back row).
+    Only kinds with a registered handler can be enqueued. organization_id scopes
+    the job to a tenant (its admins see it in the dead-letter list).
+    """
+    if kind not in _handlers:
+        from app.services import job_handlers  # noqa: F401  (registers handlers)
+        if kind not in _handlers:
+            raise ValueError(f"No handler registered for job kind '{kind}'")
+
+    job = Job(
+        kind=kind,
+        payload=payload,
+        organization_id=organization_id,
+        max_attempts=max_attempts,
+        run_after=datetime.utcnow() + timedelta(seconds=delay_seconds),
+    )
+    db.add(job)
+    _wake_after_commit(db)
+    return job
+
+
+async def ensure_periodic(kind: str) -> None:
+    """Make sure exactly one self-rescheduling job of this kind is queued.
+
+    The periodic job is the one with an empty payload; one-off runs of the same
+    kind (absence.compute for a given day) don't count. Every API worker calls
+    this from its lifespan, so on Postgres the check-then-insert holds a
+    per-kind advisory lock until commit: concurrent startups add one job, not
+    one each.
+    """
+    async with SessionLocal() as db:
+        if engine.dialect.name == "postgresql":
+            await db.execute(text("SELECT pg_advisory_xact_lock(hashtext(:key))"), {"key": f"jobs.periodic:{kind}"})
+        result = await db.execute(
+            select(Job.payload).where(Job.kind == kind, Job.status.in_(["pending", "running"]))
+        )
+        if any(not payload for payload in result.scalars()):
+            return
+        enqueue(db, kind, {})
+        await db.commit()
+
+
+class JobWorker:
+    """Claims due jobs from Postgres and runs them with retries and dead-lettering.
+
+    Runs inside the API process (JOB_WORKER_MODE=inprocess) or as a separate
+    process via app/scripts/run_job_worker.py; any number can run at once
+    because claims use SELECT ... FOR UPDATE SKIP LOCKED.
+    """
+
+    def __init__(self, concurrency: int = JOB_CONCURRENCY, poll_seconds: float = JOB_POLL_SECONDS):
+        self.concurrency = concurrency
+        self.poll_seconds = poll_seconds
+        self._stopping = False
+
+    async def run(self) -> None:
+        global _wakeup
+        _wakeup = asyncio.Event()
+        print(f"[Jobs] Worker started (concurrency {self.concurrency})")
+
+        while not self._stopping:
+            try:
+                claimed = await self._claim()
+            except Exception as e:
+                print(f"[Jobs] ❌ Claim failed: {e}")
+                claimed = []
+
+            if claimed:
+                await asyncio.gather(*(self._execute(*job) for job in claimed))
+                continue
+
+            _wakeup.clear()
+            try:
+                await asyncio.wait_for(_wakeup.wait(), timeout=self.poll_seconds)
+            except asyncio.TimeoutError:
+                pass
+
+        print("[Jobs] Worker stopped")
+
+    def stop(self) -> None:
+        self._stopping = True
+        _wake()
+
+    async def _claim(self):
+        now = datetime.utcnow()
+        stale = now - timedelta(seconds=JOB_LOCK_TIMEOUT_SECONDS)
+
+        async with SessionLocal() as db:
+            result = await db.execute(
+                select(Job)
+                .where(
+                    or_(
+                        and_(Job.status == "pending", Job.run_after <= now),
+                        # Jobs whose worker died mid-run
+                        and_(Job.status == "running", Job.locked_at < stale),
+                    )
+                )
+                .order_by(Job.run_after)
+                .limit(self.concurrency)
+                .with_for_update(skip_locked=True)
+            )
+            jobs = result.scalars().all()
+
+            claimed = []
+            for job in jobs:
+                job.status = "running"
+                job.locked_at = now
+                job.attempts += 1
+                claimed.append((job.id, job.kind, job.payload, job.attempts, job.max_attempts))
+            await db.commit()
+            return claimed
+
+    async def _heartbeat(self, job_id: int) -> None:
+        """Keep locked_at fresh so long jobs aren't mistaken for ones whose worker died"""
+        while True:
+            await asyncio.sleep(JOB_LOCK_TIMEOUT_SECONDS / 3)
+            try:
+                async with SessionLocal() as db:
+                    await db.execute(update(Job).where(Job.id == job_id).values(locked_at=datetime.utcnow()))
+                    await db.commit()
+            except Exception as e:
+                print(f"[Jobs] ⚠️ Heartbeat for #{job_id} failed: {e}")
+
+    async def _execute(self, job_id: int, kind: str, payload: dict, attempts: int, max_attempts: int) -> None:
+        handler = _handlers.get(kind)
+        heartbeat = asyncio.create_task(self._heartbeat(job_id))
+        try:
+            if handler is None:
+                raise LookupError(f"No handler registered for job kind '{kind}'")
+            await asyncio.wait_for(handler(payload), timeout=_timeouts.get(kind, JOB_TIMEOUT_SECONDS))
+        except Exception as e:
+            heartbeat.cancel()
+            error = f"{type(e).__name__}: {e}\n{traceback.format_exc(limit=5)}"
+            dead = handler is None or attempts >= max_attempts
+            values = {"status": "dead" if dead else "pending", "locked_at": None, "last_error": error}
+            if not dead:
+                # Exponential backoff: base, 2x, 4x, ... capped at one hour
+                backoff = min(JOB_RETRY_BASE_SECONDS * (2 ** (attempts - 1)), 3600)
+                values["run_after"] = datetime.utcnow() + timedelta(seconds=backoff)
+            print(f"[Jobs] ❌ {kind} #{job_id} attempt {attempts}/{max_attempts} failed: {e}"
+                  + (" (dead-lettered)" if dead else ""))
+            async with SessionLocal() as db:
+                await db.execute(update(Job).where(Job.id == job_id).values(**values))
+                await db.commit()
+            return
+        finally:
+            heartbeat.cancel()
+
+        async with SessionLocal() as db:
+            await db.execute(delete(Job).where(Job.id == job_id))
+            await db.commit()
+
+
+_worker: Optional[JobWorker] = None
+_worker_task: Optional[asyncio.Task] = None
+
+
+def start_worker() -> None:
+    global _worker, _worker_task
+    from app.services import job_handlers  # noqa: F401  (registers handlers)
+
+    _worker = JobWorker()
+    _worker_task = asyncio.create_task(_worker.run())
+
+
+async def stop_worker() -> None:
+    if _worker is None or _worker_task is None:
+        return
+    _worker.stop()
+    try:
+        await asyncio.wait_for(_worker_task, timeout=JOB_TIMEOUT_SECONDS)
+    except asyncio.TimeoutError:
+        _worker_task.cancel()
@@ -0,0 +1,198 @@
+import time
+import asyncio
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from fastapi import Depends, HTTPException, Request
+
+from app.config import (
+    RATE_LIMIT_ENABLED,
+    RATE_LIMIT_BACKEND,
+    REDIS_URL,
+    CV_MAX_CONCURRENCY,
+    CV_QUEUE_TIMEOUT_SECONDS,
+)
+from app.utils.auth import get_current_user
+from app.services import idempotency
+
+
+@dataclass(frozen=True)
+class Quota:
+    capacity: int            # burst size
+    refill_per_second: float # sustained rate
+
+
+# Route name -> (per-user quota, per-IP quota)
+ROUTE_QUOTAS: Dict[str, Tuple[Quota, Quota]] = {
+    # Face verification is CPU heavy: a few quick retries, then ~1 per 10s
+    "attendance_mark": (Quota(5, 1 / 10), Quota(30, 1)),
+    "debug_face": (Quota(3, 1 / 30), Quota(10, 1 / 5)),
+    # Location/battery pings are cheap but can be flooded by a stuck client
+    "activity": (Quota(20, 1 / 5), Quota(120, 2)),
+}
+
+
+class InMemoryBucketStore:
+    """Token buckets held in this worker process"""
+
+    def __init__(self, max_keys: int = 100_000):
+        self.buckets: Dict[str, Tuple[float, float]] = {}
+        self.max_keys = max_keys
+
+    async def take_all(self, buckets: List[Tuple[str, Quota]]) -> Tuple[float, int]:
+        """Consume one token from every bucket, or from none of them.
+
+        Returns (0, -1) if allowed, otherwise (seconds until a token is available,
+        index of the bucket that is empty).
+        """
+        now = time.monotonic()
+        refilled = []
+        for key, quota in buckets:
+            tokens, updated = self.buckets.get(key, (quota.capacity, now))
+            refilled.append(min(quota.capacity, tokens + (now - updated) * quota.refill_per_second))
+
+        for index, ((key, quota), tokens) in enumerate(zip(buckets, refilled)):
+            if tokens < 1:
+                return (1 - tokens) / quota.refill_per_second, index
+
+        for (key, _), tokens in zip(buckets, refilled):
+            self.buckets[key] = (tokens - 1, now)
+        if len(self.buckets) > self.max_keys:
+            self._prune(now)
+        return 0.0, -1
+
+    def _prune(self, now: float) -> None:
+        # Buckets idle for 10 minutes are full again, so forgetting them changes nothing
+        stale = [k for k, (_, updated) in self.buckets.items() if now - updated > 600]
+        for k in stale:
+            del self.buckets[k]
+
+
+class RedisBucketStore:
+    """Token buckets shared by all workers through a Redis-compatible server"""
+
+    # Atomic refill + take across all KEYS (ARGV: now, then capacity/rate per key).
+    # Returns {wait in milliseconds, 1-based index of the empty bucket} or {0, 0}.
+    SCRIPT = """
+    local now = tonumber(ARGV[1])
+    local refilled = {}
+    for i, key in ipairs(KEYS) do
+        local capacity = tonumber(ARGV[i * 2])
+        local rate = tonumber(ARGV[i * 2 + 1])
+        local state = redis.call('HMGET', key, 'tokens', 'updated')
+        local tokens = tonumber(state[1]) or capacity
+        local updated = tonumber(state[2]) or now
+        tokens = math.min(capacity, tokens + (now - updated) * rate)
+        if tokens < 1 then
+            return {math.ceil((1 - tokens) / rate * 1000), i}
+        end
+        refilled[i] = tokens
+    end
+    for i, key in ipairs(KEYS) do
+        local capacity = tonumber(ARGV[i * 2])
+        local rate = tonumber(ARGV[i * 2 + 1])
+        redis.call('HSET', key, 'tokens', refilled[i] - 1, 'updated', now)
+        redis.call('EXPIRE', key, math.ceil(capacity / rate) + 1)
+    end
+    return {0, 0}
+    """
+
+    def __init__(self, url: str):
+        try:
+            import redis.asyncio as redis
+        except ImportError:
+            raise RuntimeError("RATE_LIMIT_BACKEND=redis requires the 'redis' package")
+        self.client = redis.from_url(url)
+        self.script = self.client.register_script(self.SCRIPT)
+
+    async def take_all(self, buckets: List[Tuple[str, Quota]]) -> Tuple[float, int]:
+        args = [time.time()]
+        for _, quota in buckets:
+            args.extend([quota.capacity, quota.refill_per_second])
+        wait_ms, index = await self.script(keys=[f"ratelimit:{key}" for key, _ in buckets], args=args)
+        return int(wait_ms) / 1000, int(index) - 1
+
+
+_store = None
+
+
+def get_bucket_store():
+    global _store
+    if _store is None:
+        if RATE_LIMIT_BACKEND == "redis":
+            _store = RedisBucketStore(REDIS_URL)
+        else:
+            _store = InMemoryBucketStore()
+    return _store
+
+
+def _too_many_requests(wait: float) -> HTTPException:
+    return HTTPException(
+        status_code=429,
+        detail="Too many requests, please slow down",
+        headers={"Retry-After": str(max(1, int(wait + 0.999)))},
+    )
+
+
+def rate_limit(route: str):
+    """Dependency enforcing ROUTE_QUOTAS[route] per user and per client IP.
+
+    Runs before the route body, so rejected requests never reach image decoding.
+    """
+    user_quota, ip_quota = ROUTE_QUOTAS[route]
+
+    async def dependency(request: Request, current_user=Depends(get_current_user)):
+        if not RATE_LIMIT_ENABLED:
+            return
+        # Replays of an idempotent request are answered from cache, so they are free
+        if await idempotency.is_replay(current_user.id, route, request.headers.get(idempotency.IDEMPOTENCY_HEADER)):
+            return
+        store = get_bucket_store()
+        ip = request.client.host if request.client else "unknown"
+
+        # Both buckets are checked before either is charged, so a request
+        # rejected by its user quota doesn't use up the shared IP quota
+        wait, empty = await store.take_all([
+            (f"{route}:ip:{ip}", ip_quota),
+            (f"{route}:user:{current_user.id}", user_quota),
+        ])
+        if wait:
+            if empty == 0:
+                print(f"[Rate Limit] ❌ {route} over IP quota for {ip}")
+            else:
+                print(f"[Rate Limit] ❌ {route} over user quota for {current_user.email}")
+            raise _too_many_requests(wait)
+
+    return dependency
+
+
+# ---------- CV admission control ----------
+_cv_semaphore: Optional[asyncio.Semaphore] = None
+
+
+@asynccontextmanager
+async def cv_slot():
+    """Cap concurrent face verifications per worker; shed load with 503 instead of queueing forever.
+
+    The semaphore is per worker process: CV_MAX_CONCURRENCY defaults to
+    CV_HOST_CONCURRENCY // WEB_CONCURRENCY so all workers together stay at the host cap.
+    """
+    global _cv_semaphore
+    if _cv_semaphore is None:
+        _cv_semaphore = asyncio.Semaphore(CV_MAX_CONCURRENCY)
+
+    try:
+        await asyncio.wait_for(_cv_semaphore.acquire(), timeout=CV_QUEUE_TIMEOUT_SECONDS)
+    except asyncio.TimeoutError:
+        print("[Rate Limit] ❌ CV workers saturated, rejecting request")
+        raise HTTPException(
+            status_code=503,
+            detail="Server busy, please retry shortly",
+            headers={"Retry-After": "2"},
+        )
+
+    try:
+        yield
+    finally:
+        _cv_semaphore.release()
@@ -0,0 +1,230 @@
+import os
+import re
+import asyncio
+import hashlib
+from abc import ABC, abstractmethod
+from typing import Optional
+
+from app.config import (
+    STORAGE_BACKEND,
+    STORAGE_ROOT,
+    STORAGE_CACHE_DIR,
+    S3_ENDPOINT_URL,
+    S3_BUCKET,
+    S3_ACCESS_KEY,
+    S3_SECRET_KEY,
+    S3_REGION,
+)
+
+MEDIA_URL_PREFIX = "/media"
+
+# "ab/cd/<64 hex sha256><.ext>": keys reach the filesystem from unauthenticated
+# /media URLs, so anything else (dots, slashes, uppercase) is rejected outright
+_BLOB_KEY = re.compile(r"([0-9a-f]{2})/([0-9a-f]{2})/([0-9a-f]{64})(\.\w+)?")
+
+
+def blob_key_for_bytes(data: bytes, ext: str = ".jpg") -> str:
+    """Content-addressed key sharded two levels deep: "ab/cd/abcd...ef.jpg"."""
+    digest = hashlib.sha256(data).hexdigest()
+    return f"{digest[:2]}/{digest[2:4]}/{digest}{ext}"
+
+
+def is_blob_key(value: Optional[str]) -> bool:
+    """True for keys produced by blob_key_for_bytes (legacy rows hold plain file paths)."""
+    if not value:
+        return False
+    match = _BLOB_KEY.fullmatch(value)
+    return match is not None and match.group(3).startswith(match.group(1) + match.group(2))
+
+
+def media_url(key: Optional[str]) -> Optional[str]:
+    if not key:
+        return None
+    return f"{MEDIA_URL_PREFIX}/{key}"
+
+
+def _atomic_write(path: str, data: bytes) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp-{os.getpid()}-{id(data)}"
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def _read_file(path: str) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
+
+
+class BlobStore(ABC):
+    """Content-addressed, write-once photo storage.
+
+    Keys never change meaning once written, so writes are idempotent and
+    identical uploads are stored only once.
+    """
+
+    @abstractmethod
+    async def put(self, data: bytes, ext: str = ".jpg") -> str:
+        ...
+
+    @abstractmethod
+    async def get(self, key: str) -> bytes:
+        ...
+
+    @abstractmethod
+    async def exists(self, key: str) -> bool:
+        ...
+
+    @abstractmethod
+    async def delete(self, key: str) -> None:
+        ...
+
+    @abstractmethod
+    async def local_path(self, key: str) -> Optional[str]:
+        """Path of a local copy of the blob, for libraries that need a filename (cv2)."""
+
+
+class LocalBlobStore(BlobStore):
+    def __init__(self, root: str):
+        self.root = root
+        os.makedirs(self.root, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        if not is_blob_key(key):
+            raise ValueError(f"Invalid blob key '{key}'")
+        root = os.path.realpath(self.root)
+        path = os.path.realpath(os.path.join(root, *key.split("/")))
+        # Belt and braces on top of the key format: never resolve outside the store
+        if os.path.commonpath([root, path]) != root:
+            raise ValueError(f"Blob key '{key}' escapes the store root")
+        return path
+
+    async def put(self, data: bytes, ext: str = ".jpg") -> str:
+        key = blob_key_for_bytes(data, ext)
+        path = self._path(key)
+        if not os.path.exists(path):
+            await asyncio.to_thread(_atomic_write, path, data)
+            print(f"[Storage] ✅ Stored blob {key}")
+        else:
+            print(f"[Storage] Blob {key} already stored (dedup)")
+        return key
+
+    async def get(self, key: str) -> bytes:
+        return await asyncio.to_thread(_read_file, self._path(key))
+
+    async def exists(self, key: str) -> bool:
+        return os.path.exists(self._path(key))
+
+    async def delete(self, key: str) -> None:
+        path = self._path(key)
+        if os.path.exists(path):
+            await asyncio.to_thread(os.remove, path)
+
+    async def local_path(self, key: str) -> Optional[str]:
+        path = self._path(key)
+        return path if os.path.exists(path) else None
+
+
+class S3BlobStore(BlobStore):
+    """S3-compatible backend (AWS, MinIO, ...) with a local read-through cache."""
+
+    def __init__(
+        self,
+        bucket: str,
+        endpoint_url: Optional[str] = None,
+        access_key: Optional[str] = None,
+        secret_key: Optional[str] = None,
+        region: Optional[str] = None,
+        cache_dir: str = STORAGE_CACHE_DIR,
+        client=None,
+    ):
+        """client: an already configured boto3 S3 client (tests pass a stand-in)"""
+        if client is None:
+            try:
+                import boto3
+            except ImportError:
+                raise RuntimeError("STORAGE_BACKEND=s3 requires the 'boto3' package")
+            client = boto3.client(
+                "s3",
+                endpoint_url=endpoint_url,
+                aws_access_key_id=access_key,
+                aws_secret_access_key=secret_key,
+                region_name=region,
+            )
+
+        self.bucket = bucket
+        self.client = client
+        self.cache = LocalBlobStore(cache_dir)
+
+    def _head(self, key: str) -> bool:
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=key)
+            return True
+        except self.client.exceptions.ClientError:
+            return False
+
+    def _download(self, key: str) -> bytes:
+        return self.client.get_object(Bucket=self.bucket, Key=key)["Body"].read()
+
+    async def put(self, data: bytes, ext: str = ".jpg") -> str:
+        key = blob_key_for_bytes(data, ext)
+        if not await asyncio.to_thread(self._head, key):
+            # Single PUT is atomic on S3: readers see either nothing or the whole object
+            await asyncio.to_thread(
+                self.client.put_object, Bucket=self.bucket, Key=key, Body=data
+            )
+            print(f"[Storage] ✅ Uploaded blob {key} to s3://{self.bucket}")
+        await asyncio.to_thread(_atomic_write, self.cache._path(key), data)
+        return key
+
+    async def get(self, key: str) -> bytes:
+        if await self.cache.exists(key):
+            return await self.cache.get(key)
+        data = await asyncio.to_thread(self._download, key)
+        await asyncio.to_thread(_atomic_write, self.cache._path(key), data)
+        return data
+
+    async def exists(self, key: str) -> bool:
+        if await self.cache.exists(key):
+            return True
+        return await asyncio.to_thread(self._head, key)
+
+    async def delete(self, key: str) -> None:
+        await asyncio.to_thread(self.client.delete_object, Bucket=self.bucket, Key=key)
+        await self.cache.delete(key)
+
+    async def local_path(self, key: str) -> Optional[str]:
+        path = await self.cache.local_path(key)
+        if path:
+            return path
+        try:
+            await self.get(key)
+        except Exception as e:
+            print(f"[Storage] Could not fetch blob {key}: {e}")
+            return None
+        return await self.cache.local_path(key)
+
+
+_store: Optional[BlobStore] = None
+
+
+def get_blob_store() -> BlobStore:
+    global _store
+    if _store is None:
+        if STORAGE_BACKEND == "s3":
+            _store = S3BlobStore(
+                bucket=S3_BUCKET,
+                endpoint_url=S3_ENDPOINT_URL,
+                access_key=S3_ACCESS_KEY,
+                secret_key=S3_SECRET_KEY,
+                region=S3_REGION,
+            )
+        else:
+            _store = LocalBlobStore(STORAGE_ROOT)
+    return _store
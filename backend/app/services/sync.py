@@ -0,0 +1,58 @@
+from typing import List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from app.models.sync_tombstone import SyncTombstone
+
+# Every transaction id below this has finished (committed or rolled back), so
+# no row stamped with a lower change_seq can still appear. It is the next token.
+_WATERMARK_QUERY = text("SELECT pg_snapshot_xmin(pg_current_snapshot())::text::bigint")
+
+
+async def current_token(db: AsyncSession) -> int:
+    return (await db.execute(_WATERMARK_QUERY)).scalar()
+
+
+def changed_since(query, model, since: Optional[int]):
+    """Restrict a select to rows inserted/updated at or after the client's token.
+
+    ">=" rather than ">": the transaction at the watermark itself may have been
+    in flight when the token was issued, so its rows are sent again (clients
+    upsert by id, so repeats are harmless).
+    """
+    if since is None:
+        return query
+    return query.where(model.change_seq >= since)
+
+
+async def deleted_since(
+    db: AsyncSession,
+    table_name: str,
+    since: Optional[int],
+    organization_id: int,
+    user_id: Optional[int] = None,
+) -> List[int]:
+    """Ids deleted from table_name since the token (always empty for a full sync)"""
+    if since is None:
+        return []
+    query = select(SyncTombstone.row_id).where(
+        SyncTombstone.organization_id == organization_id,
+        SyncTombstone.table_name == table_name,
+        SyncTombstone.change_seq >= since,
+    )
+    if user_id is not None:
+        query = query.where(SyncTombstone.user_id == user_id)
+    result = await db.execute(query)
+    return sorted(set(result.scalars().all()))
+
+
+def sync_page(token: int, since: Optional[int], upserts: list, deletes: List[int]) -> dict:
+    return {
+        "token": token,
+        # Full snapshot: the client should replace its cache rather than merge
+        "full": since is None,
+        "upserts": upserts,
+        "deletes": deletes,
+    }
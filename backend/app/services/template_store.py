@@ -0,0 +1,256 @@
+from __future__ import annotations
+
+import os
+import time
+import struct
+import hashlib
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, Optional, Tuple, TYPE_CHECKING
+
+from app.config import TEMPLATE_STORE_DIR, TEMPLATE_STORE_DTYPE, TEMPLATE_STORE_CHECK_SECONDS
+
+if TYPE_CHECKING:
+    import numpy as np
+
+# Fixed binary layout, shared read-only by every worker through the page cache:
+#
+#   header   64 bytes   magic, format version, dtype code, dim, count, generation
+#   id table count * 16 (user_id int64, template version hash uint64)
+#   padding  to a 64-byte boundary
+#   rows     count * dim * itemsize, contiguous, in id-table order
+#
+# Writers build a complete new file and os.replace() it over the old one, so
+# readers never see a partial store; a reader that still maps the old inode
+# keeps working until it notices the swap and remaps.
+MAGIC = b"FACETPL1"
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<8sIIIIQ32x")  # 64 bytes
+ID_ENTRY = struct.Struct("<qQ")
+TEMPLATE_DIM = 100 * 100  # see face_recognition._encode_largest_face
+
+_DTYPE_CODES = {"uint8": 1, "float32": 2}
+_DTYPE_NAMES = {code: name for name, code in _DTYPE_CODES.items()}
+
+
+def store_path(pipeline_version: str) -> str:
+    """One file per preprocessing pipeline version, so old and new templates can
+    coexist while a rebuild runs and workers roll over to the new code"""
+    return os.path.join(TEMPLATE_STORE_DIR, f"templates-{pipeline_version}.bin")
+
+
+def stored_versions() -> list:
+    """Pipeline versions that currently have a store file"""
+    if not os.path.isdir(TEMPLATE_STORE_DIR):
+        return []
+    return sorted(
+        name[len("templates-"):-len(".bin")]
+        for name in os.listdir(TEMPLATE_STORE_DIR)
+        if name.startswith("templates-") and name.endswith(".bin")
+    )
+
+
+def version_hash(template_version: str) -> int:
+    """64-bit digest of a template version string (changes when the enrolled photo does)"""
+    return int.from_bytes(hashlib.blake2b(template_version.encode(), digest_size=8).digest(), "little")
+
+
+def _rows_offset(count: int) -> int:
+    end = HEADER.size + count * ID_ENTRY.size
+    return (end + 63) // 64 * 64
+
+
+class TemplateStore:
+    """Read side: lazily memory-maps the store and remaps when the file is swapped"""
+
+    def __init__(self, path: str, check_seconds: float = TEMPLATE_STORE_CHECK_SECONDS):
+        self.path = path
+        self.check_seconds = check_seconds
+        self.generation = 0
+        self._rows = None
+        self._index: Dict[int, Tuple[int, int]] = {}
+        self._identity: Optional[Tuple[int, int]] = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def _maybe_reload(self) -> None:
+        now = time.monotonic()
+        if now - self._checked_at < self.check_seconds:
+            return
+        self._checked_at = now
+
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            self._rows, self._index, self._identity = None, {}, None
+            return
+
+        # A swap always produces a new inode, so this is all we need to stat
+        identity = (st.st_ino, st.st_mtime_ns)
+        if identity != self._identity:
+            self._load(identity)
+
+    def _load(self, identity: Tuple[int, int]) -> None:
+        import numpy as np
+
+        try:
+            with open(self.path, "rb") as f:
+                magic, fmt, dtype_code, dim, count, generation = HEADER.unpack(f.read(HEADER.size))
+                if magic != MAGIC or fmt != FORMAT_VERSION or dtype_code not in _DTYPE_NAMES:
+                    raise ValueError("unrecognised template store header")
+                id_table = f.read(count * ID_ENTRY.size)
+
+            index = {}
+            for row, (user_id, vhash) in enumerate(ID_ENTRY.iter_unpack(id_table)):
+                index[user_id] = (row, vhash)
+
+            rows = None
+            if count:
+                rows = np.memmap(
+                    self.path,
+                    dtype=_DTYPE_NAMES[dtype_code],
+                    mode="r",
+                    offset=_rows_offset(count),
+                    shape=(count, dim),
+                )
+        except Exception as e:
+            print(f"[Templates] ❌ Could not load {self.path}: {e}")
+            return
+
+        self._rows, self._index, self._identity, self.generation = rows, index, identity, generation
+        print(f"[Templates] Mapped generation {generation}: {count} templates ({_DTYPE_NAMES[dtype_code]})")
+
+    def get(self, user_id: int, template_version: str) -> Optional[np.ndarray]:
+        """The stored template row (a read-only view into the map), or None if missing/stale"""
+        with self._lock:
+            self._maybe_reload()
+            entry = self._index.get(user_id)
+            rows = self._rows
+        if entry is None or rows is None:
+            return None
+        row, vhash = entry
+        if vhash != version_hash(template_version):
+            return None
+        return rows[row]
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            self._maybe_reload()
+            return {
+                "path": self.path,
+                "generation": self.generation,
+                "templates": len(self._index),
+                "mapped_bytes": int(self._rows.nbytes) if self._rows is not None else 0,
+            }
+
+
+_stores: Dict[str, TemplateStore] = {}
+
+
+def get_template_store(pipeline_version: Optional[str] = None) -> TemplateStore:
+    """Store for a pipeline version (default: the one this code produces)"""
+    if pipeline_version is None:
+        from app.services.face_recognition import TEMPLATE_PIPELINE_VERSION
+        pipeline_version = TEMPLATE_PIPELINE_VERSION
+    if pipeline_version not in _stores:
+        _stores[pipeline_version] = TemplateStore(store_path(pipeline_version))
+    return _stores[pipeline_version]
+
+
+# ---------- Write side (job worker / scripts) ----------
+
+@contextmanager
+def _writer_lock(path: str) -> Iterator[None]:
+    """Serialise writers across processes; readers never take this lock"""
+    import fcntl
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(f"{path}.lock", "w") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def _read_existing(path: str):
+    """(dtype, generation, [(user_id, vhash)], rows memmap or None) of the current file"""
+    store = TemplateStore(path, check_seconds=0)
+    store._maybe_reload()
+    if store._identity is None:
+        return None, 0, [], None
+    entries = sorted(((user_id, vhash) for user_id, (_, vhash) in store._index.items()),
+                     key=lambda e: store._index[e[0]][0])
+    return store._rows.dtype.name if store._rows is not None else None, store.generation, entries, store._rows
+
+
+def _write_file(path: str, dtype: str, generation: int, ids: list, row_source: Iterable) -> None:
+    import numpy as np
+
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, FORMAT_VERSION, _DTYPE_CODES[dtype], TEMPLATE_DIM, len(ids), generation))
+        for user_id, vhash in ids:
+            f.write(ID_ENTRY.pack(user_id, vhash))
+        f.write(b"\0" * (_rows_offset(len(ids)) - f.tell()))
+        for row in row_source:
+            f.write(np.ascontiguousarray(row, dtype=dtype).tobytes())
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def apply_changes(
+    upserts: Dict[int, Tuple[str, np.ndarray]],
+    removals: Iterable[int],
+    path: str,
+    dtype: str = TEMPLATE_STORE_DTYPE,
+) -> int:
+    """Rewrite the store with templates added/replaced/removed; returns the new generation.
+
+    upserts maps user_id -> (template_version, template). Callers should batch
+    changes: every call rewrites the whole file.
+    """
+    removed = set(removals) | set(upserts)
+    with _writer_lock(path):
+        existing_dtype, generation, entries, rows = _read_existing(path)
+        dtype = existing_dtype or dtype
+
+        kept = [(row, entry) for row, entry in enumerate(entries) if entry[0] not in removed]
+        added = sorted(upserts.items())
+        ids = [entry for _, entry in kept] + [(user_id, version_hash(version)) for user_id, (version, _) in added]
+
+        def row_source():
+            for row, _ in kept:
+                yield rows[row]
+            for _, (_, template) in added:
+                yield template
+
+        _write_file(path, dtype, generation + 1, ids, row_source())
+
+    print(f"[Templates] ✅ Generation {generation + 1}: +{len(upserts)} / -{len(removed - set(upserts))} ({len(ids)} total)")
+    return generation + 1
+
+
+def rebuild(templates: Dict[int, Tuple[str, np.ndarray]], path: str, dtype: str = TEMPLATE_STORE_DTYPE) -> int:
+    """Replace the store's rows for these users.
+
+    Rows for users the rebuild doesn't cover (staff enrolled after it read the
+    user list) are kept, so enrollments that raced the rebuild aren't lost.
+    Callers drop entries whose photo changed since they were encoded.
+    """
+    with _writer_lock(path):
+        _, generation, entries, rows = _read_existing(path)
+        kept = [(row, entry) for row, entry in enumerate(entries) if entry[0] not in templates]
+        ordered = sorted(templates.items())
+        ids = [entry for _, entry in kept] + [(user_id, version_hash(version)) for user_id, (version, _) in ordered]
+
+        def row_source():
+            for row, _ in kept:
+                yield rows[row]
+            for _, (_, template) in ordered:
+                yield template
+
+        _write_file(path, dtype, generation + 1, ids, row_source())
+    print(f"[Templates] ✅ Rebuilt generation {generation + 1}: {len(ordered)} rebuilt, {len(kept)} newer rows kept")
+    return generation + 1
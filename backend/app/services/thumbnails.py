@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+import os
+import hashlib
+from typing import Optional, Dict, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import numpy as np
+
+THUMBNAIL_DIR = "uploads/thumbnails"
+THUMBNAIL_URL_PREFIX = "/uploads/thumbnails"
+
+# Square avatar sizes (px) generated for every staff photo
+THUMBNAIL_SIZES = (64, 256)
+
+THUMBNAIL_FORMATS = ("webp", "jpg")
+
+os.makedirs(THUMBNAIL_DIR, exist_ok=True)
+
+
+def thumbnail_key_for_bytes(image_bytes: bytes) -> str:
+    """Content hash used to name derivatives, so URLs change whenever the photo does."""
+    return hashlib.sha256(image_bytes).hexdigest()[:16]
+
+
+def thumbnail_filename(key: str, size: int, ext: str) -> str:
+    return f"{key}_{size}.{ext}"
+
+
+def thumbnail_urls(key: Optional[str]) -> Optional[Dict[str, str]]:
+    """Map "<size>.<ext>" -> URL for every derivative of a photo."""
+    if not key:
+        return None
+    return {
+        f"{size}.{ext}": f"{THUMBNAIL_URL_PREFIX}/{thumbnail_filename(key, size, ext)}"
+        for size in THUMBNAIL_SIZES
+        for ext in THUMBNAIL_FORMATS
+    }
+
+
+def thumbnail_url(key: Optional[str], size: int = THUMBNAIL_SIZES[-1], ext: str = "webp") -> Optional[str]:
+    if not key:
+        return None
+    return f"{THUMBNAIL_URL_PREFIX}/{thumbnail_filename(key, size, ext)}"
+
+
+def _square_crop(img: np.ndarray) -> np.ndarray:
+    h, w = img.shape[:2]
+    side = min(h, w)
+    top = (h - side) // 2
+    left = (w - side) // 2
+    return img[top:top + side, left:left + side]
+
+
+def _encode_params(ext: str) -> list:
+    import cv2
+
+    if ext == "webp":
+        return [cv2.IMWRITE_WEBP_QUALITY, 80]
+    return [cv2.IMWRITE_JPEG_QUALITY, 85, cv2.IMWRITE_JPEG_OPTIMIZE, 1]
+
+
+def _atomic_write(path: str, data: bytes) -> None:
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def generate_thumbnails_from_bytes(image_bytes: bytes) -> Optional[str]:
+    """Write every size/format derivative and return the thumbnail key (None on failure)."""
+    key = thumbnail_key_for_bytes(image_bytes)
+
+    # Derivatives are immutable, so an existing set means there is nothing to do
+    if all(
+        os.path.exists(os.path.join(THUMBNAIL_DIR, thumbnail_filename(key, size, ext)))
+        for size in THUMBNAIL_SIZES
+        for ext in THUMBNAIL_FORMATS
+    ):
+        return key
+
+    import cv2
+    import numpy as np
+
+    img = cv2.imdecode(np.frombuffer(image_bytes, np.uint8), cv2.IMREAD_COLOR)
+    if img is None:
+        print("[Thumbnails] Could not decode image")
+        return None
+
+    square = _square_crop(img)
+    for size in THUMBNAIL_SIZES:
+        resized = cv2.resize(square, (size, size), interpolation=cv2.INTER_AREA)
+        for ext in THUMBNAIL_FORMATS:
+            ok, encoded = cv2.imencode(f".{ext}", resized, _encode_params(ext))
+            if not ok:
+                print(f"[Thumbnails] Failed to encode {size}px {ext}")
+                return None
+            _atomic_write(os.path.join(THUMBNAIL_DIR, thumbnail_filename(key, size, ext)), encoded.tobytes())
+
+    print(f"[Thumbnails] ✅ Generated derivatives for {key}")
+    return key
+
+
+def generate_thumbnails(photo_path: str) -> Optional[str]:
+    try:
+        with open(photo_path, "rb") as f:
+            image_bytes = f.read()
+    except OSError as e:
+        print(f"[Thumbnails] Could not read {photo_path}: {e}")
+        return None
+    return generate_thumbnails_from_bytes(image_bytes)
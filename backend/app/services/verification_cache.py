@@ -0,0 +1,82 @@
+import time
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+from app.config import (
+    VERIFY_CACHE_TTL_SECONDS,
+    VERIFY_CACHE_MAX_ENTRIES,
+    VERIFY_CACHE_MAX_PER_USER,
+    VERIFY_CACHE_MAX_HAMMING,
+)
+
+# (user_id, template_version) -> [(frame_hash, passed, distance, expires_at), ...]
+# Each entry is a handful of Python objects (~200 bytes), so memory is bounded
+# by VERIFY_CACHE_MAX_ENTRIES rather than by frame size.
+_entries: "OrderedDict[Tuple[int, str], List[Tuple[int, bool, float, float]]]" = OrderedDict()
+_size = 0
+
+stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+
+def perceptual_hash(image_bytes: bytes) -> Optional[int]:
+    """64-bit difference hash of the downscaled grayscale frame (None if undecodable)"""
+    import cv2
+    import numpy as np
+
+    # Decoding at 1/8 scale is much cheaper than a full decode and is all dHash needs
+    img = cv2.imdecode(np.frombuffer(image_bytes, np.uint8), cv2.IMREAD_REDUCED_GRAYSCALE_8)
+    if img is None:
+        return None
+
+    small = cv2.resize(img, (9, 8), interpolation=cv2.INTER_AREA)
+    bits = (small[:, 1:] > small[:, :-1]).flatten()
+    return int(np.packbits(bits).view(">u8")[0])
+
+
+def _hamming(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+def get(user_id: int, template_version: str, frame_hash: int) -> Optional[Tuple[bool, float]]:
+    """Previous (passed, distance) for a near-identical frame, if still fresh"""
+    key = (user_id, template_version)
+    bucket = _entries.get(key)
+    now = time.monotonic()
+
+    if bucket:
+        for cached_hash, passed, distance, expires_at in bucket:
+            if expires_at > now and _hamming(cached_hash, frame_hash) <= VERIFY_CACHE_MAX_HAMMING:
+                _entries.move_to_end(key)
+                stats["hits"] += 1
+                return passed, distance
+
+    stats["misses"] += 1
+    return None
+
+
+def put(user_id: int, template_version: str, frame_hash: int, passed: bool, distance: float) -> None:
+    global _size
+    key = (user_id, template_version)
+    now = time.monotonic()
+
+    bucket = _entries.pop(key, [])
+    live = [e for e in bucket if e[3] > now][-(VERIFY_CACHE_MAX_PER_USER - 1):]
+    live.append((frame_hash, passed, distance, now + VERIFY_CACHE_TTL_SECONDS))
+    _size += len(live) - len(bucket)
+    _entries[key] = live
+
+    # Evict least recently used users until we're back under the global bound
+    while _size > VERIFY_CACHE_MAX_ENTRIES and _entries:
+        _, evicted = _entries.popitem(last=False)
+        _size -= len(evicted)
+        stats["evictions"] += len(evicted)
+
+
+def snapshot() -> dict:
+    lookups = stats["hits"] + stats["misses"]
+    return {
+        **stats,
+        "entries": _size,
+        "max_entries": VERIFY_CACHE_MAX_ENTRIES,
+        "hit_rate": round(stats["hits"] / lookups, 4) if lookups else None,
+    }
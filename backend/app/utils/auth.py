@@ -12,6 +12,13 @@ oauth2_scheme = OAuth2PasswordBearer(tokenUrl="login")
 SECRET_KEY = os.getenv("SECRET_KEY", "mysecret")
 ALGORITHM = "HS256"
 
+def tenant_matches(payload: dict, user: User) -> bool:
+    """Tokens carry the organization they were issued for ("org"); a user moved
+    to another site can't keep using a token scoped to the old one.
+    Tokens issued before tenancy have no claim and are scoped by the user row."""
+    org = payload.get("org")
+    return org is None or org == user.organization_id
+
 async def get_current_user(
     token: str = Depends(oauth2_scheme),
     db: AsyncSession = Depends(get_db)
@@ -45,6 +52,10 @@ async def get_current_user(
     if user is None:
         print(f"User not found with email: {email}")
         raise credentials_exception
+
+    if not tenant_matches(payload, user):
+        print(f"Token organization {payload.get('org')} does not match user's organization {user.organization_id}")
+        raise credentials_exception
         
     print(f"User found: {user.email}, is_admin: {user.is_admin}")
     return user
\ No newline at end of file
@@ -0,0 +1,45 @@
+import hashlib
+from typing import Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.responses import Response
+
+LIST_CACHE_CONTROL = "private, no-cache"
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match comparison (weak: W/ prefixes are ignored, '*' matches anything)"""
+    if not if_none_match:
+        return False
+    wanted = etag[2:] if etag.startswith("W/") else etag
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag == "*" or (tag[2:] if tag.startswith("W/") else tag) == wanted:
+            return True
+    return False
+
+
+async def watermark_etag(db: AsyncSession, *queries, salt: str = "") -> str:
+    """Weak ETag from cheap aggregate queries (count(*), max(id), sum(change_seq)).
+
+    Each query must return a single row whose values change whenever rows are
+    added, removed or updated (change_seq is restamped on every update), so the
+    ETag can be checked without running the list query or serializing its body.
+    Use sum(change_seq), not max: stamps are transaction ids, and a transaction
+    with a lower id may commit after a higher one without moving the max.
+    """
+    parts = [salt]
+    for query in queries:
+        row = (await db.execute(query)).one()
+        parts.extend(value.isoformat() if hasattr(value, "isoformat") else str(value) for value in row)
+    return f'W/"{hashlib.md5("|".join(parts).encode()).hexdigest()}"'
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": LIST_CACHE_CONTROL})
+
+
+def with_etag(response: Response, etag: str) -> Response:
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = LIST_CACHE_CONTROL
+    return response
@@ -0,0 +1,204 @@
+import os
+import sys
+import time
+import asyncio
+import threading
+from collections import Counter
+from typing import Optional
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+# On-demand statistical profiler for one worker process.
+#
+# While a session runs, a daemon thread snapshots every thread's Python stack
+# (sys._current_frames()) each interval and counts collapsed stacks, the
+# "frame;frame;frame count" format flamegraph.pl / speedscope read. Nothing is
+# installed when no session runs: the middleware checks one global and the
+# sampler thread doesn't exist, so the cost when disabled is a None check.
+#
+# Stacks are rooted at "loop" (the event loop thread: routing, auth, bcrypt,
+# JSON encoding, awaiting the DB driver) or "worker" (to_thread/threadpool work
+# such as detectMultiScale). With a route filter, loop samples count only when
+# that route's endpoint is on the stack; worker threads can't be tied to a
+# request, so their samples count while a request for the route is in flight.
+# With a route filter, requests of that route that are suspended (awaiting the
+# database, a CV slot, a thread) are sampled too, rooted at "await": the loop
+# thread's stack can't show time spent waiting. asyncio's task set may only be
+# read on the loop thread, so the sampler schedules that snapshot there with
+# call_soon_threadsafe (at most one outstanding; it lags while the loop is busy).
+
+MAX_DEPTH = 128
+
+# Frames a thread sits in while idle (waiting for work), skipped for worker threads
+_IDLE_FRAMES = {("threading", "wait"), ("queue", "get"), ("concurrent.futures.thread", "_worker")}
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    module = frame.f_globals.get("__name__") or os.path.basename(code.co_filename)
+    return f"{module}:{getattr(code, 'co_qualname', code.co_name)}"
+
+
+class ProfileSession:
+    def __init__(self, seconds: float, interval: float, loop: asyncio.AbstractEventLoop, loop_thread_id: int,
+                 route_path: Optional[str] = None, route_regex=None, endpoint_code=None):
+        self.seconds = seconds
+        self.interval = interval
+        self.loop = loop
+        self.loop_thread_id = loop_thread_id
+        self.route_path = route_path
+        self.route_regex = route_regex
+        self.endpoint_code = endpoint_code
+        self.in_flight = 0  # requests for route_path currently being handled
+        self.requests = 0
+        self.samples = Counter()  # written by the sampler thread only
+        self.await_samples = Counter()  # written on the loop thread only
+        self._await_pending = False
+        self.ticks = 0
+        self.started_at = 0.0
+        self.finished_at: Optional[float] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def matches(self, path: str) -> bool:
+        return self.route_regex is None or self.route_regex.match(path) is not None
+
+    def start(self) -> None:
+        self.started_at = time.monotonic()
+        self._thread = threading.Thread(target=self._run, name="profiler-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self) -> None:
+        own_id = threading.get_ident()
+        deadline = self.started_at + self.seconds
+        while not self._stop.is_set() and time.monotonic() < deadline:
+            self._sample(own_id)
+            self.ticks += 1
+            self._stop.wait(self.interval)
+        self.finished_at = time.monotonic()
+
+    def _sample(self, own_id: int) -> None:
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == own_id:
+                continue
+            is_loop = thread_id == self.loop_thread_id
+
+            stack, seen_endpoint = [], False
+            depth = 0
+            while frame is not None and depth < MAX_DEPTH:
+                if frame.f_code is self.endpoint_code:
+                    seen_endpoint = True
+                stack.append(frame)
+                frame = frame.f_back
+                depth += 1
+            if not stack:
+                continue
+
+            if is_loop:
+                if self.endpoint_code is not None and not seen_endpoint:
+                    continue
+            else:
+                top = stack[0]
+                if (top.f_globals.get("__name__"), top.f_code.co_name) in _IDLE_FRAMES:
+                    continue
+                if self.route_regex is not None and self.in_flight == 0:
+                    continue
+
+            labels = ["loop" if is_loop else "worker"]
+            labels.extend(_frame_label(f) for f in reversed(stack))
+            self.samples[";".join(labels)] += 1
+
+        if self.endpoint_code is not None and not self._await_pending:
+            self._await_pending = True
+            try:
+                self.loop.call_soon_threadsafe(self._sample_suspended)
+            except RuntimeError:  # loop closed
+                self._await_pending = False
+
+    def _sample_suspended(self) -> None:
+        """Runs on the loop thread, between callbacks, so every task is parked on an await"""
+        self._await_pending = False
+        if self._stop.is_set():
+            return
+        for task in asyncio.all_tasks(self.loop):
+            labels, seen_endpoint = ["await"], False
+            awaitable = task.get_coro()
+            while awaitable is not None and len(labels) < MAX_DEPTH:
+                frame = getattr(awaitable, "cr_frame", None) or getattr(awaitable, "gi_frame", None) \
+                    or getattr(awaitable, "ag_frame", None)
+                if frame is None:
+                    # Leaf: the Future/lock/socket wait the coroutine is parked on
+                    labels.append(f"<{type(awaitable).__name__}>")
+                    break
+                if frame.f_code is self.endpoint_code:
+                    seen_endpoint = True
+                labels.append(_frame_label(frame))
+                awaitable = getattr(awaitable, "cr_await", None) or getattr(awaitable, "gi_yieldfrom", None) \
+                    or getattr(awaitable, "ag_await", None)
+            if seen_endpoint:
+                self.await_samples[";".join(labels)] += 1
+
+    def collapsed(self) -> str:
+        merged = self.samples + self.await_samples
+        return "".join(f"{stack} {count}\n" for stack, count in merged.most_common())
+
+    def snapshot(self) -> dict:
+        end = self.finished_at or time.monotonic()
+        return {
+            "route": self.route_path,
+            "seconds": self.seconds,
+            "interval_ms": round(self.interval * 1000, 3),
+            "elapsed_seconds": round(end - self.started_at, 3),
+            "running": self.finished_at is None,
+            "ticks": self.ticks,
+            "samples": sum(self.samples.values()) + sum(self.await_samples.values()),
+            "distinct_stacks": len(self.samples) + len(self.await_samples),
+            "requests": self.requests,
+        }
+
+
+# The one session this worker may run at a time (None when profiling is off)
+session: Optional[ProfileSession] = None
+
+
+def begin(new_session: ProfileSession) -> bool:
+    """Start a session unless one is already running; returns False if busy"""
+    global session
+    if session is not None:
+        return False
+    session = new_session
+    new_session.start()
+    return True
+
+
+def end() -> Optional[ProfileSession]:
+    global session
+    finished, session = session, None
+    if finished is not None:
+        finished.stop()
+    return finished
+
+
+class ProfilerMiddleware:
+    """Counts in-flight requests for the profiled route; a single None check otherwise"""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        active = session
+        if active is None or scope["type"] != "http" or not active.matches(scope["path"]):
+            await self.app(scope, receive, send)
+            return
+
+        active.in_flight += 1
+        active.requests += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            active.in_flight -= 1
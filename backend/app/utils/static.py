@@ -0,0 +1,28 @@
+import os
+from fastapi.staticfiles import StaticFiles
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+class ImmutableStaticFiles(StaticFiles):
+    """Static files whose names are content hashes, so they can be cached forever.
+
+    The ETag is the filename itself (strong, stable across hosts) instead of
+    Starlette's mtime/size based default.
+    """
+
+    def file_response(self, full_path, stat_result: os.stat_result, scope, status_code: int = 200) -> Response:
+        request_headers = Headers(scope=scope)
+        etag = f'"{os.path.basename(full_path)}"'
+
+        response = FileResponse(
+            full_path,
+            status_code=status_code,
+            stat_result=stat_result,
+            headers={"etag": etag, "cache-control": IMMUTABLE_CACHE_CONTROL},
+        )
+        if self.is_not_modified(response.headers, request_headers):
+            return Response(status_code=304, headers={"etag": etag, "cache-control": IMMUTABLE_CACHE_CONTROL})
+        return response
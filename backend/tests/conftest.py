@@ -0,0 +1,62 @@
+import os
+import sys
+import asyncio
+import tempfile
+
+import pytest
+
+# Settings are read at import time, so point the app at throwaway locations
+# before anything under app/ is imported. Tests run against SQLite; nothing
+# here needs Postgres, Redis or OpenCV.
+_TMP = tempfile.mkdtemp(prefix="attendance-tests-")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(_TMP, 'test.db')}")
+os.environ.setdefault("SQL_ECHO", "false")
+os.environ.setdefault("SECRET_KEY", "test-secret")
+os.environ.setdefault("STORAGE_ROOT", os.path.join(_TMP, "blobs"))
+os.environ.setdefault("TEMPLATE_STORE_DIR", os.path.join(_TMP, "templates"))
+os.environ.setdefault("EXPORT_DIR", os.path.join(_TMP, "exports"))
+os.environ.setdefault("AUDIT_DIR", os.path.join(_TMP, "audit"))
+os.environ.setdefault("RATE_LIMIT_BACKEND", "memory")
+os.environ.setdefault("IDEMPOTENCY_BACKEND", "memory")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def run():
+    """Run a coroutine to completion on a fresh event loop"""
+    from app.database import engine
+
+    async def _main(coro):
+        try:
+            return await coro
+        finally:
+            # Pooled aiosqlite connections belong to this loop; don't reuse them
+            await engine.dispose()
+
+    def _run(coro):
+        return asyncio.run(_main(coro))
+    return _run
+
+
+@pytest.fixture
+def create_tables(run):
+    """(Re)create the named tables, empty, in the SQLite test database.
+
+    Indexes are left out: some are Postgres-only expressions (text_pattern_ops)
+    and nothing in the tests depends on them.
+    """
+    from sqlalchemy.schema import CreateTable, DropTable
+
+    import app.models  # noqa: F401  (registers every table on Base.metadata)
+    from app.database import Base, engine
+
+    def _create(*names):
+        async def create():
+            async with engine.begin() as conn:
+                for name in names:
+                    table = Base.metadata.tables[name]
+                    await conn.execute(DropTable(table, if_exists=True))
+                    await conn.execute(CreateTable(table))
+        run(create())
+    return _create
@@ -0,0 +1,84 @@
+import os
+import asyncio
+import threading
+from datetime import datetime, timedelta
+
+from app.services import audit_capture
+
+
+def _shard(root, day, files=("a.webp", "b.webp")):
+    path = os.path.join(root, day.strftime("%Y"), day.strftime("%m"), day.strftime("%d"))
+    os.makedirs(path, exist_ok=True)
+    for name in files:
+        with open(os.path.join(path, name), "wb") as f:
+            f.write(b"webp")
+    return path
+
+
+def test_purge_removes_old_shards_and_ignores_strays(tmp_path, monkeypatch, create_tables, run):
+    create_tables("attendance")
+    root = str(tmp_path)
+    monkeypatch.setattr(audit_capture, "AUDIT_DIR", root)
+    today = datetime.utcnow().date()
+
+    old = _shard(root, today - timedelta(days=40))
+    recent = _shard(root, today - timedelta(days=5))
+    # Things an operator (or the OS) may leave next to the shards
+    (tmp_path / ".DS_Store").write_bytes(b"")
+    (tmp_path / "README").mkdir()
+    os.makedirs(os.path.join(root, "2024", "02", "30"))  # digits, but not a date
+    with open(os.path.join(root, "2024", "notes.txt"), "w") as f:
+        f.write("x")
+
+    removed = run(audit_capture.purge_expired(retention_days=30))
+
+    assert removed == 2
+    assert not os.path.exists(old)
+    assert os.path.exists(recent)
+    assert os.path.isdir(os.path.join(root, "2024", "02", "30"))
+
+
+def test_purge_continues_past_a_shard_it_cannot_delete(tmp_path, monkeypatch, create_tables, run):
+    create_tables("attendance")
+    root = str(tmp_path)
+    monkeypatch.setattr(audit_capture, "AUDIT_DIR", root)
+    today = datetime.utcnow().date()
+    stuck = _shard(root, today - timedelta(days=60))
+    old = _shard(root, today - timedelta(days=50), files=("c.webp",))
+
+    real_rmtree = audit_capture.shutil.rmtree
+
+    def rmtree(path, *args, **kwargs):
+        if path == stuck:
+            raise PermissionError("read-only")
+        real_rmtree(path, *args, **kwargs)
+
+    monkeypatch.setattr(audit_capture.shutil, "rmtree", rmtree)
+
+    assert run(audit_capture.purge_expired(retention_days=30)) == 1
+    assert os.path.exists(stuck) and not os.path.exists(old)
+
+
+def test_submit_from_background_tasks_runs_on_the_loop_thread(monkeypatch, run):
+    from starlette.background import BackgroundTasks
+
+    monkeypatch.setattr(audit_capture, "AUDIT_CAPTURE_ENABLED", True)
+    put_threads = []
+
+    class RecordingQueue(asyncio.Queue):
+        def put_nowait(self, item):
+            put_threads.append(threading.get_ident())
+            super().put_nowait(item)
+
+    async def scenario():
+        queue = RecordingQueue(maxsize=4)
+        monkeypatch.setattr(audit_capture, "_queue", queue)
+        tasks = BackgroundTasks()
+        tasks.add_task(audit_capture.submit, 7, b"jpeg", None, datetime.utcnow())
+        await tasks()
+        return queue.get_nowait()
+
+    attendance_id, image_bytes, _, _ = run(scenario())
+    assert (attendance_id, image_bytes) == (7, b"jpeg")
+    # asyncio.Queue isn't thread-safe: the put must not happen in the threadpool
+    assert put_threads == [threading.get_ident()]
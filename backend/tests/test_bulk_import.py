@@ -0,0 +1,40 @@
+import io
+import zipfile
+
+from app.services import bulk_import
+
+
+def _archive(members):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        for name, data in members.items():
+            archive.writestr(name, data)
+    buffer.seek(0)
+    return zipfile.ZipFile(buffer)
+
+
+def test_read_member_caps_photo_size(monkeypatch):
+    monkeypatch.setattr(bulk_import, "BULK_IMPORT_MAX_PHOTO_BYTES", 100_000)
+    monkeypatch.setattr(bulk_import, "READ_CHUNK_BYTES", 4096)
+    archive = _archive({"small.jpg": b"x" * 1000, "huge.jpg": b"\0" * 5_000_000})
+
+    assert bulk_import._read_member(archive, archive.getinfo("small.jpg")) == b"x" * 1000
+    # Compresses to a few KB, but is far over the limit once inflated
+    assert bulk_import._read_member(archive, archive.getinfo("huge.jpg")) is None
+
+
+def test_job_status_is_shared_through_the_database(create_tables, run):
+    create_tables("bulk_import_jobs")
+
+    async def scenario():
+        job = await bulk_import.create_job(total=3, organization_id=1)
+        job.update(status="running", processed=2, succeeded=1, failed=1,
+                   results=[{"row": 2, "email": "a@x.io", "status": "created", "error": None}])
+        await bulk_import._save(job)
+        return job["job_id"], await bulk_import.get_job(job["job_id"])
+
+    job_id, stored = run(scenario())
+    assert stored["job_id"] == job_id
+    assert (stored["status"], stored["processed"], stored["succeeded"], stored["failed"]) == ("running", 2, 1, 1)
+    assert stored["results"][0]["email"] == "a@x.io"
+    assert run(bulk_import.get_job("missing")) is None
@@ -0,0 +1,65 @@
+from sqlalchemy import func, update
+from sqlalchemy.future import select
+
+from app.database import SessionLocal
+from app.models.user import User
+from app.utils.conditional import etag_matches, watermark_etag
+
+
+def test_etag_matching_ignores_weak_prefix():
+    assert etag_matches('W/"abc"', 'W/"abc"')
+    assert etag_matches('"abc", W/"def"', 'W/"def"')
+    assert etag_matches("*", 'W/"abc"')
+    assert not etag_matches(None, 'W/"abc"')
+    assert not etag_matches('W/"abd"', 'W/"abc"')
+
+
+def test_watermark_moves_on_updates_not_just_inserts(create_tables, run):
+    create_tables("users")
+
+    async def scenario():
+        async with SessionLocal() as db:
+            await db.execute(User.__table__.insert(), [
+                {"id": 1, "organization_id": 1, "name": "Asha", "role": "user", "change_seq": 10},
+                {"id": 2, "organization_id": 1, "name": "Ben", "role": "user", "change_seq": 11},
+            ])
+            await db.commit()
+
+            watermark = select(func.count(User.id), func.max(User.id), func.sum(User.change_seq)) \
+                .where(User.organization_id == 1)
+            before = await watermark_etag(db, watermark, salt="staff:1")
+            again = await watermark_etag(db, watermark, salt="staff:1")
+            other_page = await watermark_etag(db, watermark, salt="staff:1:cursor=2")
+
+            # A rename keeps count and max(id); the trigger stamps a new change_seq
+            await db.execute(update(User).where(User.id == 1).values(name="Asha K", change_seq=12))
+            await db.commit()
+            after = await watermark_etag(db, watermark, salt="staff:1")
+            return before, again, other_page, after
+
+    before, again, other_page, after = run(scenario())
+    assert before == again
+    assert other_page != before
+    assert after != before
+
+
+def test_watermark_moves_when_a_lower_xid_commits_late(create_tables, run):
+    create_tables("users")
+
+    async def scenario():
+        async with SessionLocal() as db:
+            await db.execute(User.__table__.insert(), [
+                {"id": 1, "organization_id": 1, "name": "Asha", "role": "user", "change_seq": 10},
+                {"id": 2, "organization_id": 1, "name": "Ben", "role": "user", "change_seq": 20},
+            ])
+            await db.commit()
+
+            watermark = select(func.count(User.id), func.max(User.id), func.sum(User.change_seq))
+            before = await watermark_etag(db, watermark)
+            # xid 15 started before xid 20 committed but commits after it: max stays 20
+            await db.execute(update(User).where(User.id == 1).values(name="Asha K", change_seq=15))
+            await db.commit()
+            return before, await watermark_etag(db, watermark)
+
+    before, after = run(scenario())
+    assert after != before
@@ -0,0 +1,60 @@
+from datetime import datetime
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from sqlalchemy.future import select
+
+from app.database import SessionLocal
+from app.models.job import Job
+from app.models.user import User
+from app.routes import admin_routes
+
+
+@pytest.fixture
+def dead_jobs(create_tables, run):
+    create_tables("jobs")
+
+    async def seed():
+        async with SessionLocal() as db:
+            rows = [
+                Job(kind="templates.enroll", payload={"user_ids": [1]}, organization_id=1, status="dead"),
+                Job(kind="templates.enroll", payload={"user_ids": [2]}, organization_id=2, status="dead"),
+                Job(kind="export.retention", payload={}, organization_id=None, status="dead"),
+            ]
+            for job in rows:
+                job.max_attempts, job.attempts, job.run_after = 5, 5, datetime.utcnow()
+            db.add_all(rows)
+            await db.commit()
+            return {job.organization_id: job.id for job in rows}
+
+    return run(seed())
+
+
+def _client() -> httpx.AsyncClient:
+    app = FastAPI()
+    app.include_router(admin_routes.router)
+    admin = User(id=1000, organization_id=1, email="admin@example.com", is_admin=True)
+    app.dependency_overrides[admin_routes.get_current_admin] = lambda: admin
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test")
+
+
+def test_dead_jobs_are_listed_for_the_admins_organization_only(dead_jobs, run):
+    async def scenario():
+        async with _client() as client:
+            return (await client.get("/admin/jobs/dead")).json()
+
+    assert [job["id"] for job in run(scenario())] == [dead_jobs[1]]
+
+
+def test_other_tenants_and_system_jobs_cannot_be_retried(dead_jobs, run):
+    async def scenario():
+        async with _client() as client:
+            codes = [(await client.post(f"/admin/jobs/{dead_jobs[org]}/retry")).status_code for org in (2, None, 1)]
+        async with SessionLocal() as db:
+            result = await db.execute(select(Job.organization_id, Job.status))
+            return codes, dict(result.all())
+
+    codes, statuses = run(scenario())
+    assert codes == [404, 404, 200]
+    assert statuses == {1: "pending", 2: "dead", None: "dead"}
@@ -0,0 +1,95 @@
+from datetime import datetime
+
+import pytest
+from sqlalchemy import func
+from sqlalchemy.future import select
+
+from app.database import SessionLocal
+from app.models.attendance import Attendance
+from app.models.job import Job
+from app.models.user import User
+from app.schemas.edge import EdgeCheckInIn
+from app.services import edge
+
+
+@pytest.fixture
+def central(create_tables, run):
+    create_tables("users", "attendance", "jobs")
+
+    async def seed():
+        async with SessionLocal() as db:
+            await db.execute(User.__table__.insert(), [
+                {"id": 1, "organization_id": 1, "name": "Asha", "email": "asha@example.com"},
+                {"id": 2, "organization_id": 2, "name": "Elsewhere", "email": "e@example.com"},
+            ])
+            await db.commit()
+
+    run(seed())
+
+
+def _checkin(ref, user_id, timestamp, location="Gate"):
+    return EdgeCheckInIn(ref=ref, user_id=user_id, timestamp=timestamp, location=location, battery_level=70)
+
+
+async def _ingest(*checkins):
+    async with SessionLocal() as db:
+        results = await edge.ingest_checkins(db, 1, list(checkins))
+    return {r["ref"]: r for r in results}
+
+
+async def _state():
+    async with SessionLocal() as db:
+        rows = (await db.execute(select(Attendance).order_by(Attendance.id))).scalars().all()
+        marked = (await db.execute(
+            select(func.count(Job.id)).where(Job.kind == "attendance.marked")
+        )).scalar()
+        return rows, marked
+
+
+def test_ingest_outcomes_and_resends(central, run):
+    monday_905 = _checkin("a", 1, datetime(2026, 10, 19, 9, 5))
+    tuesday = _checkin("c", 1, datetime(2026, 10, 20, 10, 0))
+    other_org = _checkin("b", 2, datetime(2026, 10, 19, 9, 0))
+    monday_850 = _checkin("d", 1, datetime(2026, 10, 19, 8, 50), location="Side door")
+    monday_930 = _checkin("e", 1, datetime(2026, 10, 19, 9, 30))
+
+    async def scenario():
+        first = await _ingest(monday_905, other_org, tuesday)
+        resent = await _ingest(monday_905, other_org, tuesday)  # response was lost
+        replaced = await _ingest(monday_850)
+        resent_replaced = await _ingest(monday_850)
+        later = await _ingest(monday_930)
+        return first, resent, replaced, resent_replaced, later, await _state()
+
+    first, resent, replaced, resent_replaced, later, (rows, marked) = run(scenario())
+
+    assert {ref: r["status"] for ref, r in first.items()} == {"a": "created", "b": "rejected", "c": "created"}
+    assert {ref: r["status"] for ref, r in resent.items()} == {"a": "duplicate", "b": "rejected", "c": "duplicate"}
+    assert resent["a"]["attendance_id"] == first["a"]["attendance_id"]
+
+    # The earlier arrival takes over Monday's row
+    assert replaced["d"]["status"] == "replaced"
+    assert replaced["d"]["attendance_id"] == first["a"]["attendance_id"]
+    # Resending it must not report a new check-in
+    assert resent_replaced["d"]["status"] == "duplicate"
+    assert later["e"]["status"] == "duplicate"
+
+    assert len(rows) == 2
+    monday = rows[0]
+    assert (monday.timestamp, monday.location) == (datetime(2026, 10, 19, 8, 50), "Side door")
+    # attendance.marked for Monday, Tuesday and the replacement only
+    assert marked == 3
+
+
+def test_same_user_twice_in_one_batch_keeps_the_earliest(central, run):
+    async def scenario():
+        results = await _ingest(
+            _checkin("late", 1, datetime(2026, 10, 21, 9, 40)),
+            _checkin("early", 1, datetime(2026, 10, 21, 8, 55)),
+        )
+        return results, await _state()
+
+    results, (rows, _) = run(scenario())
+    assert results["early"]["status"] == "created"
+    assert results["late"]["status"] == "duplicate"
+    assert [row.timestamp for row in rows] == [datetime(2026, 10, 21, 8, 55)]
@@ -0,0 +1,83 @@
+import csv
+import gzip
+import io
+import os
+import time
+from datetime import datetime
+
+import pytest
+
+from app.database import SessionLocal
+from app.models.attendance import Attendance
+from app.models.user import User
+from app.services import exports
+
+
+@pytest.fixture
+def attendance_rows(create_tables, run):
+    create_tables("users", "attendance")
+
+    async def seed():
+        async with SessionLocal() as db:
+            await db.execute(User.__table__.insert(), [
+                {"id": 1, "organization_id": 1, "name": "Asha", "email": "asha@example.com"},
+                {"id": 2, "organization_id": 2, "name": "Other site", "email": "o@example.com"},
+            ])
+            await db.execute(Attendance.__table__.insert(), [
+                {"id": i, "user_id": 1, "organization_id": 1, "timestamp": datetime(2026, 10, i), "location": "HQ",
+                 "battery_level": 80}
+                for i in range(1, 6)
+            ] + [{"id": 99, "user_id": 2, "organization_id": 2, "timestamp": datetime(2026, 10, 1), "location": None,
+                  "battery_level": None}])
+            await db.commit()
+
+    run(seed())
+
+
+def _export(run, fmt, path, **kwargs):
+    async def scenario():
+        async with SessionLocal() as db:
+            return await exports.write_export(db, 1, fmt, path, **kwargs)
+    return run(scenario())
+
+
+def test_csv_export_is_written_atomically_per_organization(attendance_rows, tmp_path, run):
+    path = str(tmp_path / "1" / "abc.csv.gz")
+
+    _export(run, "csv", path)
+
+    with gzip.open(path, "rt") as f:
+        rows = list(csv.reader(f))
+    assert rows[0] == exports.COLUMNS
+    assert [row[0] for row in rows[1:]] == ["1", "2", "3", "4", "5"]
+    assert rows[1][3:5] == ["Asha", "asha@example.com"]
+    assert not os.path.exists(path + ".part")
+
+
+def test_failed_export_leaves_no_partial_file(attendance_rows, tmp_path, monkeypatch, run):
+    async def broken(batches):
+        yield b"partial"
+        raise ConnectionError("replica went away")
+
+    monkeypatch.setattr(exports, "stream_csv_gzip", broken)
+    path = str(tmp_path / "1" / "abc.csv.gz")
+
+    with pytest.raises(ConnectionError):
+        _export(run, "csv", path)
+    assert os.listdir(tmp_path / "1") == []
+
+
+def test_retention_removes_old_artifacts_only(tmp_path, monkeypatch, run):
+    monkeypatch.setattr(exports, "EXPORT_DIR", str(tmp_path))
+    (tmp_path / "1").mkdir()
+    old, fresh, crashed = tmp_path / "1" / "old.xlsx", tmp_path / "1" / "new.xlsx", tmp_path / "1" / "x.parquet.part"
+    for path in (old, fresh, crashed):
+        path.write_bytes(b"data")
+    two_days_ago = time.time() - 48 * 3600
+    os.utime(old, (two_days_ago, two_days_ago))
+    os.utime(crashed, (two_days_ago, two_days_ago))
+    (tmp_path / "stray.txt").write_text("not an organization directory")
+
+    assert run(exports.purge_expired(retention_hours=24)) == 2
+    assert sorted(os.listdir(tmp_path / "1")) == ["new.xlsx"]
+    assert (tmp_path / "stray.txt").exists()
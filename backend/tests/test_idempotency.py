@@ -0,0 +1,107 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from app.services import idempotency
+
+
+@pytest.fixture(params=["memory", "database"])
+def backend(request, monkeypatch, create_tables):
+    monkeypatch.setattr(idempotency, "IDEMPOTENCY_BACKEND", request.param)
+    monkeypatch.setattr(idempotency, "_results", type(idempotency._results)())
+    if request.param == "database":
+        create_tables("idempotency_keys")
+    return request.param
+
+
+def _counting_handler(outcome):
+    calls = {"count": 0}
+
+    async def handler():
+        calls["count"] += 1
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    return handler, calls
+
+
+def test_result_is_replayed_for_the_same_key(backend, run):
+    handler, calls = _counting_handler({"message": "Attendance marked"})
+
+    async def scenario():
+        first = await idempotency.run(1, "attendance_mark", "k1", handler)
+        second = await idempotency.run(1, "attendance_mark", "k1", handler)
+        other_user = await idempotency.run(2, "attendance_mark", "k1", handler)
+        return first, second, other_user
+
+    first, second, other_user = run(scenario())
+    assert first == second == other_user == {"message": "Attendance marked"}
+    assert calls["count"] == 2  # once per user
+
+
+def test_client_errors_replay_but_server_errors_run_again(backend, run):
+    rejected, rejected_calls = _counting_handler(HTTPException(status_code=403, detail="Face verification failed"))
+    failing, failing_calls = _counting_handler(HTTPException(status_code=500, detail="boom"))
+
+    async def scenario():
+        for _ in range(2):
+            with pytest.raises(HTTPException) as e:
+                await idempotency.run(1, "attendance_mark", "rejected", rejected)
+            assert e.value.status_code == 403
+            with pytest.raises(HTTPException):
+                await idempotency.run(1, "attendance_mark", "failing", failing)
+
+    run(scenario())
+    assert rejected_calls["count"] == 1
+    assert failing_calls["count"] == 2
+
+
+def test_concurrent_duplicates_are_coalesced(backend, run):
+    calls = {"count": 0}
+
+    async def slow():
+        calls["count"] += 1
+        await asyncio.sleep(0.05)
+        return {"id": 7}
+
+    async def scenario():
+        return await asyncio.gather(*(idempotency.run(1, "activity", "k", slow) for _ in range(3)))
+
+    assert run(scenario()) == [{"id": 7}] * 3
+    assert calls["count"] == 1
+
+
+def test_other_workers_replay_from_the_shared_store(monkeypatch, create_tables, run):
+    monkeypatch.setattr(idempotency, "IDEMPOTENCY_BACKEND", "database")
+    monkeypatch.setattr(idempotency, "_results", type(idempotency._results)())
+    create_tables("idempotency_keys")
+    handler, calls = _counting_handler({"id": 3})
+
+    async def scenario():
+        await idempotency.run(1, "activity", "k", handler)
+        idempotency._results.clear()  # as if the retry reached a different process
+        assert await idempotency.is_replay(1, "activity", "k")
+        return await idempotency.run(1, "activity", "k", handler)
+
+    assert run(scenario()) == {"id": 3}
+    assert calls["count"] == 1
+
+
+def test_unfinished_claim_elsewhere_answers_409(monkeypatch, create_tables, run):
+    monkeypatch.setattr(idempotency, "IDEMPOTENCY_BACKEND", "database")
+    monkeypatch.setattr(idempotency, "IDEMPOTENCY_WAIT_SECONDS", 0.1)
+    monkeypatch.setattr(idempotency, "POLL_SECONDS", 0.02)
+    create_tables("idempotency_keys")
+    handler, calls = _counting_handler({"id": 1})
+
+    async def scenario():
+        claimed, _ = await idempotency._claim((1, "activity", "k"))  # another worker is still running it
+        assert claimed
+        with pytest.raises(HTTPException) as e:
+            await idempotency.run(1, "activity", "k", handler)
+        return e.value.status_code
+
+    assert run(scenario()) == 409
+    assert calls["count"] == 0
@@ -0,0 +1,166 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.future import select
+
+from app.database import SessionLocal
+from app.models.job import Job
+from app.services import jobs
+
+
+@pytest.fixture
+def handlers(monkeypatch, create_tables):
+    create_tables("jobs")
+    registry = dict(jobs._handlers)
+    monkeypatch.setattr(jobs, "_handlers", registry)
+    monkeypatch.setattr(jobs, "JOB_RETRY_BASE_SECONDS", 5)
+    calls = []
+
+    async def ok(payload):
+        calls.append(("ok", payload))
+
+    async def fail(payload):
+        calls.append(("fail", payload))
+        raise RuntimeError("upstream down")
+
+    registry["test.ok"] = ok
+    registry["test.fail"] = fail
+    return calls
+
+
+async def _enqueue(kind, **kwargs):
+    async with SessionLocal() as db:
+        job = jobs.enqueue(db, kind, {"n": 1}, **kwargs)
+        await db.commit()
+        return job.id
+
+
+async def _job(job_id):
+    async with SessionLocal() as db:
+        return await db.get(Job, job_id)
+
+
+async def _claim_and_run(worker):
+    claimed = await worker._claim()
+    for job in claimed:
+        await worker._execute(*job)
+    return claimed
+
+
+def test_successful_job_is_deleted(handlers, run):
+    async def scenario():
+        job_id = await _enqueue("test.ok")
+        await _claim_and_run(jobs.JobWorker())
+        return await _job(job_id)
+
+    assert run(scenario()) is None
+    assert handlers == [("ok", {"n": 1})]
+
+
+def test_failures_back_off_exponentially_then_dead_letter(handlers, run):
+    worker = jobs.JobWorker()
+
+    async def scenario():
+        job_id = await _enqueue("test.fail", max_attempts=3)
+        delays = []
+        for _ in range(3):
+            async with SessionLocal() as db:
+                await db.execute(Job.__table__.update().where(Job.id == job_id).values(run_after=datetime.utcnow()))
+                await db.commit()
+            before = datetime.utcnow()
+            assert await _claim_and_run(worker)
+            job = await _job(job_id)
+            if job.status == "pending":
+                delays.append(round((job.run_after - before).total_seconds()))
+        return job, delays
+
+    job, delays = run(scenario())
+    assert delays == [5, 10]  # base, 2x base, then the last attempt dead-letters
+    assert job.status == "dead" and job.attempts == 3
+    assert "upstream down" in job.last_error
+
+
+def test_job_without_handler_is_dead_lettered_at_once(handlers, run):
+    async def scenario():
+        async with SessionLocal() as db:
+            job = Job(kind="test.removed", payload={}, max_attempts=5, run_after=datetime.utcnow() - timedelta(seconds=1))
+            db.add(job)
+            await db.commit()
+        await _claim_and_run(jobs.JobWorker())
+        return await _job(job.id)
+
+    job = run(scenario())
+    assert job.status == "dead" and job.attempts == 1
+
+
+def test_unknown_kind_cannot_be_enqueued(handlers, run):
+    async def scenario():
+        async with SessionLocal() as db:
+            with pytest.raises(ValueError):
+                jobs.enqueue(db, "test.nobody_handles_this", {})
+
+    run(scenario())
+
+
+def test_wake_listeners_fire_on_commit_only_and_do_not_pile_up(handlers, monkeypatch, run):
+    async def scenario():
+        monkeypatch.setattr(jobs, "_wakeup", asyncio.Event())
+        async with SessionLocal() as db:
+            for _ in range(3):
+                jobs.enqueue(db, "test.ok", {})
+            await db.rollback()
+            assert not jobs._wakeup.is_set()
+            assert event.contains(db.sync_session, "after_commit", jobs._on_commit)
+
+            jobs.enqueue(db, "test.ok", {})
+            await db.commit()
+            assert jobs._wakeup.is_set()
+
+            jobs._wakeup.clear()
+            await db.commit()  # nothing enqueued in this transaction
+            assert not jobs._wakeup.is_set()
+            result = await db.execute(select(Job.kind))
+            return result.scalars().all()
+
+    assert run(scenario()) == ["test.ok"]
+
+
+def test_kinds_can_override_the_job_timeout(handlers, monkeypatch, run):
+    monkeypatch.setattr(jobs, "JOB_TIMEOUT_SECONDS", 0.01)
+    monkeypatch.setattr(jobs, "_timeouts", {})
+
+    @jobs.job_handler("test.slow", timeout=None)
+    async def slow(payload):
+        await asyncio.sleep(0.05)
+        handlers.append(("slow", payload))
+
+    @jobs.job_handler("test.slow_default")
+    async def slow_default(payload):
+        await asyncio.sleep(0.05)
+
+    async def scenario():
+        slow_id = await _enqueue("test.slow")
+        default_id = await _enqueue("test.slow_default")
+        await _claim_and_run(jobs.JobWorker())
+        return await _job(slow_id), await _job(default_id)
+
+    slow_job, default_job = run(scenario())
+    assert slow_job is None and ("slow", {"n": 1}) in handlers
+    assert default_job.status == "pending" and "TimeoutError" in default_job.last_error
+
+
+def test_periodic_job_is_scheduled_once_and_one_offs_do_not_count(handlers, run):
+    async def scenario():
+        # A one-off recompute for a single day is pending at startup
+        async with SessionLocal() as db:
+            jobs.enqueue(db, "test.ok", {"day": "2026-10-19", "organization_id": 2})
+            await db.commit()
+        for _ in range(2):
+            await jobs.ensure_periodic("test.ok")
+        async with SessionLocal() as db:
+            result = await db.execute(select(Job.payload).where(Job.kind == "test.ok").order_by(Job.id))
+            return result.scalars().all()
+
+    assert run(scenario()) == [{"day": "2026-10-19", "organization_id": 2}, {}]
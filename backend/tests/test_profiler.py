@@ -0,0 +1,40 @@
+import asyncio
+import re
+import threading
+
+from app.utils import profiler
+
+
+async def _endpoint():
+    await asyncio.sleep(1)
+
+
+def test_suspended_requests_are_sampled_on_the_loop_thread(run, monkeypatch):
+    snapshot_threads = set()
+    all_tasks = asyncio.all_tasks
+
+    def recording_all_tasks(loop=None):
+        snapshot_threads.add(threading.get_ident())
+        return all_tasks(loop)
+
+    monkeypatch.setattr(profiler.asyncio, "all_tasks", recording_all_tasks)
+
+    async def scenario():
+        task = asyncio.create_task(_endpoint())
+        await asyncio.sleep(0)
+        session = profiler.ProfileSession(
+            0.2, 0.005, asyncio.get_running_loop(), threading.get_ident(),
+            route_path="/x", route_regex=re.compile("^/x$"), endpoint_code=_endpoint.__code__,
+        )
+        session.start()
+        await asyncio.sleep(0.25)
+        session.stop()
+        task.cancel()
+        return session
+
+    session = run(scenario())
+
+    assert snapshot_threads == {threading.get_ident()}
+    stacks = session.collapsed()
+    assert "await;" in stacks and "_endpoint" in stacks
+    assert session.snapshot()["samples"] == sum(session.await_samples.values())
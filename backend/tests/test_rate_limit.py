@@ -0,0 +1,74 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from app.services import rate_limit
+from app.services.rate_limit import InMemoryBucketStore, Quota
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(rate_limit.time, "monotonic", clock)
+    return clock
+
+
+def test_bucket_allows_a_burst_then_refills(clock, run):
+    store = InMemoryBucketStore()
+    quota = Quota(capacity=3, refill_per_second=0.5)
+
+    assert [run(store.take_all([("k", quota)]))[0] for _ in range(3)] == [0, 0, 0]
+    wait, empty = run(store.take_all([("k", quota)]))
+    assert wait == pytest.approx(2.0) and empty == 0
+
+    clock.now += 2.0
+    assert run(store.take_all([("k", quota)])) == (0, -1)
+
+
+def test_rejected_request_charges_neither_bucket(clock, run):
+    store = InMemoryBucketStore()
+    ip_quota, user_quota = Quota(10, 1), Quota(1, 0.1)
+    buckets = [("ip", ip_quota), ("user", user_quota)]
+
+    assert run(store.take_all(buckets)) == (0, -1)
+    wait, empty = run(store.take_all(buckets))
+    assert empty == 1 and wait == pytest.approx(10.0)
+    # The user's rejected retries left the shared IP bucket untouched
+    for _ in range(5):
+        run(store.take_all(buckets))
+    assert store.buckets["ip"][0] == pytest.approx(9)
+
+
+def test_idle_buckets_are_pruned(clock, run):
+    store = InMemoryBucketStore(max_keys=2)
+    quota = Quota(1, 1)
+    run(store.take_all([("a", quota)]))
+    clock.now += 601
+    run(store.take_all([("b", quota)]))
+    run(store.take_all([("c", quota)]))
+    assert "a" not in store.buckets
+
+
+def test_cv_slot_sheds_load_when_saturated(monkeypatch, run):
+    monkeypatch.setattr(rate_limit, "_cv_semaphore", asyncio.Semaphore(1))
+    monkeypatch.setattr(rate_limit, "CV_QUEUE_TIMEOUT_SECONDS", 0.01)
+
+    async def scenario():
+        async with rate_limit.cv_slot():
+            with pytest.raises(HTTPException) as rejected:
+                async with rate_limit.cv_slot():
+                    pass
+        async with rate_limit.cv_slot():
+            pass
+        return rejected.value.status_code
+
+    assert run(scenario()) == 503
@@ -0,0 +1,95 @@
+import asyncio
+
+import pytest
+
+from app.services import readiness
+
+
+def _reset(monkeypatch):
+    monkeypatch.setitem(readiness.state, "ready", False)
+    monkeypatch.setitem(readiness.state, "warmed_up", False)
+    monkeypatch.setitem(readiness.state, "attempts", 0)
+    monkeypatch.setitem(readiness.state, "warmup_seconds", None)
+    monkeypatch.setitem(readiness.state, "error", None)
+
+
+def test_warm_up_retries_until_the_database_answers(monkeypatch, run):
+    _reset(monkeypatch)
+    monkeypatch.setattr(readiness.face_recognition, "warm_up", lambda: 0.01)
+    failures = iter([ConnectionError("refused"), ConnectionError("refused")])
+
+    async def ping():
+        error = next(failures, None)
+        if error:
+            raise error
+
+    async def no_sleep(_delay):
+        pass
+
+    monkeypatch.setattr(readiness, "_ping_database", ping)
+    monkeypatch.setattr(readiness.asyncio, "sleep", no_sleep)
+    run(readiness._warm_up())
+
+    assert readiness.state["ready"] and readiness.state["warmed_up"]
+    assert readiness.state["attempts"] == 3
+
+
+def test_warm_up_stops_when_cancelled(monkeypatch, run):
+    _reset(monkeypatch)
+    monkeypatch.setattr(readiness.face_recognition, "warm_up", lambda: 0.01)
+
+    async def ping():
+        raise ConnectionError("refused")
+
+    monkeypatch.setattr(readiness, "_ping_database", ping)
+
+    async def scenario():
+        task = asyncio.create_task(readiness._warm_up())
+        await asyncio.sleep(0.05)
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            return True
+        return False
+
+    assert run(scenario())
+    assert not readiness.state["ready"]
+
+
+def test_check_follows_the_database_after_warm_up(monkeypatch, run):
+    _reset(monkeypatch)
+    monkeypatch.setitem(readiness.state, "warmed_up", True)
+    up = {"value": True}
+
+    async def ping():
+        if not up["value"]:
+            raise ConnectionError("refused")
+
+    monkeypatch.setattr(readiness, "_ping_database", ping)
+    assert run(readiness.check())
+    up["value"] = False
+    assert not run(readiness.check())
+    assert readiness.state["error"].startswith("database:")
+    up["value"] = True
+    assert run(readiness.check())
+
+
+def test_warm_up_maps_the_template_store(monkeypatch):
+    import sys
+    import types
+
+    np = pytest.importorskip("numpy")
+    from app.services import face_recognition, template_store
+
+    # Only the template store is under test; stand in for OpenCV and the detector
+    monkeypatch.setitem(sys.modules, "cv2", types.ModuleType("cv2"))
+    monkeypatch.setattr(face_recognition, "_face_cascade", types.SimpleNamespace(detectMultiScale=lambda *a, **k: ()))
+    monkeypatch.setattr(template_store, "_stores", {})
+    path = template_store.store_path(face_recognition.TEMPLATE_PIPELINE_VERSION)
+    template_store.apply_changes({1: ("a", np.zeros(template_store.TEMPLATE_DIM, dtype=np.uint8))}, [], path, "uint8")
+
+    face_recognition.warm_up()
+
+    store = template_store.get_template_store()
+    assert store._rows is not None and store.generation >= 1
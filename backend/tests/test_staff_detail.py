@@ -0,0 +1,130 @@
+from datetime import datetime, timedelta
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from sqlalchemy import event
+from sqlalchemy.exc import InvalidRequestError
+from sqlalchemy.future import select
+
+from app.config import STAFF_DETAIL_RECENT_LIMIT
+from app.database import SessionLocal, engine, get_read_db
+from app.models.attendance import Attendance
+from app.models.user import User
+from app.models.user_activity import UserActivity
+from app.routes import admin_routes
+
+
+@pytest.fixture
+def staff_tables(create_tables):
+    create_tables("users", "attendance", "user_activities")
+
+
+async def _seed(user_id: int, history: int) -> None:
+    start = datetime(2026, 1, 1)
+    async with SessionLocal() as db:
+        await db.execute(User.__table__.insert(), [
+            {"id": user_id, "organization_id": 1, "name": f"Staff {user_id}", "email": f"s{user_id}@example.com",
+             "is_admin": False, "role": "user"},
+        ])
+        if history:
+            await db.execute(Attendance.__table__.insert(), [
+                {"user_id": user_id, "organization_id": 1, "timestamp": start + timedelta(days=i),
+                 "location": "HQ", "battery_level": 50, "audit_photo_path": None}
+                for i in range(history)
+            ])
+            await db.execute(UserActivity.__table__.insert(), [
+                {"user_id": user_id, "organization_id": 1, "latitude": 1.0, "longitude": 2.0, "battery_level": 50.0,
+                 "timestamp": start + timedelta(hours=i)}
+                for i in range(history)
+            ])
+        await db.commit()
+
+
+def _app() -> FastAPI:
+    app = FastAPI()
+    app.include_router(admin_routes.router)
+    admin = User(id=1000, organization_id=1, email="admin@example.com", is_admin=True)
+    app.dependency_overrides[admin_routes.get_current_admin] = lambda: admin
+
+    async def read_db():
+        async with SessionLocal() as session:
+            yield session
+
+    app.dependency_overrides[get_read_db] = read_db
+    return app
+
+
+async def _get_counting_statements(app, path):
+    statements = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine.sync_engine, "before_cursor_execute", count)
+    try:
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            response = await client.get(path)
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", count)
+    return response, statements
+
+
+@pytest.mark.parametrize("history", [0, 3, STAFF_DETAIL_RECENT_LIMIT * 5])
+def test_staff_detail_is_three_statements_whatever_the_history(staff_tables, run, history):
+    async def scenario():
+        await _seed(1, history)
+        return await _get_counting_statements(_app(), "/admin/staff/1")
+
+    response, statements = run(scenario())
+
+    assert response.status_code == 200
+    assert len(statements) == 3, statements
+    body = response.json()
+    expected = min(history, STAFF_DETAIL_RECENT_LIMIT)
+    assert len(body["recent_attendance"]) == expected
+    assert len(body["recent_activities"]) == expected
+    # Newest first
+    timestamps = [row["timestamp"] for row in body["recent_attendance"]]
+    assert timestamps == sorted(timestamps, reverse=True)
+
+
+def test_recent_collections_are_limited_per_user(staff_tables, run):
+    async def scenario():
+        await _seed(1, STAFF_DETAIL_RECENT_LIMIT + 5)
+        await _seed(2, 2)
+        app = _app()
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            return [(await client.get(f"/admin/staff/{uid}")).json() for uid in (1, 2)]
+
+    first, second = run(scenario())
+    assert len(first["recent_attendance"]) == STAFF_DETAIL_RECENT_LIMIT
+    assert len(second["recent_attendance"]) == 2
+
+
+def test_staff_detail_is_scoped_to_the_admins_organization(staff_tables, run):
+    async def scenario():
+        await _seed(1, 1)
+        async with SessionLocal() as db:
+            await db.execute(User.__table__.update().where(User.id == 1).values(organization_id=2))
+            await db.commit()
+        return await _get_counting_statements(_app(), "/admin/staff/1")
+
+    response, _ = run(scenario())
+    assert response.status_code == 404
+
+
+def test_unloaded_collections_raise_instead_of_lazy_loading(staff_tables, run):
+    async def scenario():
+        await _seed(1, 2)
+        async with SessionLocal() as db:
+            user = (await db.execute(select(User).where(User.id == 1))).scalar_one()
+            errors = []
+            for name in ("activities", "recent_attendance", "recent_activities"):
+                try:
+                    getattr(user, name)
+                except InvalidRequestError as e:
+                    errors.append((name, "lazy='raise'" in str(e)))
+            return errors
+
+    assert run(scenario()) == [("activities", True), ("recent_attendance", True), ("recent_activities", True)]
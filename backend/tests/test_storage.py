@@ -0,0 +1,108 @@
+import io
+
+import pytest
+
+from app.services.storage import LocalBlobStore, blob_key_for_bytes, is_blob_key
+
+
+def test_generated_keys_are_blob_keys():
+    key = blob_key_for_bytes(b"photo", ".jpg")
+    assert is_blob_key(key)
+    assert is_blob_key(key[:-4])  # extension is optional
+
+
+@pytest.mark.parametrize("value", [
+    None,
+    "",
+    "uploads/staff_photos/karan.jpg",
+    "ab/cd/abcd.jpg",  # digest too short
+    "AB/CD/" + "AB" * 32 + ".jpg",  # uppercase
+    "ab/cd/" + "ef" * 32 + ".jpg",  # shards don't match the digest
+    "../../" + "ab" * 32,
+    "ab/cd/" + "ab" * 32 + "/../../etc/passwd",
+    "ab/ab/" + "ab" * 32 + ".jpg\n",  # "$" would accept the trailing newline
+])
+def test_rejects_anything_but_sha256_keys(value):
+    assert not is_blob_key(value)
+
+
+def test_local_store_round_trip_and_dedup(tmp_path, run):
+    store = LocalBlobStore(str(tmp_path))
+    key = run(store.put(b"same bytes"))
+    assert run(store.put(b"same bytes")) == key
+    assert run(store.get(key)) == b"same bytes"
+    assert run(store.local_path(key)).startswith(str(tmp_path))
+
+
+def test_local_store_refuses_paths_outside_root(tmp_path, run):
+    store = LocalBlobStore(str(tmp_path))
+    with pytest.raises(ValueError):
+        run(store.local_path("../../etc/passwd"))
+
+
+def test_blob_store_is_abstract():
+    from app.services.storage import BlobStore
+
+    class Incomplete(BlobStore):
+        async def put(self, data, ext=".jpg"):
+            return ""
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+
+class _ClientError(Exception):
+    pass
+
+
+class FakeS3:
+    """The slice of the boto3 S3 client S3BlobStore uses, backed by a dict (a MinIO stand-in)"""
+
+    class exceptions:
+        ClientError = _ClientError
+
+    def __init__(self):
+        self.objects = {}
+        self.puts = 0
+
+    def _object(self, Bucket, Key):
+        try:
+            return self.objects[(Bucket, Key)]
+        except KeyError:
+            raise _ClientError(f"NoSuchKey: {Key}")
+
+    def head_object(self, Bucket, Key):
+        self._object(Bucket, Key)
+        return {}
+
+    def get_object(self, Bucket, Key):
+        return {"Body": io.BytesIO(self._object(Bucket, Key))}
+
+    def put_object(self, Bucket, Key, Body):
+        self.puts += 1
+        self.objects[(Bucket, Key)] = bytes(Body)
+
+    def delete_object(self, Bucket, Key):
+        self.objects.pop((Bucket, Key), None)
+
+
+def test_s3_store_round_trip_through_the_cache(tmp_path, run):
+    from app.services.storage import S3BlobStore
+
+    s3 = FakeS3()
+    store = S3BlobStore("photos", cache_dir=str(tmp_path / "cache-a"), client=s3)
+    key = run(store.put(b"enrolled photo"))
+    assert run(store.put(b"enrolled photo")) == key and s3.puts == 1  # dedup via HEAD
+    assert s3.objects[("photos", key)] == b"enrolled photo"
+
+    # Another worker/host starts with an empty cache and reads through it
+    other = S3BlobStore("photos", cache_dir=str(tmp_path / "cache-b"), client=s3)
+    assert run(other.exists(key))
+    path = run(other.local_path(key))
+    assert path.startswith(str(tmp_path / "cache-b"))
+    assert run(other.get(key)) == b"enrolled photo"
+
+    run(other.delete(key))
+    assert ("photos", key) not in s3.objects
+    assert run(other.local_path(key)) is None
+    assert not run(other.exists(key))
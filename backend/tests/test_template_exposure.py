@@ -0,0 +1,24 @@
+import os
+import runpy
+
+from fastapi.testclient import TestClient
+
+
+def test_template_store_is_not_served_under_uploads(tmp_path, monkeypatch):
+    from app import config
+    from app.main import app
+
+    # The default location, as config.py computes it without an override
+    monkeypatch.delenv("TEMPLATE_STORE_DIR", raising=False)
+    default_dir = runpy.run_path(config.__file__)["TEMPLATE_STORE_DIR"]
+
+    # StaticFiles resolves its directory per request, relative to the cwd
+    monkeypatch.chdir(tmp_path)
+    os.makedirs("uploads", exist_ok=True)
+    os.makedirs(default_dir, exist_ok=True)
+    with open(os.path.join(default_dir, "templates-v1.bin"), "wb") as f:
+        f.write(b"\0" * 128)
+
+    client = TestClient(app)
+    assert client.get("/uploads/templates/templates-v1.bin").status_code == 404
+    assert client.get(f"/uploads/{os.path.basename(default_dir)}/templates-v1.bin").status_code == 404
@@ -0,0 +1,93 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from app.services import template_store  # noqa: E402
+from app.services.template_store import TEMPLATE_DIM, TemplateStore, apply_changes, rebuild  # noqa: E402
+
+
+def _template(value):
+    return np.full(TEMPLATE_DIM, value, dtype=np.uint8)
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "templates-v1.bin")
+
+
+def test_upserts_and_removals_bump_the_generation(path):
+    store = TemplateStore(path, check_seconds=0)
+    assert store.get(1, "a") is None
+
+    assert apply_changes({1: ("a", _template(1)), 2: ("b", _template(2))}, [], path, "uint8") == 1
+    assert store.get(1, "a")[0] == 1 and store.get(2, "b")[0] == 2
+
+    # Replace user 1's photo, drop user 2
+    assert apply_changes({1: ("a2", _template(7))}, [2], path, "uint8") == 2
+    assert store.get(1, "a2")[0] == 7
+    assert store.get(2, "b") is None
+    assert store.snapshot()["templates"] == 1 and store.generation == 2
+
+
+def test_stale_template_version_is_a_miss(path):
+    apply_changes({5: ("photo-old.jpg", _template(3))}, [], path, "uint8")
+    store = TemplateStore(path, check_seconds=0)
+    assert store.get(5, "photo-old.jpg") is not None
+    assert store.get(5, "photo-new.jpg") is None
+
+
+def test_readers_remap_only_after_the_check_interval(path, monkeypatch):
+    now = {"value": 100.0}
+    monkeypatch.setattr(template_store.time, "monotonic", lambda: now["value"])
+    apply_changes({1: ("a", _template(1))}, [], path, "uint8")
+    store = TemplateStore(path, check_seconds=2)
+    assert store.get(1, "a")[0] == 1
+
+    apply_changes({1: ("a", _template(9))}, [], path, "uint8")
+    assert store.get(1, "a")[0] == 1  # still the old mapping
+    now["value"] += 2
+    assert store.get(1, "a")[0] == 9
+
+
+def test_rebuild_keeps_rows_it_does_not_cover_and_the_file_dtype(path):
+    apply_changes({1: ("a", _template(1)), 2: ("b", _template(2))}, [], path, "uint8")
+    # User 3 was enrolled while the rebuild was reading the user list
+    apply_changes({3: ("c", _template(3))}, [], path, "uint8")
+
+    generation = rebuild({1: ("a", _template(11)), 2: ("b", _template(12))}, path, "uint8")
+
+    store = TemplateStore(path, check_seconds=0)
+    assert [store.get(uid, v)[0] for uid, v in ((1, "a"), (2, "b"), (3, "c"))] == [11, 12, 3]
+    assert generation == store.generation == 3
+
+    # Later changes keep the dtype the file was written with
+    apply_changes({4: ("d", _template(4))}, [], path, "float32")
+    store = TemplateStore(path, check_seconds=0)
+    assert store.get(4, "d").dtype == np.uint8
+
+
+def test_store_files_are_per_pipeline_version(tmp_path, monkeypatch):
+    monkeypatch.setattr(template_store, "TEMPLATE_STORE_DIR", str(tmp_path))
+    for version in ("v1", "v2"):
+        apply_changes({1: ("a", _template(1))}, [], template_store.store_path(version), "uint8")
+    (tmp_path / "templates-v3.bin.lock").write_text("")
+    assert template_store.stored_versions() == ["v1", "v2"]
+
+
+def test_match_distance_is_the_same_for_both_store_dtypes(tmp_path):
+    from app.services.face_recognition import template_distance
+
+    rng = np.random.default_rng(0)
+    enrolled = rng.integers(0, 256, TEMPLATE_DIM, dtype=np.uint8)
+    live = rng.integers(0, 256, TEMPLATE_DIM, dtype=np.uint8)
+
+    distances = []
+    for dtype in ("uint8", "float32"):
+        path = str(tmp_path / f"templates-{dtype}.bin")
+        apply_changes({1: ("a", enrolled)}, [], path, dtype)
+        stored = TemplateStore(path, check_seconds=0).get(1, "a")
+        assert stored.dtype == np.dtype(dtype)
+        distances.append(template_distance(stored, live))
+
+    # The thresholds were tuned on the wrapping uint8 difference
+    assert distances[0] == distances[1] == float(np.linalg.norm(enrolled - live))
@@ -0,0 +1,140 @@
+from collections import OrderedDict
+
+import pytest
+
+from app.services import verification_cache as cache
+
+
+@pytest.fixture(autouse=True)
+def fresh_cache(monkeypatch):
+    monkeypatch.setattr(cache, "_entries", OrderedDict())
+    monkeypatch.setattr(cache, "_size", 0)
+    monkeypatch.setattr(cache, "stats", {"hits": 0, "misses": 0, "evictions": 0})
+    monkeypatch.setattr(cache, "VERIFY_CACHE_MAX_HAMMING", 4)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = {"value": 100.0}
+    monkeypatch.setattr(cache.time, "monotonic", lambda: now["value"])
+    return now
+
+
+FRAME = 0xF0F0_F0F0_0F0F_0F0F
+
+
+def test_near_identical_frames_hit_within_hamming_distance(clock):
+    cache.put(1, "v1", FRAME, True, 0.31)
+
+    assert cache.get(1, "v1", FRAME ^ 0b1111) == (True, 0.31)  # 4 bits differ
+    assert cache.get(1, "v1", FRAME ^ 0b11111) is None  # 5 bits differ
+    # Different user or template version never matches
+    assert cache.get(2, "v1", FRAME) is None
+    assert cache.get(1, "v2", FRAME) is None
+    assert cache.stats["hits"] == 1 and cache.stats["misses"] == 3
+
+
+def test_entries_expire_after_ttl(monkeypatch, clock):
+    monkeypatch.setattr(cache, "VERIFY_CACHE_TTL_SECONDS", 120)
+    cache.put(1, "v1", FRAME, False, 0.9)
+
+    clock["value"] += 119
+    assert cache.get(1, "v1", FRAME) == (False, 0.9)
+    clock["value"] += 2
+    assert cache.get(1, "v1", FRAME) is None
+
+
+def test_per_user_and_global_bounds(monkeypatch, clock):
+    monkeypatch.setattr(cache, "VERIFY_CACHE_MAX_PER_USER", 2)
+    monkeypatch.setattr(cache, "VERIFY_CACHE_MAX_ENTRIES", 3)
+
+    for frame in (0x1, 0xFF00, 0xFF_0000_0000):
+        cache.put(1, "v1", frame, True, 0.2)
+    assert len(cache._entries[(1, "v1")]) == 2  # oldest frame dropped
+    assert cache.get(1, "v1", 0x1) is None
+
+    cache.put(2, "v1", FRAME, True, 0.2)
+    cache.put(3, "v1", FRAME, True, 0.2)  # 4 entries > 3: least recently used user goes
+    assert (1, "v1") not in cache._entries
+    assert cache.snapshot()["entries"] == 2 and cache.stats["evictions"] == 2
+
+
+def test_perceptual_hash_is_stable_under_recompression():
+    cv2 = pytest.importorskip("cv2")
+    np = pytest.importorskip("numpy")
+
+    gradient = np.tile(np.linspace(0, 255, 256, dtype=np.uint8), (256, 1))
+    img = cv2.merge([gradient, gradient.T, gradient])
+    high = cv2.imencode(".jpg", img, [cv2.IMWRITE_JPEG_QUALITY, 95])[1].tobytes()
+    low = cv2.imencode(".jpg", img, [cv2.IMWRITE_JPEG_QUALITY, 60])[1].tobytes()
+
+    assert cache._hamming(cache.perceptual_hash(high), cache.perceptual_hash(low)) <= 4
+    assert cache.perceptual_hash(b"not an image") is None
+
+
+@pytest.fixture
+def verify(monkeypatch, create_tables, run):
+    from pathlib import Path
+
+    from app.database import SessionLocal
+    from app.models.user import User
+    from app.services import face_recognition
+
+    create_tables("users")
+
+    async def seed():
+        async with SessionLocal() as db:
+            db.add(User(id=1, organization_id=1, name="Asha", email="a@example.com", photo_path="photos/a.jpg"))
+            await db.commit()
+    run(seed())
+
+    full_checks = []
+
+    def verify_against_stored(stored_path, image_bytes, stored_encoding, second_frame, liveness):
+        full_checks.append(image_bytes)
+        liveness.update(live=True, failed=[], scores={}, elapsed_ms=1.0)
+        return True, 0.3, (1, 2, 3, 4)
+
+    async def find_stored_photo(user):
+        return Path("photos/a.jpg")
+
+    monkeypatch.setattr(face_recognition, "_find_stored_photo", find_stored_photo)
+    monkeypatch.setattr(face_recognition, "template_version_for", lambda photo_path, stored_path: "v1")
+    monkeypatch.setattr(face_recognition, "_verify_against_stored", verify_against_stored)
+    monkeypatch.setattr(face_recognition, "_request_enrollment", lambda *args: None)
+    monkeypatch.setattr(cache, "perceptual_hash", lambda image_bytes: FRAME)
+
+    def _verify_twice():
+        async def scenario():
+            outcomes = []
+            async with SessionLocal() as db:
+                for frame in (b"frame-1", b"frame-1-recaptured"):
+                    details = {}
+                    outcomes.append((await face_recognition.verify_face(frame, 1, db, details=details), details))
+            return outcomes
+        return run(scenario()), full_checks
+    return _verify_twice
+
+
+def test_cache_hit_reports_no_face_box_or_liveness(monkeypatch, verify):
+    from app.services import face_recognition
+    monkeypatch.setattr(face_recognition, "LIVENESS_MODE", "log")
+
+    outcomes, full_checks = verify()
+
+    assert full_checks == [b"frame-1"]
+    (first, first_details), (second, second_details) = outcomes
+    assert first and second
+    assert first_details["face_box"] == (1, 2, 3, 4) and first_details["liveness"]["live"]
+    assert second_details == {"distance": 0.3, "face_box": None, "liveness": None}
+
+
+def test_enforced_liveness_checks_every_frame(monkeypatch, verify):
+    from app.services import face_recognition
+    monkeypatch.setattr(face_recognition, "LIVENESS_MODE", "enforce")
+
+    outcomes, full_checks = verify()
+
+    assert full_checks == [b"frame-1", b"frame-1-recaptured"]
+    assert all(details["liveness"]["live"] for _, details in outcomes)
+    assert cache.snapshot()["entries"] == 0
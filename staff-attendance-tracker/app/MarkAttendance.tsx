@@ -20,6 +20,8 @@ export default function MarkAttendance() {
   const cameraRef = React.useRef<CameraView>(null);
   const [permission, requestPermission] = useCameraPermissions();
   const [isCapturing, setIsCapturing] = React.useState(false);
+  // Reused across network-error retries so the server can replay its original answer
+  const idempotencyKeyRef = React.useRef<string | null>(null);
   
   const router = useRouter();
 
@@ -88,11 +90,16 @@ export default function MarkAttendance() {
       console.log('🚀 Sending request to:', requestUrl);
       console.log('📱 Request headers:', { 'Authorization': `Bearer ${token?.substring(0, 20)}...` });
       
+      if (!idempotencyKeyRef.current) {
+        idempotencyKeyRef.current = `${Date.now()}-${Math.random().toString(36).slice(2)}`;
+      }
+
       const response = await fetch(requestUrl, {
         method: 'POST',
         body: formData,
         headers: {
           'Authorization': `Bearer ${token}`,
+          'Idempotency-Key': idempotencyKeyRef.current,
           // Don't set Content-Type header, let fetch set it automatically for FormData
         },
       });
@@ -103,6 +110,9 @@ export default function MarkAttendance() {
       const result = await response.json();
       console.log('📦 Backend response:', result);
 
+      // The server answered, so the next attempt is a new request
+      idempotencyKeyRef.current = null;
+
       if (response.ok) {
         Alert.alert(
           'Success! ✅',
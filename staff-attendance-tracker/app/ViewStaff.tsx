@@ -1,4 +1,4 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import {
   View,
   Text,
@@ -24,26 +24,29 @@ interface Staff {
   email: string;
   role: string;
   photo_path?: string;
+  photo_url?: string | null;
+  thumbnail_url?: string | null;
   created_at?: string;
 }
 
 const ViewStaffScreen = () => {
   const [staffList, setStaffList] = useState<Staff[]>([]);
+  const [nextCursor, setNextCursor] = useState<number | null>(null);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [loading, setLoading] = useState(true);
   const [refreshing, setRefreshing] = useState(false);
   const [searchQuery, setSearchQuery] = useState('');
   const [imageErrors, setImageErrors] = useState<Set<number>>(new Set());
 
-  // Filter staff based on search query
-  const filteredStaff = staffList.filter(
-    staff =>
-      staff.name.toLowerCase().includes(searchQuery.toLowerCase()) ||
-      staff.email.toLowerCase().includes(searchQuery.toLowerCase()) ||
-      staff.role.toLowerCase().includes(searchQuery.toLowerCase())
-  );
+  // The server filters by name/email prefix (?q=), so only one page is ever loaded
+  const [activeQuery, setActiveQuery] = useState('');
+  const requestSeq = useRef(0);
+
+  const searchParams = (query: string) => (query.trim() ? { q: query.trim() } : {});
 
-  const fetchStaffList = async (showLoading = true) => {
+  const fetchStaffList = async (showLoading = true, query = activeQuery) => {
     if (showLoading) setLoading(true);
+    const seq = ++requestSeq.current;
     
     try {
       const token = await AsyncStorage.getItem('admin_token');
@@ -56,6 +59,7 @@ const ViewStaffScreen = () => {
       console.log('📋 Fetching staff list...');
       
       const response = await axios.get(LIST_STAFF_URL, {
+        params: searchParams(query),
         headers: {
           'Authorization': `Bearer ${token}`,
           'Content-Type': 'application/json',
@@ -63,8 +67,12 @@ const ViewStaffScreen = () => {
         timeout: 10000,
       });
 
-      console.log('✅ Staff list fetched:', response.data.length, 'members');
-      setStaffList(response.data);
+      // A newer search was started while this one was in flight
+      if (seq !== requestSeq.current) return;
+
+      console.log('✅ Staff list fetched:', response.data.items.length, 'members');
+      setStaffList(response.data.items);
+      setNextCursor(response.data.next_cursor);
       
     } catch (error: any) {
       console.error('❌ Error fetching staff:', error.response?.data || error.message);
@@ -80,6 +88,33 @@ const ViewStaffScreen = () => {
     }
   };
 
+  // Keyset pagination: fetch the page after the last loaded id
+  const fetchMoreStaff = async () => {
+    if (nextCursor === null || loadingMore) return;
+    setLoadingMore(true);
+    const seq = requestSeq.current;
+
+    try {
+      const token = await AsyncStorage.getItem('admin_token');
+      const response = await axios.get(LIST_STAFF_URL, {
+        params: { ...searchParams(activeQuery), cursor: nextCursor },
+        headers: {
+          'Authorization': `Bearer ${token}`,
+          'Content-Type': 'application/json',
+        },
+        timeout: 10000,
+      });
+
+      if (seq !== requestSeq.current) return;
+      setStaffList(prev => [...prev, ...response.data.items]);
+      setNextCursor(response.data.next_cursor);
+    } catch (error: any) {
+      console.error('❌ Error fetching more staff:', error.response?.data || error.message);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   const onRefresh = () => {
     setRefreshing(true);
     setImageErrors(new Set()); // Reset image errors on refresh
@@ -130,7 +165,12 @@ const ViewStaffScreen = () => {
   };
 
   const renderStaffItem = ({ item }: { item: Staff }) => {
-    const photoUrl = getPhotoUrl(item.photo_path);
+    // Prefer the small immutable thumbnail; fall back to the full photo
+    const photoUrl = item.thumbnail_url
+      ? `${API_BASE_URL}${item.thumbnail_url}`
+      : item.photo_url
+        ? `${API_BASE_URL}${item.photo_url}`
+        : getPhotoUrl(item.photo_path);
     const hasImageError = imageErrors.has(item.id);
     
     return (
@@ -142,7 +182,8 @@ const ViewStaffScreen = () => {
               <Image
                 source={{ 
                   uri: photoUrl,
-                  cache: 'reload' // Force reload to avoid caching issues
+                  // Thumbnails are content-addressed, so they are safe to cache
+                  cache: item.thumbnail_url ? 'force-cache' : 'reload'
                 }}
                 style={tw`w-16 h-16 rounded-full border-2 border-gray-200`}
                 onError={() => handleImageError(item.id)}
@@ -197,6 +238,16 @@ const ViewStaffScreen = () => {
     fetchStaffList();
   }, []);
 
+  // Debounce typing, then ask the server for the first page of matches
+  useEffect(() => {
+    if (searchQuery === activeQuery) return;
+    const timer = setTimeout(() => {
+      setActiveQuery(searchQuery);
+      fetchStaffList(false, searchQuery);
+    }, 300);
+    return () => clearTimeout(timer);
+  }, [searchQuery]);
+
   if (loading) {
     return (
       <View style={tw`flex-1 bg-gray-50 justify-center items-center`}>
@@ -216,7 +267,7 @@ const ViewStaffScreen = () => {
         <View style={tw`flex-row items-center bg-gray-100 rounded-xl px-4 py-3`}>
           <Ionicons name="search" size={20} color="#6B7280" />
           <TextInput
-            placeholder="Search by name, email, or role..."
+            placeholder="Search by name or email..."
             value={searchQuery}
             onChangeText={setSearchQuery}
             style={tw`flex-1 ml-3 text-gray-800`}
@@ -234,14 +285,14 @@ const ViewStaffScreen = () => {
       {/* Staff Count */}
       <View style={tw`px-6 py-3`}>
         <Text style={tw`text-gray-600`}>
-          {filteredStaff.length} staff member{filteredStaff.length !== 1 ? 's' : ''} found
+          {staffList.length} staff member{staffList.length !== 1 ? 's' : ''} found
         </Text>
       </View>
 
       {/* Staff List */}
-      {filteredStaff.length > 0 ? (
+      {staffList.length > 0 ? (
         <FlatList
-          data={filteredStaff}
+          data={staffList}
           renderItem={renderStaffItem}
           keyExtractor={(item) => item.id.toString()}
           contentContainerStyle={tw`px-6 pb-6`}
@@ -249,6 +300,8 @@ const ViewStaffScreen = () => {
             <RefreshControl refreshing={refreshing} onRefresh={onRefresh} />
           }
           showsVerticalScrollIndicator={false}
+          onEndReached={fetchMoreStaff}
+          onEndReachedThreshold={0.5}
         />
       ) : (
         <View style={tw`flex-1 justify-center items-center px-6`}>